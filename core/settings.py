@@ -72,6 +72,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'quizzes.middleware.TaxonomyMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -114,6 +115,31 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Shared by every worker process when REDIS_URL is set (redis://host:6379/0).
+# The quiz progress write buffer (quizzes/write_buffer.py) needs a shared
+# cache: on the process-local fallback it stays off and every navigation
+# and resume is written straight to the database.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -156,4 +182,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'accounts.User'
 
 # OpenAI API Key for quiz generation
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
\ No newline at end of file
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+# Number of background processes rendering performance PDFs
+QUIZ_REPORT_WORKERS = int(os.environ.get("QUIZ_REPORT_WORKERS", 1))
+
+# Score histogram bin width (score points) for percentile ranks
+QUIZ_PERCENTILE_BIN_WIDTH = 1.0
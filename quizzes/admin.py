@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Category, SubCategory, QuizAttempt
+from .models import (
+    ArchivedAttempt, Category, Concept, ConceptMastery, DailyPerformance, Question, QuestionStats,
+    QuizAttempt, RegradeJob, SubCategory,
+)
+from .regrade import queue_regrade
 
 
 @admin.register(Category)
@@ -19,11 +23,93 @@ class SubCategoryAdmin(admin.ModelAdmin):
 class QuizAttemptAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "category", "subcategory", "score", "started_at")
     list_filter = ("category", "difficulty", "status")
+    list_select_related = ("user", "category", "subcategory")
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        # The change list never shows the JSON payloads; the change form does
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            qs = qs.slim()
+        return qs
 
-from .models import Concept
 
 @admin.register(Concept)
 class ConceptAdmin(admin.ModelAdmin):
     list_display = ('name', 'subcategory', 'difficulty')
     list_filter = ('difficulty', 'subcategory')
     search_fields = ('name',)
+
+
+@admin.register(DailyPerformance)
+class DailyPerformanceAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'attempts', 'score_sum', 'correct', 'attempted')
+    list_filter = ('date',)
+    search_fields = ('user__username',)
+
+
+@admin.register(ConceptMastery)
+class ConceptMasteryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'concept', 'attempted', 'correct', 'mastery')
+    search_fields = ('user__username', 'concept__name')
+
+
+class QuestionStatsInline(admin.StackedInline):
+    model = QuestionStats
+    can_delete = False
+    readonly_fields = (
+        'responses', 'answered', 'p_value', 'discrimination',
+        'rate_a', 'rate_b', 'rate_c', 'rate_d', 'computed_at',
+    )
+
+
+@admin.register(Question)
+class QuestionAdmin(admin.ModelAdmin):
+    list_display = ('question_text', 'subcategory', 'difficulty', 'correct_answer',
+                    'usage_count', 'p_value', 'discrimination')
+    list_filter = ('difficulty', 'source', 'subcategory')
+    search_fields = ('question_text',)
+    list_select_related = ('subcategory', 'stats')
+    inlines = [QuestionStatsInline]
+    actions = ['regrade_attempts']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'correct_answer' in form.changed_data:
+            job = queue_regrade(obj)
+            self.message_user(request, f'Answer key changed: queued regrade job {job.pk}.')
+
+    @admin.action(description='Regrade attempts with the current answer key')
+    def regrade_attempts(self, request, queryset):
+        for question in queryset:
+            queue_regrade(question)
+        self.message_user(request, f'Queued {queryset.count()} regrade job(s).')
+
+    @admin.display(description='p-value', ordering='stats__p_value')
+    def p_value(self, obj):
+        stats = getattr(obj, 'stats', None)
+        return stats.p_value if stats else None
+
+    @admin.display(description='Discrimination', ordering='stats__discrimination')
+    def discrimination(self, obj):
+        stats = getattr(obj, 'stats', None)
+        return stats.discrimination if stats else None
+
+
+@admin.register(RegradeJob)
+class RegradeJobAdmin(admin.ModelAdmin):
+    list_display = ('question', 'target_version', 'status', 'attempts_regraded',
+                    'answers_changed', 'skipped', 'retry_at', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    raw_id_fields = ('question',)
+
+
+@admin.register(ArchivedAttempt)
+class ArchivedAttemptAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'subcategory', 'difficulty', 'score', 'completed_at', 'archived_at')
+    list_filter = ('difficulty', 'status')
+    list_select_related = ('user', 'subcategory')
+    search_fields = ('user__username',)
+    exclude = ('questions', 'ai_meta')
+
+    def has_change_permission(self, request, obj=None):
+        return False
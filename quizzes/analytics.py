@@ -0,0 +1,554 @@
+# quizzes/analytics.py
+"""
+Shared per-user analytics used by the dashboard, the performance dashboard
+and the PDF report.
+
+Every section of the summary is built with a single conditional-aggregation
+query and computed lazily, so a view only pays for the sections it renders.
+Use ``get_request_summary(request)`` inside views so the summary is memoised
+for the lifetime of the request.
+
+Attempts moved to the archive (see ``archive.py``) are counted through
+their ``ArchivedRollup`` totals.
+
+The "performance over time" series is served from the ``DailyPerformance``
+rollup table (maintained at finalize time) and downsampled with LTTB so the
+payload size does not grow with the user's history.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, Max, Min, Q, Sum
+from django.db.models.functions import Cast, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .archive import archive_cutoff, archived_days_started, archived_rollups
+from .models import (
+    ArchivedAttempt, ArchivedRollup, ConceptMastery, DailyPerformance, QuizAttempt, path_prefix_q,
+)
+
+DIFFICULTIES = [value for value, _ in QuizAttempt._meta.get_field('difficulty').choices]
+
+# Maximum number of points sent to a performance-over-time chart, and the
+# fewest it can be downsampled to (LTTB keeps the first and last point)
+SERIES_MAX_POINTS = 120
+SERIES_MIN_POINTS = 3
+
+# A concept needs this many graded answers before it can be called weak
+WEAK_CONCEPT_MIN_ANSWERS = 2
+WEAK_CONCEPT_THRESHOLD = 0.5
+
+SERIES_BUCKETS = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+COMPLETED = Q(status=QuizAttempt.STATUS_COMPLETED)
+
+
+def _accuracy(correct, attempted):
+    return (correct / attempted) * 100 if attempted else 0
+
+
+class UserSummary:
+    """
+    Lazily computed analytics for one user.
+
+    - ``overall``: totals, score stats, accuracy and per-difficulty figures (1 query)
+    - ``categories`` / ``subcategories``: per-topic breakdown (1 query, shared)
+
+    Both also fold in the user's ``ArchivedRollup`` rows (1 more query,
+    shared), so archived attempts still count towards lifetime figures.
+    - ``performance_over_time``: downsampled daily average score (1 query)
+    - ``streak``: consecutive-day streak (1 query)
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def _archived_rows(self):
+        return archived_rollups(self.user)
+
+    @cached_property
+    def overall(self):
+        week_ago = timezone.now() - timedelta(days=7)
+
+        aggregates = {
+            'total_attempted': Count('id'),
+            'total_completed': Count('id', filter=COMPLETED),
+            'score_sum': Sum('score', filter=COMPLETED),
+            'best_score': Max('score', filter=COMPLETED),
+            'worst_score': Min('score', filter=COMPLETED),
+            'total_correct': Sum('correct_answers', filter=COMPLETED),
+            'total_questions_attempted': Sum('attempted_questions', filter=COMPLETED),
+            'total_time': Sum('time_taken_seconds', filter=COMPLETED),
+            'last_7_days': Count('id', filter=COMPLETED & Q(completed_at__gte=week_ago)),
+        }
+        for difficulty in DIFFICULTIES:
+            only = COMPLETED & Q(difficulty=difficulty)
+            aggregates[f'{difficulty}_quizzes'] = Count('id', filter=only)
+            aggregates[f'{difficulty}_score_sum'] = Sum('score', filter=only)
+
+        row = QuizAttempt.objects.filter(user=self.user).aggregate(**aggregates)
+        for key, value in row.items():
+            if value is None and not key.endswith('_score'):
+                row[key] = 0
+
+        # Fold in attempts that have been moved to the archive
+        for archived in self._archived_rows:
+            row['total_attempted'] += archived['attempts']
+            if archived['status'] != QuizAttempt.STATUS_COMPLETED:
+                continue
+            row['total_completed'] += archived['attempts']
+            row['score_sum'] += archived['score_sum']
+            row['total_correct'] += archived['correct']
+            row['total_questions_attempted'] += archived['attempted']
+            row['total_time'] += archived['time_seconds']
+            row['best_score'] = max(row['best_score'] or 0, archived['best_score'])
+            row['worst_score'] = min(
+                archived['worst_score'] if row['worst_score'] is None else row['worst_score'],
+                archived['worst_score'],
+            )
+            if archived['difficulty'] in DIFFICULTIES:
+                row[f"{archived['difficulty']}_quizzes"] += archived['attempts']
+                row[f"{archived['difficulty']}_score_sum"] += archived['score_sum']
+
+        total_attempted = row['total_attempted']
+        total_completed = row['total_completed']
+        correct = row['total_correct']
+        attempted = row['total_questions_attempted']
+        total_time = row['total_time']
+
+        return {
+            'total_attempted': total_attempted,
+            'total_completed': total_completed,
+            'completion_rate': (total_completed / total_attempted) * 100 if total_attempted else 0,
+            'avg_score': row['score_sum'] / total_completed if total_completed else 0.0,
+            'best_score': row['best_score'] or 0.0,
+            'worst_score': row['worst_score'] or 0.0,
+            'total_correct': correct,
+            'total_questions_attempted': attempted,
+            'total_time': total_time,
+            'overall_accuracy': _accuracy(correct, attempted),
+            'avg_time_per_question': total_time / attempted if attempted else 0,
+            'last_7_days': row['last_7_days'],
+            'difficulty': [
+                {
+                    'difficulty': difficulty,
+                    'quizzes': row[f'{difficulty}_quizzes'],
+                    'avg_score': row[f'{difficulty}_score_sum'] / row[f'{difficulty}_quizzes'],
+                }
+                for difficulty in DIFFICULTIES
+                if row[f'{difficulty}_quizzes']
+            ],
+        }
+
+    @cached_property
+    def _topic_rows(self):
+        rows = list(
+            QuizAttempt.objects
+            .filter(COMPLETED, user=self.user)
+            .values('category__name', 'subcategory__name')
+            .annotate(
+                quizzes=Count('id'),
+                score_sum=Sum('score'),
+                correct=Sum('correct_answers'),
+                attempted=Sum('attempted_questions'),
+            )
+            .order_by()
+        )
+        for archived in self._archived_rows:
+            if archived['status'] == QuizAttempt.STATUS_COMPLETED:
+                rows.append({
+                    'category__name': archived['category__name'],
+                    'subcategory__name': archived['subcategory__name'],
+                    'quizzes': archived['attempts'],
+                    'score_sum': archived['score_sum'],
+                    'correct': archived['correct'],
+                    'attempted': archived['attempted'],
+                })
+        return rows
+
+    @cached_property
+    def categories(self):
+        """Completed quizzes per category, best average first."""
+        merged = {}
+        for row in self._topic_rows:
+            entry = merged.setdefault(row['category__name'], {
+                'category__name': row['category__name'],
+                'quizzes': 0,
+                'score_sum': 0.0,
+            })
+            entry['quizzes'] += row['quizzes']
+            entry['score_sum'] += row['score_sum'] or 0
+
+        categories = []
+        for entry in merged.values():
+            categories.append({
+                'category__name': entry['category__name'],
+                'quizzes': entry['quizzes'],
+                'avg_score': entry['score_sum'] / entry['quizzes'],
+            })
+        categories.sort(key=lambda c: c['avg_score'], reverse=True)
+        return categories
+
+    @cached_property
+    def subcategories(self):
+        """Accuracy per subcategory (topics without a subcategory are skipped)."""
+        merged = {}
+        for row in self._topic_rows:
+            name = row['subcategory__name']
+            if name is None:
+                continue
+            entry = merged.setdefault(name, {
+                'subcategory': name,
+                'quizzes': 0,
+                'correct': 0,
+                'attempted': 0,
+            })
+            entry['quizzes'] += row['quizzes']
+            entry['correct'] += row['correct'] or 0
+            entry['attempted'] += row['attempted'] or 0
+
+        subcategories = list(merged.values())
+        for entry in subcategories:
+            entry['accuracy'] = round(_accuracy(entry['correct'], entry['attempted']), 2)
+        return subcategories
+
+    @cached_property
+    def performance_over_time(self):
+        return performance_series(self.user)
+
+    @cached_property
+    def streak(self):
+        return calculate_streak(self.user)
+
+
+# ============================================================
+# DAILY ROLLUPS
+# ============================================================
+def _rollup_date(attempt):
+    return timezone.localtime(attempt.completed_at).date()
+
+
+def record_completed_attempt(attempt):
+    """
+    Add a freshly completed attempt to its user's ``DailyPerformance`` row.
+
+    Uses an atomic ``F()`` increment so concurrent finalizations on the same
+    day do not lose updates.
+    """
+    if attempt.completed_at is None:
+        return
+
+    key = {'user_id': attempt.user_id, 'date': _rollup_date(attempt)}
+    increments = {
+        'attempts': 1,
+        'score_sum': attempt.score,
+        'correct': attempt.correct_answers,
+        'attempted': attempt.attempted_questions,
+        'time_seconds': attempt.time_taken_seconds,
+    }
+    update = {field: F(field) + value for field, value in increments.items()}
+
+    if DailyPerformance.objects.filter(**key).update(**update):
+        return
+    try:
+        with transaction.atomic():
+            DailyPerformance.objects.create(**key, **increments)
+    except IntegrityError:
+        # Another request created the row in the meantime
+        DailyPerformance.objects.filter(**key).update(**update)
+
+
+def _daily_rows(attempts):
+    return (
+        attempts
+        .annotate(date=TruncDate('completed_at'))
+        .values('user_id', 'date')
+        .annotate(
+            attempts=Count('id'),
+            score_sum=Sum('score'),
+            correct=Sum('correct_answers'),
+            attempted=Sum('attempted_questions'),
+            time_seconds=Sum('time_taken_seconds'),
+        )
+        .order_by()
+    )
+
+
+def rebuild_daily_rollups(user_ids=None):
+    """
+    Recompute ``DailyPerformance`` from ``QuizAttempt`` and ``ArchivedAttempt``
+    (backfill / repair).
+
+    Returns the number of rollup rows written.
+    """
+    attempts = QuizAttempt.objects.filter(COMPLETED, completed_at__isnull=False)
+    archived = ArchivedAttempt.objects.filter(COMPLETED)
+    rollups = DailyPerformance.objects.all()
+    if user_ids is not None:
+        attempts = attempts.filter(user_id__in=user_ids)
+        archived = archived.filter(user_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+
+    # Archived days are only held in memory; days present in both tables
+    # (around the archive cutoff) are merged
+    archived_days = {
+        (row['user_id'], row['date']): row for row in _daily_rows(archived).iterator()
+    }
+
+    def merged():
+        for row in _daily_rows(attempts).iterator():
+            old = archived_days.pop((row['user_id'], row['date']), None)
+            if old:
+                for field in ('attempts', 'score_sum', 'correct', 'attempted', 'time_seconds'):
+                    row[field] += old[field]
+            yield DailyPerformance(**row)
+        for row in archived_days.values():
+            yield DailyPerformance(**row)
+
+    with transaction.atomic():
+        rollups.delete()
+        created = DailyPerformance.objects.bulk_create(merged(), batch_size=1000)
+    return len(created)
+
+
+def performance_series(user, bucket='day', max_points=SERIES_MAX_POINTS):
+    """
+    Average score over time for ``user`` as ``[{'date', 'avg_score', 'attempts'}]``.
+
+    ``bucket`` is ``'day'``, ``'week'`` or ``'month'``; coarser buckets are
+    aggregated from the daily rollups. Series longer than ``max_points`` are
+    downsampled with LTTB.
+    """
+    rollups = DailyPerformance.objects.filter(user=user)
+
+    trunc = SERIES_BUCKETS[bucket]
+    if trunc is None:
+        rows = rollups.values('date', 'attempts', 'score_sum').order_by('date')
+    else:
+        rows = (
+            rollups
+            .annotate(period=trunc('date'))
+            .values('period')
+            .annotate(attempts=Sum('attempts'), score_sum=Sum('score_sum'))
+            .values('period', 'attempts', 'score_sum')
+            .order_by('period')
+        )
+
+    series = []
+    for row in rows:
+        series.append({
+            'date': row.get('date', row.get('period')),
+            'avg_score': row['score_sum'] / row['attempts'] if row['attempts'] else 0,
+            'attempts': row['attempts'],
+        })
+    return downsample_lttb(series, max_points)
+
+
+def downsample_lttb(series, threshold, x_key='date', y_key='avg_score'):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, for every bucket in between, the
+    point forming the largest triangle with its neighbours, which preserves
+    peaks and dips far better than plain striding.
+    """
+    length = len(series)
+    if threshold >= length or threshold < 3:
+        return series
+
+    xs = [series[i][x_key].toordinal() for i in range(length)]
+    ys = [series[i][y_key] for i in range(length)]
+
+    sampled = [series[0]]
+    bucket_size = (length - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average point of the next bucket
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, length)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        # Point in the current bucket with the largest triangle area
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        best_area = -1
+        best = start
+        for j in range(start, end):
+            area = abs(
+                (xs[a] - avg_x) * (ys[j] - ys[a])
+                - (xs[a] - xs[j]) * (avg_y - ys[a])
+            )
+            if area > best_area:
+                best_area = area
+                best = j
+
+        sampled.append(series[best])
+        a = best
+
+    sampled.append(series[-1])
+    return sampled
+
+
+# ============================================================
+# CONCEPT MASTERY
+# ============================================================
+def record_concept_answer(user_id, concept_id, is_correct, previous_is_correct=None):
+    """
+    Fold one graded answer into the user's ``ConceptMastery`` row.
+
+    ``previous_is_correct`` is the earlier grade when the user changes an
+    answer, so re-answering adjusts ``correct`` without counting a second
+    attempt.
+    """
+    if concept_id is None:
+        return
+
+    if previous_is_correct is None:
+        d_attempted, d_correct = 1, int(is_correct)
+    else:
+        d_attempted, d_correct = 0, int(is_correct) - int(previous_is_correct)
+        if d_correct == 0:
+            return
+
+    key = {'user_id': user_id, 'concept_id': concept_id}
+    # mastery is listed first: MySQL evaluates SET clauses left to right and
+    # must see the old attempted/correct values here
+    update = {
+        'mastery': Cast(F('correct') + d_correct, FloatField()) / (F('attempted') + d_attempted),
+        'attempted': F('attempted') + d_attempted,
+        'correct': F('correct') + d_correct,
+        'updated_at': timezone.now(),
+    }
+
+    if ConceptMastery.objects.filter(**key).update(**update):
+        return
+    try:
+        with transaction.atomic():
+            ConceptMastery.objects.create(
+                **key,
+                attempted=d_attempted,
+                correct=max(d_correct, 0),
+                mastery=max(d_correct, 0) / d_attempted if d_attempted else 0.0,
+            )
+    except IntegrityError:
+        ConceptMastery.objects.filter(**key).update(**update)
+
+
+def apply_regrade_deltas(daily, concepts):
+    """
+    Adjust rollups after a regrade changed some grades.
+
+    ``daily`` maps ``(user_id, date)`` to ``(score_delta, correct_delta)``
+    for completed attempts; ``concepts`` maps ``(user_id, concept_id)`` to
+    the change in correct answers. One ``F()`` update per key.
+    """
+    for (user_id, date), (d_score, d_correct) in daily.items():
+        if d_score or d_correct:
+            DailyPerformance.objects.filter(user_id=user_id, date=date).update(
+                score_sum=F('score_sum') + d_score,
+                correct=F('correct') + d_correct,
+            )
+
+    now = timezone.now()
+    for (user_id, concept_id), d_correct in concepts.items():
+        if concept_id is None or not d_correct:
+            continue
+        # mastery first, as in record_concept_answer
+        ConceptMastery.objects.filter(
+            user_id=user_id, concept_id=concept_id, attempted__gt=0
+        ).update(
+            mastery=Cast(F('correct') + d_correct, FloatField()) / F('attempted'),
+            correct=F('correct') + d_correct,
+            updated_at=now,
+        )
+
+
+def branch_summary(user, node):
+    """
+    Completed quizzes of ``user`` on every topic under subcategory ``node``
+    (a whole branch, e.g. all of CSE): one query over the subcategory path
+    index, plus one over the archived totals.
+    """
+    branch = path_prefix_q(node.path, 'subcategory__path')
+    totals = {'quizzes': 0, 'score_sum': 0.0, 'correct': 0, 'attempted': 0}
+    rows = (
+        QuizAttempt.objects.filter(COMPLETED, branch, user=user).aggregate(
+            quizzes=Count('id'), score_sum=Sum('score'),
+            correct=Sum('correct_answers'), attempted=Sum('attempted_questions'),
+        ),
+        ArchivedRollup.objects.filter(COMPLETED, branch, user=user).aggregate(
+            quizzes=Sum('attempts'), score_sum=Sum('score_sum'),
+            correct=Sum('correct'), attempted=Sum('attempted'),
+        ),
+    )
+    for row in rows:
+        for key in totals:
+            totals[key] += row[key] or 0
+
+    return {
+        'quizzes': totals['quizzes'],
+        'avg_score': round(totals['score_sum'] / totals['quizzes'], 1) if totals['quizzes'] else 0,
+        'accuracy': round(_accuracy(totals['correct'], totals['attempted']), 1),
+    }
+
+
+def weak_concepts(user, limit=10):
+    """Names of the user's weakest concepts, lowest mastery first (1 query)."""
+    return list(
+        ConceptMastery.objects
+        .filter(
+            user=user,
+            attempted__gte=WEAK_CONCEPT_MIN_ANSWERS,
+            mastery__lte=WEAK_CONCEPT_THRESHOLD,
+        )
+        .order_by('mastery')
+        .values_list('concept__name', flat=True)[:limit]
+    )
+
+
+def calculate_streak(user):
+    """
+    Calculate consecutive-day quiz streak for a user.
+
+    Fetches the distinct days with a started attempt in one query and walks
+    back from today; archived days are only read for streaks that reach the
+    archive cutoff.
+    """
+    days = set(
+        QuizAttempt.objects
+        .filter(user=user, started_at__isnull=False)
+        .annotate(day=TruncDate('started_at'))
+        .values_list('day', flat=True)
+        .order_by()
+        .distinct()
+    )
+
+    streak = 0
+    today = timezone.localdate()
+    while today - timedelta(days=streak) in days:
+        streak += 1
+
+    # Only a streak reaching back past the archive cutoff can continue there
+    if streak and today - timedelta(days=streak) <= timezone.localtime(archive_cutoff()).date():
+        days |= archived_days_started(user)
+        while today - timedelta(days=streak) in days:
+            streak += 1
+    return streak
+
+
+def get_request_summary(request):
+    """Return the ``UserSummary`` for ``request.user``, memoised on the request."""
+    summary = getattr(request, '_quiz_user_summary', None)
+    if summary is None or summary.user != request.user:
+        summary = UserSummary(request.user)
+        request._quiz_user_summary = summary
+    return summary
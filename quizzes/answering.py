@@ -0,0 +1,133 @@
+# quizzes/answering.py
+"""
+Answer submission with optimistic concurrency.
+
+Answering used to load the attempt, change the ``questions`` JSON in Python
+and ``save()`` the whole row. Two quick clicks or two open tabs could
+interleave those steps: one answer overwrote the other, or
+``current_question_index`` moved on twice.
+
+``QuizAttempt.version`` is bumped by every write of the answer state. An
+answer is graded on the attempt as read, without any lock, and written
+with one conditional statement::
+
+    UPDATE quizzes_quizattempt
+       SET questions = ..., current_question_index = ..., version = version + 1
+     WHERE id = ... AND version = <version read>
+
+If another request got there first, no row matches: the attempt is read
+again and the answer re-applied on top, up to ``MAX_RETRIES`` times. No row
+lock is held while Python grades, and the UPDATE touches only the answer
+columns, so a concurrent pause or resume of the timer is not overwritten.
+
+Answers name the question they belong to (``(index, letter)``), which makes
+a repeated submission of the same answer harmless: it lands on the same
+question again instead of on the next one.
+"""
+import random
+import time
+
+from django.db.models import F
+from django.utils import timezone
+
+from .analytics import record_concept_answer
+from .models import QuizAttempt
+from .question_refs import hydrate_questions
+from .write_buffer import apply_buffered, discard_buffered
+
+MAX_RETRIES = 5
+
+# Upper bound of the random pause before a retry, in seconds
+RETRY_BACKOFF = 0.02
+
+ANSWER_FIELDS = ('questions', 'current_question_index')
+
+
+class AnswerConflict(Exception):
+    """The attempt kept changing underneath; the answer was not saved."""
+
+
+def grade_answers(quiz_attempt, answers):
+    """
+    Record ``(index, letter)`` answers on the attempt's question entries,
+    graded against the served question versions (resolved in one go).
+
+    Returns ``(concept_id, is_correct, previous_is_correct)`` per answer for
+    ``record_graded_concepts``; the caller saves the attempt.
+    """
+    questions = quiz_attempt.questions
+    served = hydrate_questions([questions[index] for index, _ in answers])
+
+    graded = []
+    for (index, user_answer), content in zip(answers, served):
+        question = questions[index]
+        previous_is_correct = question.get('is_correct') if question.get('user_answer') is not None else None
+        question['user_answer'] = user_answer
+        question['is_correct'] = user_answer == content['correct_answer']
+        graded.append((content.get('concept_id'), question['is_correct'], previous_is_correct))
+    return graded
+
+
+def record_graded_concepts(user_id, graded):
+    for concept_id, is_correct, previous_is_correct in graded:
+        record_concept_answer(user_id, concept_id, is_correct, previous_is_correct)
+
+
+def save_versioned(attempt, fields, statuses=(QuizAttempt.STATUS_IN_PROGRESS,)):
+    """
+    Write ``fields`` of ``attempt`` only if nobody wrote it since it was
+    read and its stored status is one of ``statuses`` (an answer read
+    before the quiz was finished must not land after it). Returns ``False``
+    (and writes nothing) on a conflict.
+    """
+    now = timezone.now()
+    updated = QuizAttempt.objects.filter(
+        pk=attempt.pk, version=attempt.version, status__in=statuses
+    ).update(
+        version=F('version') + 1,
+        updated_at=now,
+        **{field: getattr(attempt, field) for field in fields},
+    )
+    if updated:
+        attempt.version += 1
+        attempt.updated_at = now
+    return bool(updated)
+
+
+def reload_attempt(attempt, fields=()):
+    """Re-read the answer state (and ``fields``) of ``attempt`` after a conflict."""
+    attempt.refresh_from_db(fields=[*ANSWER_FIELDS, *fields, 'version', 'status'])
+    # Buffered navigation is newer than the row, unless an answer moved on
+    return apply_buffered(attempt)
+
+
+def submit_answers(attempt, answers, position=None, advance=False):
+    """
+    Grade and save ``(index, letter)`` answers on ``attempt`` (updated in place).
+
+    ``position`` sets the question on screen; ``advance`` moves it past the
+    last answered question instead (the one-question-per-page flow), never
+    backwards. Returns the graded answers for ``record_graded_concepts``, or
+    ``None`` if the attempt is no longer in progress. Raises
+    ``AnswerConflict`` after ``MAX_RETRIES`` lost races.
+    """
+    for retry in range(MAX_RETRIES):
+        if retry:
+            time.sleep(random.uniform(0, RETRY_BACKOFF * retry))
+            reload_attempt(attempt)
+        if attempt.status != QuizAttempt.STATUS_IN_PROGRESS:
+            return None
+
+        graded = grade_answers(attempt, answers)
+        if advance and answers:
+            attempt.current_question_index = max(
+                attempt.current_question_index, max(index for index, _ in answers) + 1
+            )
+        elif position is not None:
+            attempt.current_question_index = position
+
+        if save_versioned(attempt, ANSWER_FIELDS):
+            discard_buffered(attempt, ['current_question_index'])
+            return graded
+
+    raise AnswerConflict(f'Attempt {attempt.pk} changed {MAX_RETRIES} times while answering')
@@ -0,0 +1,241 @@
+# quizzes/archive.py
+"""
+Tiered archival of old attempts.
+
+Finished attempts completed more than ``QUIZ_ARCHIVE_AFTER_DAYS`` ago are
+moved from ``QuizAttempt`` into ``ArchivedAttempt`` by the
+``archive_attempts`` command, so the hot table (and every user-scoped scan
+and backup of it) stays bounded by the retention window rather than by the
+age of the site.
+
+Each batch is one transaction that:
+
+- copies the oldest finished attempts into the archive; the compressed
+  ``questions`` / ``ai_meta`` bytes are copied as they are, without decoding,
+- folds them into ``ArchivedRollup`` (one ``F()`` update per user/topic/
+  difficulty/status), so lifetime totals in ``analytics`` stay exact,
+- deletes them from ``QuizAttempt``; their ``ServedQuestion`` rows go with
+  them. No change-feed tombstones are written, since the attempts were
+  moved, not deleted.
+
+``DailyPerformance`` and ``ConceptMastery`` already hold the attempts'
+contribution and are left alone. Archived attempts are frozen: regrades,
+item statistics, score distributions and the leaderboard only cover the
+hot window.
+
+Reads are transparent: ``get_attempt_or_404`` falls back to the archive for
+results pages, and history and exports merge both tables in order.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Least, TruncDate
+from django.http import Http404
+from django.utils import timezone
+
+from .models import ArchivedAttempt, ArchivedRollup, QuizAttempt
+from .signals import suppress_tombstones
+
+ARCHIVE_BATCH_SIZE = 500
+
+FINISHED = (QuizAttempt.STATUS_COMPLETED, QuizAttempt.STATUS_ABANDONED)
+
+# Columns copied from QuizAttempt to ArchivedAttempt
+ARCHIVE_FIELDS = [
+    'id', 'user_id', 'category_id', 'subcategory_id', 'difficulty', 'status',
+    'total_questions', 'correct_answers', 'attempted_questions', 'score',
+    'time_limit_seconds', 'time_taken_seconds', 'created_at', 'started_at',
+    'completed_at', 'questions', 'ai_meta',
+]
+
+ROLLUP_KEY = ('user_id', 'category_id', 'subcategory_id', 'difficulty', 'status')
+
+
+def archive_after_days():
+    return int(getattr(settings, 'QUIZ_ARCHIVE_AFTER_DAYS', 365))
+
+
+def archive_cutoff(days=None):
+    """Attempts completed before this moment are due for archival."""
+    return timezone.now() - timedelta(days=archive_after_days() if days is None else days)
+
+
+# ============================================================
+# MOVING ATTEMPTS
+# ============================================================
+def _rollup_increments(rows):
+    totals = {}
+    for row in rows:
+        key = tuple(row[field] for field in ROLLUP_KEY)
+        entry = totals.setdefault(key, {
+            'attempts': 0, 'score_sum': 0.0, 'correct': 0, 'attempted': 0,
+            'time_seconds': 0, 'best_score': row['score'], 'worst_score': row['score'],
+        })
+        entry['attempts'] += 1
+        entry['score_sum'] += row['score']
+        entry['correct'] += row['correct_answers']
+        entry['attempted'] += row['attempted_questions']
+        entry['time_seconds'] += row['time_taken_seconds']
+        entry['best_score'] = max(entry['best_score'], row['score'])
+        entry['worst_score'] = min(entry['worst_score'], row['score'])
+    return totals
+
+
+def _apply_rollups(totals):
+    for key, increments in totals.items():
+        lookup = dict(zip(ROLLUP_KEY, key))
+        update = {
+            'attempts': F('attempts') + increments['attempts'],
+            'score_sum': F('score_sum') + increments['score_sum'],
+            'correct': F('correct') + increments['correct'],
+            'attempted': F('attempted') + increments['attempted'],
+            'time_seconds': F('time_seconds') + increments['time_seconds'],
+            'best_score': Greatest(F('best_score'), increments['best_score']),
+            'worst_score': Least(F('worst_score'), increments['worst_score']),
+            'updated_at': timezone.now(),
+        }
+        if ArchivedRollup.objects.filter(**lookup).update(**update):
+            continue
+        try:
+            with transaction.atomic():
+                ArchivedRollup.objects.create(**lookup, **increments)
+        except IntegrityError:
+            ArchivedRollup.objects.filter(**lookup).update(**update)
+
+
+def archive_batch(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move the oldest finished attempts completed before ``cutoff`` into the
+    archive. Returns the number moved (0 when nothing is left to archive).
+    """
+    with transaction.atomic():
+        rows = list(
+            QuizAttempt.objects
+            .filter(status__in=FINISHED, completed_at__lt=cutoff)
+            .order_by('completed_at', 'id')
+            .select_for_update()
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        ArchivedAttempt.objects.bulk_create(ArchivedAttempt(**row) for row in rows)
+        _apply_rollups(_rollup_increments(rows))
+
+        with suppress_tombstones():
+            QuizAttempt.objects.filter(pk__in=[row['id'] for row in rows]).only('pk').delete()
+
+    return len(rows)
+
+
+def replication_lag(alias):
+    """
+    Seconds the MySQL replica ``alias`` is behind its source, or ``None``
+    when it cannot be determined (not MySQL, not a replica, or stopped).
+    """
+    connection = connections[alias]
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute('SHOW REPLICA STATUS')
+        except DatabaseError:
+            # MySQL < 8.0.22
+            cursor.execute('SHOW SLAVE STATUS')
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        status = dict(zip((column[0] for column in cursor.description), row))
+    return status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+
+
+def wait_for_replicas(aliases, max_lag, poll=1.0, timeout=300):
+    """
+    Block until every replica in ``aliases`` is at most ``max_lag`` seconds
+    behind. Returns the seconds spent waiting; raises ``TimeoutError``
+    after ``timeout``.
+    """
+    started = time.monotonic()
+    while True:
+        lags = [replication_lag(alias) for alias in aliases]
+        if all(lag is None or lag <= max_lag for lag in lags):
+            return time.monotonic() - started
+        if time.monotonic() - started > timeout:
+            raise TimeoutError(f'Replication lag still {max(l for l in lags if l is not None)}s')
+        time.sleep(poll)
+
+
+# ============================================================
+# READ PATH
+# ============================================================
+def as_attempt(archived):
+    """An unsaved ``QuizAttempt`` carrying an archived attempt's data (read-only)."""
+    attempt = QuizAttempt(
+        id=archived.pk,
+        user_id=archived.user_id,
+        category_id=archived.category_id,
+        subcategory_id=archived.subcategory_id,
+        difficulty=archived.difficulty,
+        status=archived.status,
+        total_questions=archived.total_questions,
+        correct_answers=archived.correct_answers,
+        attempted_questions=archived.attempted_questions,
+        score=archived.score,
+        time_limit_seconds=archived.time_limit_seconds,
+        time_taken_seconds=archived.time_taken_seconds,
+        started_at=archived.started_at,
+        completed_at=archived.completed_at,
+        created_at=archived.created_at,
+        current_question_index=archived.total_questions,
+    )
+    # Hand over the still-compressed payloads; they decode on first access
+    attempt.__dict__['questions'] = archived.__dict__.get('questions')
+    attempt.__dict__['ai_meta'] = archived.__dict__.get('ai_meta')
+    if 'category' in archived._state.fields_cache:
+        attempt.category = archived.category
+    if 'subcategory' in archived._state.fields_cache:
+        attempt.subcategory = archived.subcategory
+    attempt.is_archived = True
+    return attempt
+
+
+def get_attempt_or_404(user, attempt_id):
+    """``user``'s attempt by id from the hot table, or else from the archive."""
+    attempt = QuizAttempt.objects.filter(id=attempt_id, user=user).first()
+    if attempt is not None:
+        return attempt
+
+    archived = (
+        ArchivedAttempt.objects
+        .select_related('category', 'subcategory')
+        .filter(id=attempt_id, user=user)
+        .first()
+    )
+    if archived is None:
+        raise Http404('No attempt matches the given query.')
+    return as_attempt(archived)
+
+
+def archived_rollups(user):
+    """``ArchivedRollup`` rows of ``user`` as dicts (1 query)."""
+    return list(
+        ArchivedRollup.objects.filter(user=user).values(
+            'category__name', 'subcategory__name', 'difficulty', 'status', 'attempts',
+            'score_sum', 'best_score', 'worst_score', 'correct', 'attempted', 'time_seconds',
+        )
+    )
+
+
+def archived_days_started(user):
+    """Distinct days ``user`` started archived attempts on (1 query)."""
+    return set(
+        ArchivedAttempt.objects
+        .filter(user=user, started_at__isnull=False)
+        .annotate(day=TruncDate('started_at'))
+        .values_list('day', flat=True)
+        .order_by()
+        .distinct()
+    )
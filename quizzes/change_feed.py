@@ -0,0 +1,130 @@
+# quizzes/change_feed.py
+"""
+Incremental change feed for the downstream warehouse.
+
+Each stream is read in keyset order on ``(changed_at, pk)`` starting after
+the stream's ``ExportCheckpoint``, so a run only scans rows changed since
+the last one (a range scan on the ``(updated_at, id)`` index). Deletions are
+exported from the ``DeletedRecord`` tombstone stream.
+
+Rows changed in the last ``lag`` seconds are left for the next run: a
+transaction that commits late can carry an ``updated_at`` slightly older
+than rows already exported, and would otherwise be skipped for good.
+Delivery is at-least-once -- the checkpoint only advances after a batch has
+been written, so a crashed run re-exports at most one batch.
+"""
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from .fields import decode_json
+from .models import (
+    DeletedRecord, ExportCheckpoint, Question, QuestionRevision, QuizAttempt,
+)
+
+FEED_BATCH_SIZE = 1000
+
+# Seconds to stay behind "now" so in-flight transactions are not skipped
+FEED_LAG_SECONDS = 60
+
+
+class ChangeStream:
+    """A model exported incrementally, ordered by ``changed_field`` then pk."""
+
+    def __init__(self, name, model, changed_field):
+        self.name = name
+        self.model = model
+        self.changed_field = changed_field
+
+    @property
+    def fields(self):
+        return [f.attname for f in self.model._meta.concrete_fields]
+
+    def position(self, row):
+        """Keyset position ``(changed_at, pk)`` of an exported row."""
+        return row[self.changed_field], str(row[self.model._meta.pk.attname])
+
+    def changes(self, after, upper, batch_size):
+        """Next batch of rows after position ``after`` and up to ``upper``."""
+        changed = self.changed_field
+        qs = self.model.objects.filter(**{f'{changed}__lte': upper})
+
+        changed_at, pk = after
+        if changed_at is not None:
+            qs = qs.filter(
+                Q(**{f'{changed}__gt': changed_at})
+                | Q(**{changed: changed_at, 'pk__gt': pk})
+            )
+
+        rows = list(qs.order_by(changed, 'pk').values(*self.fields)[:batch_size])
+        for row in rows:
+            for key, value in row.items():
+                row[key] = decode_json(value)
+        return rows
+
+
+STREAMS = {
+    stream.name: stream
+    for stream in [
+        ChangeStream('attempts', QuizAttempt, 'updated_at'),
+        ChangeStream('questions', Question, 'updated_at'),
+        ChangeStream('question_revisions', QuestionRevision, 'created_at'),
+        ChangeStream('tombstones', DeletedRecord, 'deleted_at'),
+    ]
+}
+
+
+def get_checkpoint(stream_name):
+    checkpoint, _ = ExportCheckpoint.objects.get_or_create(stream=stream_name)
+    return checkpoint
+
+
+def advance_checkpoint(checkpoint, stream, rows):
+    """Move the watermark past the last row of a written batch."""
+    checkpoint.last_changed_at, checkpoint.last_pk = stream.position(rows[-1])
+    checkpoint.batches += 1
+    checkpoint.rows += len(rows)
+    checkpoint.save()
+
+
+def iter_change_batches(stream, batch_size=FEED_BATCH_SIZE, lag=FEED_LAG_SECONDS):
+    """
+    Yield ``(checkpoint, rows)`` batches for ``stream``.
+
+    The caller writes each batch, then calls ``advance_checkpoint``; batches
+    that were never checkpointed are exported again on the next run.
+    """
+    checkpoint = get_checkpoint(stream.name)
+    upper = timezone.now() - timedelta(seconds=lag)
+    after = (checkpoint.last_changed_at, checkpoint.last_pk)
+
+    while True:
+        rows = stream.changes(after, upper, batch_size)
+        if not rows:
+            return
+        yield checkpoint, rows
+        if len(rows) < batch_size:
+            return
+        after = stream.position(rows[-1])
+
+
+def encode_ndjson(rows):
+    return ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+
+
+def encode_csv(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({
+            key: json.dumps(value, cls=DjangoJSONEncoder)
+            if isinstance(value, (list, dict)) else value
+            for key, value in row.items()
+        })
+    return buffer.getvalue()
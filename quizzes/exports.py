@@ -0,0 +1,133 @@
+# quizzes/exports.py
+"""
+Streaming CSV / NDJSON export of a user's attempt history.
+
+Rows are read in keyset-paginated batches on ``(created_at, id)`` and
+written straight to a ``StreamingHttpResponse``, so memory stays flat no
+matter how many attempts a user has. (A single ``.iterator()`` would also
+work on PostgreSQL/SQLite, but MySQL drivers buffer the whole result set
+client-side.) The heavy ``questions`` / ``ai_meta`` JSON is only read when
+per-question detail is requested. Archived attempts (see ``archive.py``)
+are read the same way from ``ArchivedAttempt`` and merged in order.
+"""
+import csv
+import heapq
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .fields import decode_json
+from .models import ArchivedAttempt, QuizAttempt
+from .question_refs import hydrate_questions
+
+EXPORT_CHUNK_SIZE = 500
+
+ATTEMPT_FIELDS = [
+    'id', 'created_at', 'category__name', 'subcategory__name', 'difficulty',
+    'status', 'score', 'correct_answers', 'attempted_questions',
+    'total_questions', 'time_taken_seconds', 'started_at', 'completed_at',
+]
+
+ATTEMPT_HEADER = [
+    'attempt_id', 'created_at', 'category', 'subcategory', 'difficulty',
+    'status', 'score', 'correct_answers', 'attempted_questions',
+    'total_questions', 'time_taken_seconds', 'started_at', 'completed_at',
+]
+
+QUESTION_HEADER = [
+    'question_number', 'question', 'user_answer', 'correct_answer', 'is_correct',
+]
+
+STATUS_LABELS = dict(QuizAttempt.STATUS_CHOICES)
+
+
+class Echo:
+    """File-like object whose ``write`` just returns the value (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def _iter_model_rows(model, user, fields, chunk_size):
+    base = model.objects.filter(user=user).order_by('created_at', 'id')
+
+    last = None
+    while True:
+        qs = base
+        if last is not None:
+            qs = qs.filter(
+                Q(created_at__gt=last['created_at'])
+                | Q(created_at=last['created_at'], id__gt=last['id'])
+            )
+        batch = list(qs.values(*fields)[:chunk_size])
+        if not batch:
+            return
+        yield from batch
+        if len(batch) < chunk_size:
+            return
+        last = batch[-1]
+
+
+def iter_attempt_rows(user, detail=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield attempt dicts for ``user`` (archived ones included), oldest first."""
+    fields = ATTEMPT_FIELDS + (['questions'] if detail else [])
+    return heapq.merge(
+        _iter_model_rows(ArchivedAttempt, user, fields, chunk_size),
+        _iter_model_rows(QuizAttempt, user, fields, chunk_size),
+        key=lambda row: (row['created_at'], row['id']),
+    )
+
+
+def _attempt_values(row):
+    return [
+        row['id'],
+        row['created_at'].isoformat() if row['created_at'] else '',
+        row['category__name'] or '',
+        row['subcategory__name'] or '',
+        row['difficulty'],
+        STATUS_LABELS.get(row['status'], row['status']),
+        row['score'],
+        row['correct_answers'],
+        row['attempted_questions'],
+        row['total_questions'],
+        row['time_taken_seconds'],
+        row['started_at'].isoformat() if row['started_at'] else '',
+        row['completed_at'].isoformat() if row['completed_at'] else '',
+    ]
+
+
+def stream_csv(user, detail=False):
+    """CSV lines; with ``detail`` there is one line per served question."""
+    writer = csv.writer(Echo())
+
+    if detail:
+        yield writer.writerow(ATTEMPT_HEADER + QUESTION_HEADER)
+    else:
+        yield writer.writerow(ATTEMPT_HEADER)
+
+    for row in iter_attempt_rows(user, detail=detail):
+        values = _attempt_values(row)
+        if not detail:
+            yield writer.writerow(values)
+            continue
+
+        questions = hydrate_questions(decode_json(row['questions']) or [])
+        for number, q in enumerate(questions, start=1):
+            yield writer.writerow(values + [
+                number,
+                q.get('question', ''),
+                q.get('user_answer') or '',
+                q.get('correct_answer', ''),
+                q.get('is_correct'),
+            ])
+
+
+def stream_ndjson(user, detail=False):
+    """One JSON object per line per attempt; ``questions`` included with ``detail``."""
+    for row in iter_attempt_rows(user, detail=detail):
+        record = dict(zip(ATTEMPT_HEADER, _attempt_values(row)))
+        record['attempt_id'] = str(row['id'])
+        if detail:
+            record['questions'] = hydrate_questions(decode_json(row['questions']) or [])
+        yield json.dumps(record, cls=DjangoJSONEncoder) + '\n'
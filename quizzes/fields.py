@@ -0,0 +1,215 @@
+# quizzes/fields.py
+"""
+Compressed JSON storage for large per-row payloads.
+
+``CompressedJSONField`` stores JSON as a zlib stream in a binary column.
+Values are decoded lazily: loading a row keeps the compressed bytes, and
+they are only inflated the first time the attribute is read. Saving a row
+whose payload was never read writes the original bytes back untouched.
+
+A shared preset dictionary (``CompressionDictionary``), trained on real
+payloads, can be used to compress small documents that repeat the same
+question texts and keys much better. Each value starts with a header byte
+naming its codec, so rows written with and without (or with older)
+dictionaries can be read side by side.
+
+``values()`` / ``values_list()`` return the undecoded ``CompressedJSON``
+wrapper; pass such values through ``decode_json`` before use.
+"""
+import json
+import struct
+import time
+import zlib
+from collections import Counter
+
+from django.apps import apps
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+CODEC_ZLIB = b'\x01'
+CODEC_ZLIB_DICT = b'\x02'
+
+COMPRESSION_LEVEL = 6
+
+# zlib only uses the last 32 KB of a preset dictionary
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+# The active dictionary is re-checked after this many seconds
+DICTIONARY_TTL = 300
+
+_dictionaries = {}
+_active = {'id': None, 'loaded_at': None}
+
+
+def _get_dictionary_model():
+    return apps.get_model('quizzes', 'CompressionDictionary')
+
+
+def get_dictionary(dictionary_id):
+    """Dictionary bytes by id (dictionaries are immutable, so cached forever)."""
+    if dictionary_id not in _dictionaries:
+        data = (
+            _get_dictionary_model().objects
+            .filter(pk=dictionary_id)
+            .values_list('data', flat=True)
+            .first()
+        )
+        if data is None:
+            raise ValueError(f'Unknown compression dictionary {dictionary_id}')
+        _dictionaries[dictionary_id] = bytes(data)
+    return _dictionaries[dictionary_id]
+
+
+def active_dictionary_id():
+    """Id of the newest dictionary, or ``None`` to compress without one."""
+    loaded_at = _active['loaded_at']
+    if loaded_at is None or time.monotonic() - loaded_at > DICTIONARY_TTL:
+        _active['id'] = (
+            _get_dictionary_model().objects
+            .order_by('-pk')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        _active['loaded_at'] = time.monotonic()
+    return _active['id']
+
+
+def invalidate_dictionary_cache():
+    _active['loaded_at'] = None
+
+
+def compress_json(value, dictionary_id=None):
+    data = json.dumps(value, separators=(',', ':')).encode()
+    if dictionary_id is None:
+        return CODEC_ZLIB + zlib.compress(data, COMPRESSION_LEVEL)
+
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=get_dictionary(dictionary_id))
+    return (
+        CODEC_ZLIB_DICT + struct.pack('>I', dictionary_id)
+        + compressor.compress(data) + compressor.flush()
+    )
+
+
+def decompress_json(raw):
+    raw = bytes(raw)
+    codec = raw[:1]
+    if codec == CODEC_ZLIB:
+        return json.loads(zlib.decompress(raw[1:]))
+    if codec == CODEC_ZLIB_DICT:
+        (dictionary_id,) = struct.unpack('>I', raw[1:5])
+        decompressor = zlib.decompressobj(zdict=get_dictionary(dictionary_id))
+        return json.loads(decompressor.decompress(raw[5:]) + decompressor.flush())
+    raise ValueError(f'Unknown payload codec {codec!r}')
+
+
+def _fragments(value, out):
+    """Collect the serialized ``"key":value`` pieces of a JSON document."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (dict, list)):
+                out.append(json.dumps(key) + ':')
+                _fragments(item, out)
+            else:
+                out.append(json.dumps({key: item}, separators=(',', ':'))[1:-1])
+    elif isinstance(value, list):
+        for item in value:
+            _fragments(item, out)
+    return out
+
+
+def train_dictionary(samples, size=MAX_DICTIONARY_SIZE):
+    """
+    Build a zlib preset dictionary from sample JSON documents.
+
+    Fragments that recur across documents (keys, shared question texts and
+    explanations) are ranked by the bytes they would save; the best ones go
+    last, where zlib can reach them with the shortest back-references.
+    """
+    counts = Counter()
+    for sample in samples:
+        counts.update(set(_fragments(sample, [])))
+
+    ranked = sorted(
+        (fragment for fragment, count in counts.items() if count > 1),
+        key=lambda fragment: counts[fragment] * len(fragment),
+        reverse=True,
+    )
+
+    chosen, used = [], 0
+    for fragment in ranked:
+        encoded = fragment.encode()
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+
+    return b''.join(reversed(chosen))
+
+
+class CompressedJSON:
+    """Compressed payload as loaded from the database, not yet decoded."""
+
+    __slots__ = ('raw',)
+
+    def __init__(self, raw):
+        self.raw = bytes(raw)
+
+    def decode(self):
+        return decompress_json(self.raw)
+
+    def __repr__(self):
+        return f'<CompressedJSON: {len(self.raw)} bytes>'
+
+
+def decode_json(value):
+    """Decode a ``CompressedJSON`` from ``values()``; other values pass through."""
+    return value.decode() if isinstance(value, CompressedJSON) else value
+
+
+class LazyJSONDescriptor(DeferredAttribute):
+    """Decodes the stored payload on first access and caches the result."""
+
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedJSON):
+            value = value.decode()
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        # A data descriptor, so __get__ still runs once the value is in __dict__
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedJSONField(models.BinaryField):
+    """A JSON field stored zlib-compressed (optionally with a dictionary)."""
+
+    descriptor_class = LazyJSONDescriptor
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return CompressedJSON(value)
+
+    def pre_save(self, model_instance, add):
+        # Read the raw attribute so an unread payload is not decoded just to save it
+        if self.attname in model_instance.__dict__:
+            return model_instance.__dict__[self.attname]
+        return super().pre_save(model_instance, add)
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        if isinstance(value, CompressedJSON):
+            return value.raw
+        return compress_json(value, active_dictionary_id())
+
+    def to_python(self, value):
+        if isinstance(value, str):
+            return json.loads(value)
+        if isinstance(value, (bytes, memoryview)):
+            return decompress_json(value)
+        return decode_json(value)
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj))
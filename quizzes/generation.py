@@ -0,0 +1,124 @@
+# quizzes/generation.py
+"""
+One question generation per attempt.
+
+``generate_questions`` is POSTed by the "preparing your quiz" page; browser
+retries, refreshes and double submits used to start a full set of AI calls
+each. Before generating, a request now claims the attempt with one
+compare-and-set::
+
+    UPDATE quizzes_quizattempt
+       SET generation_token = <token>, generation_lease_until = now + lease
+     WHERE id = ... AND status = GENERATING
+       AND (generation_lease_until IS NULL OR generation_lease_until < now)
+
+Only the request that changed the row generates. Everyone else waits a few
+seconds for its result and then gets it, or a "pending" answer telling the
+page to ask again.
+
+Every claim gets a token of its own, made on the server: the request's
+``Idempotency-Key`` header (one per attempt, kept by the page across
+retries), which names the caller, plus a random part unique to the claim.
+The token fences the final write: the questions are only saved while the
+row still carries the claimer's token. If a worker dies mid-generation,
+its lease runs out after ``QUIZ_GENERATION_LEASE_SECONDS`` and the next
+request claims the attempt again; a late write from the old worker then
+matches nothing, even when the new claim is a retry from the same page.
+"""
+import re
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import QuizAttempt
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_WAIT_SECONDS = 10
+POLL_INTERVAL = 0.5
+
+# Seconds the page waits before asking again about a generation in progress
+RETRY_AFTER = 2
+
+_KEY_RE = re.compile(r'^[A-Za-z0-9_.:-]{8,64}$')
+
+
+def lease_seconds():
+    return getattr(settings, 'QUIZ_GENERATION_LEASE_SECONDS', DEFAULT_LEASE_SECONDS)
+
+
+def wait_seconds():
+    return getattr(settings, 'QUIZ_GENERATION_WAIT_SECONDS', DEFAULT_WAIT_SECONDS)
+
+
+def caller_key(request):
+    """The request's ``Idempotency-Key``, or ``''`` without a valid one."""
+    key = request.headers.get('Idempotency-Key', '')
+    return key if _KEY_RE.match(key) else ''
+
+
+def claim_token(request):
+    """A token for one claim: ``<caller key>:<random>``, never reused."""
+    return f'{caller_key(request)}:{uuid.uuid4().hex}'
+
+def claim(attempt, token):
+    """
+    Take the generation of ``attempt`` for ``token``. Returns ``False`` if
+    it is not waiting for questions or another live claim holds it.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=lease_seconds())
+    claimed = QuizAttempt.objects.filter(
+        Q(generation_lease_until__isnull=True) | Q(generation_lease_until__lt=now),
+        pk=attempt.pk, status=QuizAttempt.STATUS_GENERATING,
+    ).update(generation_token=token, generation_lease_until=lease_until, updated_at=now)
+    if claimed:
+        attempt.generation_token = token
+        attempt.generation_lease_until = lease_until
+    return bool(claimed)
+
+
+def release(attempt, token, fields):
+    """
+    Save ``fields`` of ``attempt`` and drop the claim, if ``token`` still
+    holds it. Returns ``False`` (and writes nothing) if the lease was lost.
+    """
+    now = timezone.now()
+    released = QuizAttempt.objects.filter(
+        pk=attempt.pk, status=QuizAttempt.STATUS_GENERATING, generation_token=token,
+    ).update(
+        generation_token=None,
+        generation_lease_until=None,
+        updated_at=now,
+        **{field: getattr(attempt, field) for field in fields},
+    )
+    if released:
+        attempt.generation_token = None
+        attempt.generation_lease_until = None
+    return bool(released)
+
+
+def is_claimed(attempt, now=None):
+    return (
+        attempt.status == QuizAttempt.STATUS_GENERATING
+        and attempt.generation_lease_until is not None
+        and attempt.generation_lease_until >= (now or timezone.now())
+    )
+
+
+def wait_for_result(attempt, timeout=None):
+    """
+    Re-read ``attempt`` until its claimed generation has finished or
+    ``timeout`` seconds (``QUIZ_GENERATION_WAIT_SECONDS``) have passed.
+    """
+    fields = ['status', 'generation_token', 'generation_lease_until']
+    deadline = time.monotonic() + (wait_seconds() if timeout is None else timeout)
+    # The copy may predate the claim that just beat ours
+    attempt.refresh_from_db(fields=fields)
+    while is_claimed(attempt) and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        attempt.refresh_from_db(fields=fields)
+    return attempt
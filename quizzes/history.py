@@ -0,0 +1,169 @@
+# quizzes/history.py
+"""
+Keyset-paginated attempt history.
+
+Finished attempts (completed or abandoned -- both set ``completed_at``) are
+listed newest first on ``(completed_at, id)``. The cursor is the last row's
+position, so every page is an index range scan that reads ``page_size + 1``
+rows no matter how deep into the history it is; there is no OFFSET.
+
+Filters map onto the composite indexes on ``QuizAttempt``:
+``(user, completed_at, id)`` for the default listing and date ranges,
+``(user, status, completed_at, id)`` and ``(user, subcategory, completed_at,
+id)`` for the status and subcategory filters. Difficulty has only three
+values, so it is applied as a residual filter on the same scans.
+
+Attempts moved to ``ArchivedAttempt`` (see ``archive.py``) are read with the
+same keyset query on the archive's ``(user, completed_at, id)`` index and
+merged in, so the history continues seamlessly into archived attempts.
+"""
+import base64
+import heapq
+import json
+import uuid
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ArchivedAttempt, ArchivedRollup, QuizAttempt
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+HISTORY_FIELDS = [
+    'id', 'completed_at', 'category__name', 'subcategory_id', 'subcategory__name',
+    'difficulty', 'status', 'score', 'correct_answers', 'total_questions',
+    'time_taken_seconds',
+]
+
+STATUS_FILTERS = {
+    'completed': QuizAttempt.STATUS_COMPLETED,
+    'abandoned': QuizAttempt.STATUS_ABANDONED,
+}
+
+STATUS_LABELS = dict(QuizAttempt.STATUS_CHOICES)
+
+DIFFICULTIES = ['easy', 'medium', 'hard']
+
+
+def encode_cursor(row):
+    payload = json.dumps([row['completed_at'].isoformat(), str(row['id'])])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of ``encode_cursor``; raises ``ValueError`` for a bad cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        completed_at, pk = json.loads(base64.urlsafe_b64decode(padded))
+        completed_at = parse_datetime(completed_at)
+        pk = uuid.UUID(pk)
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError('Invalid cursor')
+    if completed_at is None:
+        raise ValueError('Invalid cursor')
+    return completed_at, pk
+
+
+def _parse_day(value, name):
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'Invalid {name}, expected YYYY-MM-DD')
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def parse_history_filters(params):
+    """
+    Validate filter query params into ``QuizAttempt`` lookups.
+
+    Accepts ``subcategory`` (id), ``difficulty``, ``status`` ('completed' /
+    'abandoned') and an inclusive ``from`` / ``to`` date range. Raises
+    ``ValueError`` with a user-facing message on bad input.
+    """
+    lookups = {}
+
+    subcategory = params.get('subcategory')
+    if subcategory:
+        if not subcategory.isdigit():
+            raise ValueError('Invalid subcategory')
+        lookups['subcategory_id'] = int(subcategory)
+
+    difficulty = params.get('difficulty')
+    if difficulty:
+        if difficulty not in DIFFICULTIES:
+            raise ValueError('Invalid difficulty')
+        lookups['difficulty'] = difficulty
+
+    status = params.get('status')
+    if status:
+        if status not in STATUS_FILTERS:
+            raise ValueError('Invalid status')
+        lookups['status'] = STATUS_FILTERS[status]
+
+    if params.get('from'):
+        lookups['completed_at__gte'] = _parse_day(params['from'], 'from date')
+    if params.get('to'):
+        lookups['completed_at__lt'] = _parse_day(params['to'], 'to date') + timedelta(days=1)
+
+    return lookups
+
+
+def _page_rows(model, user, lookups, position, limit):
+    qs = model.objects.filter(user=user, completed_at__isnull=False, **lookups)
+    if position:
+        completed_at, pk = position
+        qs = qs.filter(
+            Q(completed_at__lt=completed_at)
+            | Q(completed_at=completed_at, id__lt=pk)
+        )
+    return list(qs.order_by('-completed_at', '-id').values(*HISTORY_FIELDS)[:limit])
+
+
+def history_page(user, lookups, cursor=None, page_size=HISTORY_PAGE_SIZE):
+    """
+    One page of the user's history after ``cursor``.
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is ``None`` on the last
+    page.
+    """
+    position = decode_cursor(cursor) if cursor else None
+
+    merged = heapq.merge(
+        _page_rows(QuizAttempt, user, lookups, position, page_size + 1),
+        _page_rows(ArchivedAttempt, user, lookups, position, page_size + 1),
+        key=lambda row: (row['completed_at'], row['id']),
+        reverse=True,
+    )
+    rows = [row for _, row in zip(range(page_size + 1), merged)]
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1])
+
+    for row in rows:
+        row['status_label'] = STATUS_LABELS[row['status']]
+
+    return rows, next_cursor
+
+
+def history_subcategories(user):
+    """Subcategories the user has finished attempts in, for the filter menu."""
+    hot = (
+        QuizAttempt.objects
+        .filter(user=user, subcategory__isnull=False, completed_at__isnull=False)
+        .values_list('subcategory_id', 'subcategory__name')
+        .order_by()
+        .distinct()
+    )
+    archived = (
+        ArchivedRollup.objects
+        .filter(user=user, subcategory__isnull=False)
+        .values_list('subcategory_id', 'subcategory__name')
+        .order_by()
+        .distinct()
+    )
+    return sorted(set(hot) | set(archived), key=lambda item: item[1])
@@ -0,0 +1,202 @@
+# quizzes/item_analysis.py
+"""
+Vectorized item analysis for the question bank.
+
+Answer data lives inside each attempt's ``questions`` JSON, so it is read in
+one streaming pass into flat NumPy arrays (one element per served question)
+and every statistic is computed for the whole bank with ``np.bincount``
+reductions -- no per-question queries or Python loops over responses.
+"""
+from array import array
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .fields import decode_json
+from .models import Question, QuestionStats, QuizAttempt
+
+OPTIONS = 'ABCD'
+UNANSWERED = -1
+CHOICE_CODES = {option: code for code, option in enumerate(OPTIONS)}
+
+
+class ResponseMatrix:
+    """Flat, column-oriented response data (one row per served question)."""
+
+    def __init__(self, item, person, choice, correct, question_ids):
+        self.item = item            # dense question index
+        self.person = person        # dense attempt index
+        self.choice = choice        # 0..3 for A..D, -1 when unanswered
+        self.correct = correct      # 1 if answered correctly
+        self.question_ids = question_ids
+
+    def __len__(self):
+        return len(self.item)
+
+
+def collect_responses(chunk_size=2000):
+    """
+    Stream completed attempts once and flatten their answers into arrays.
+
+    Entries served before question ids were recorded are matched back to
+    their ``Question`` through the normalized text hash.
+    """
+    by_hash = dict(Question.objects.values_list('normalized_hash', 'pk'))
+    dense = {}
+
+    item, person, choice, correct = array('i'), array('i'), array('b'), array('b')
+    n_persons = 0
+
+    attempts = (
+        QuizAttempt.objects
+        .filter(status=QuizAttempt.STATUS_COMPLETED, questions__isnull=False)
+        .values_list('questions', flat=True)
+        .order_by()
+        .iterator(chunk_size=chunk_size)
+    )
+
+    for questions in attempts:
+        served = False
+        for q in decode_json(questions) or []:
+            pk = q.get('question_pk')
+            if pk is None:
+                pk = by_hash.get(Question.make_hash(q.get('question', '')))
+                if pk is None:
+                    continue
+
+            index = dense.setdefault(pk, len(dense))
+            answer = q.get('user_answer')
+
+            item.append(index)
+            person.append(n_persons)
+            choice.append(CHOICE_CODES.get(answer, UNANSWERED))
+            correct.append(1 if q.get('is_correct') is True else 0)
+            served = True
+
+        if served:
+            n_persons += 1
+
+    question_ids = np.empty(len(dense), dtype=np.int64)
+    for pk, index in dense.items():
+        question_ids[index] = pk
+
+    return ResponseMatrix(
+        np.frombuffer(item, dtype=np.int32),
+        np.frombuffer(person, dtype=np.int32),
+        np.frombuffer(choice, dtype=np.int8),
+        np.frombuffer(correct, dtype=np.int8),
+        question_ids,
+    )
+
+
+def compute_item_statistics(item, person, choice, correct, n_items=None):
+    """
+    Compute item statistics for every question at once.
+
+    Returns a dict of arrays indexed by dense item index:
+    ``responses``, ``answered``, ``p_value``, ``discrimination`` and
+    ``rates`` (shape ``(n_items, 4)``). Undefined values are ``NaN``.
+    """
+    if n_items is None:
+        n_items = int(item.max()) + 1 if len(item) else 0
+
+    correct_f = correct.astype(np.float64)
+
+    responses = np.bincount(item, minlength=n_items).astype(np.float64)
+    n_correct = np.bincount(item, weights=correct_f, minlength=n_items)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p_value = n_correct / responses
+
+        # Point-biserial against the rest score (attempt score minus this item)
+        person_total = np.bincount(person, weights=correct_f)
+        rest = person_total[person] - correct_f
+
+        sum_y = np.bincount(item, weights=rest, minlength=n_items)
+        sum_yy = np.bincount(item, weights=rest * rest, minlength=n_items)
+        sum_xy = np.bincount(item, weights=rest * correct_f, minlength=n_items)
+
+        numerator = responses * sum_xy - n_correct * sum_y
+        denominator = np.sqrt(
+            (responses * n_correct - n_correct ** 2)
+            * (responses * sum_yy - sum_y ** 2)
+        )
+        discrimination = np.where(denominator > 0, numerator / denominator, np.nan)
+
+        # Option selection rates among answered servings
+        answered_mask = choice >= 0
+        answered_items = item[answered_mask]
+        option_counts = np.bincount(
+            answered_items.astype(np.int64) * len(OPTIONS) + choice[answered_mask],
+            minlength=n_items * len(OPTIONS),
+        ).reshape(n_items, len(OPTIONS))
+        answered = option_counts.sum(axis=1)
+        rates = option_counts / answered[:, None]
+
+    return {
+        'responses': responses.astype(np.int64),
+        'answered': answered,
+        'p_value': p_value,
+        'discrimination': discrimination,
+        'rates': rates,
+    }
+
+
+def _value(x):
+    return None if np.isnan(x) else round(float(x), 4)
+
+
+def save_item_statistics(question_ids, stats, batch_size=1000):
+    """
+    Replace the ``QuestionStats`` rows of the analysed questions. Ids taken
+    from attempt JSON whose question has since been deleted are skipped.
+    Returns the number of rows saved.
+    """
+    now = timezone.now()
+    rows = []
+    for i, pk in enumerate(question_ids.tolist()):
+        rates = stats['rates'][i]
+        rows.append(QuestionStats(
+            question_id=pk,
+            responses=int(stats['responses'][i]),
+            answered=int(stats['answered'][i]),
+            p_value=_value(stats['p_value'][i]),
+            discrimination=_value(stats['discrimination'][i]),
+            rate_a=_value(rates[0]),
+            rate_b=_value(rates[1]),
+            rate_c=_value(rates[2]),
+            rate_d=_value(rates[3]),
+            computed_at=now,
+        ))
+
+    # Replaced in one transaction rather than upserted: MySQL cannot target
+    # an upsert at ``question``
+    saved = 0
+    with transaction.atomic():
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            ids = [row.question_id for row in batch]
+            existing = set(Question.objects.filter(pk__in=ids).values_list('pk', flat=True))
+            QuestionStats.objects.filter(question_id__in=ids).delete()
+            saved += len(QuestionStats.objects.bulk_create(
+                [row for row in batch if row.question_id in existing]
+            ))
+    return saved
+
+
+def synthetic_responses(n_responses, n_items=5000, items_per_attempt=10, seed=0):
+    """Random response arrays shaped like real data, for benchmarking."""
+    rng = np.random.default_rng(seed)
+    n_persons = n_responses // items_per_attempt
+
+    ability = rng.normal(size=n_persons)
+    difficulty = rng.normal(size=n_items)
+
+    item = rng.integers(0, n_items, size=n_persons * items_per_attempt, dtype=np.int32)
+    person = np.repeat(np.arange(n_persons, dtype=np.int32), items_per_attempt)
+    p_correct = 1 / (1 + np.exp(difficulty[item] - ability[person]))
+    correct = (rng.random(len(item)) < p_correct).astype(np.int8)
+    choice = np.where(correct == 1, 0, rng.integers(1, 4, size=len(item))).astype(np.int8)
+
+    return item, person, choice, correct, n_items
@@ -0,0 +1,133 @@
+# quizzes/management/commands/analyze_items.py
+"""
+Django management command to compute item-analysis statistics
+(difficulty index, point-biserial discrimination, option rates)
+for the whole question bank.
+
+With --benchmark N it times the whole pipeline instead: N synthetic
+responses are stored as completed attempts, read back and decoded by
+``collect_responses`` and analysed, inside a transaction that is rolled
+back afterwards.
+"""
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from quizzes.item_analysis import (
+    OPTIONS, collect_responses, compute_item_statistics, save_item_statistics,
+    synthetic_responses,
+)
+from quizzes.models import Category, QuizAttempt, SubCategory
+
+ITEMS_PER_ATTEMPT = 10
+INSERT_BATCH = 2000
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compute item-analysis statistics for every question from completed attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--benchmark', type=int, metavar='N',
+            help='Time collecting and analysing N synthetic responses instead (rolled back)'
+        )
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            return self.benchmark(options['benchmark'])
+
+        self.stdout.write('Collecting responses...')
+        started = time.perf_counter()
+        responses = collect_responses()
+        collected = time.perf_counter()
+
+        stats = compute_item_statistics(
+            responses.item, responses.person, responses.choice, responses.correct,
+            n_items=len(responses.question_ids),
+        )
+        computed = time.perf_counter()
+
+        saved = save_item_statistics(responses.question_ids, stats)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully analysed {saved} questions from {len(responses)} responses!')
+        )
+        self.stdout.write(
+            f'  collect {collected - started:.2f}s, compute {computed - collected:.2f}s, '
+            f'save {time.perf_counter() - computed:.2f}s'
+        )
+
+    def benchmark(self, n_responses):
+        try:
+            with transaction.atomic():
+                self.run_benchmark(n_responses)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def insert_attempts(self, n_responses):
+        """Store synthetic responses as completed attempts, like real ones."""
+        item, person, choice, correct, n_items = synthetic_responses(
+            n_responses, items_per_attempt=ITEMS_PER_ATTEMPT
+        )
+        tag = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(username=f'bench-{tag}', email=f'bench-{tag}@example.com')
+        category = Category.objects.create(name=f'bench-{tag}')
+        subcategory = SubCategory.objects.create(category=category, name='benchmark')
+
+        now = timezone.now()
+        item, choice, correct = item.tolist(), choice.tolist(), correct.tolist()
+        batch = []
+        for start in range(0, len(item), ITEMS_PER_ATTEMPT):
+            questions = [
+                {
+                    'id': n + 1, 'question_pk': item[i] + 1, 'question': f'Question {item[i] + 1}',
+                    'option_a': 'a', 'option_b': 'b', 'option_c': 'c', 'option_d': 'd',
+                    'correct_answer': 'A', 'explanation': '',
+                    'user_answer': OPTIONS[choice[i]], 'is_correct': bool(correct[i]),
+                }
+                for n, i in enumerate(range(start, start + ITEMS_PER_ATTEMPT))
+            ]
+            batch.append(QuizAttempt(
+                user=user, category=category, subcategory=subcategory, difficulty='medium',
+                status=QuizAttempt.STATUS_COMPLETED, questions=questions,
+                total_questions=ITEMS_PER_ATTEMPT, completed_at=now,
+            ))
+            if len(batch) >= INSERT_BATCH:
+                QuizAttempt.objects.bulk_create(batch)
+                batch = []
+        QuizAttempt.objects.bulk_create(batch)
+        return n_items
+
+    def run_benchmark(self, n_responses):
+        self.stdout.write(f'Storing {n_responses} synthetic responses as attempts...')
+        started = time.perf_counter()
+        self.insert_attempts(n_responses)
+        self.stdout.write(f'  stored in {time.perf_counter() - started:.2f}s (not part of the timing)')
+
+        started = time.perf_counter()
+        responses = collect_responses()
+        collected = time.perf_counter()
+        stats = compute_item_statistics(
+            responses.item, responses.person, responses.choice, responses.correct,
+            n_items=len(responses.question_ids),
+        )
+        computed = time.perf_counter()
+
+        total = computed - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Analysed {len(responses.question_ids)} questions from {len(responses)} responses '
+            f'in {total:.2f}s ({len(responses) / total / 1e6:.2f}M responses/sec)'
+        ))
+        self.stdout.write(
+            f'  collect {collected - started:.2f}s, compute {computed - collected:.2f}s; '
+            f'mean p-value {float(stats["p_value"].mean()):.3f}'
+        )
@@ -0,0 +1,166 @@
+# quizzes/management/commands/answer_stress_test.py
+"""
+Django management command hammering single quiz attempts with concurrent
+answers, to check the optimistic-concurrency answer path (answering.py).
+
+For each of --rounds fresh attempts, --threads threads wait on a barrier
+and then submit answers to the same attempt at once, each to its own
+question, through the real ``submit_answer`` view. Afterwards every answer
+must be on the attempt, the attempt must be completed exactly once, and
+``current_question_index`` must not have run past the end.
+
+``--naive`` replays the old read-modify-write (load, change the JSON,
+``save()``) in the same way for comparison; it usually loses answers.
+
+Threads need their own database connections, so this cannot run in a
+rolled-back transaction: the users and attempts it creates are deleted at
+the end. On SQLite, writers serialize on the database lock, which hides
+most races; run it against MySQL.
+"""
+import threading
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+
+from quizzes import timing, views
+from quizzes.answering import grade_answers
+from quizzes.models import Category, DailyPerformance, QuizAttempt, SubCategory
+from quizzes.signals import suppress_tombstones
+
+
+class UpdateCounter:
+    """``execute_wrapper`` counting UPDATEs of one table."""
+
+    def __init__(self, table):
+        self.table = table
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        statement = sql.lstrip().upper()
+        if statement.startswith('UPDATE') and self.table.upper() in statement:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Submit concurrent answers to one attempt and check none are lost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=10,
+                            help='Concurrent answers per attempt (one per question)')
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument('--naive', action='store_true',
+                            help='Use the old read-modify-write save() instead')
+
+    def make_attempt(self, user, subcategory, size):
+        questions = [
+            {
+                'id': i + 1, 'question': f'Question {i + 1}', 'option_a': 'a',
+                'option_b': 'b', 'option_c': 'c', 'option_d': 'd',
+                'correct_answer': 'A', 'explanation': '', 'user_answer': None,
+                'is_correct': None,
+            }
+            for i in range(size)
+        ]
+        attempt = QuizAttempt(
+            user=user, category=subcategory.category, subcategory=subcategory,
+            status=QuizAttempt.STATUS_IN_PROGRESS, total_questions=size,
+            questions=questions, started_at=timezone.now(),
+        )
+        timing.start(attempt)
+        attempt.save()
+        return attempt
+
+    def naive_answer(self, attempt_id, index, answer):
+        # What submit_answer did before answering.py
+        attempt = QuizAttempt.objects.get(pk=attempt_id)
+        grade_answers(attempt, [(index, answer)])
+        attempt.current_question_index += 1
+        attempt.save()
+        if attempt.is_quiz_complete():
+            views.finalize_quiz_attempt(attempt)
+
+    def hammer(self, user, attempt, threads, naive):
+        factory = RequestFactory()
+        barrier = threading.Barrier(threads)
+        counter = UpdateCounter(QuizAttempt._meta.db_table)
+        statuses, errors = [], []
+
+        def worker(index):
+            try:
+                with connection.execute_wrapper(counter):
+                    barrier.wait()
+                    if naive:
+                        self.naive_answer(attempt.pk, index, 'A')
+                        statuses.append(200)
+                    else:
+                        request = factory.post('/', {'answer': 'A', 'question_index': index})
+                        request.user = user
+                        request._dont_enforce_csrf_checks = True
+                        statuses.append(views.submit_answer(request, attempt_id=attempt.pk).status_code)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return statuses, errors, counter.count
+
+    def handle(self, *args, **options):
+        threads, rounds, naive = options['threads'], options['rounds'], options['naive']
+        tag = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(username=f'stress-{tag}', email=f'stress-{tag}@example.com')
+        category = Category.objects.create(name=f'stress-test-{tag}')
+        subcategory = SubCategory.objects.create(category=category, name='stress test')
+
+        lost = conflicts = overrun = updates = failed = 0
+        started = time.perf_counter()
+        try:
+            for _ in range(rounds):
+                attempt = self.make_attempt(user, subcategory, threads)
+                statuses, errors, round_updates = self.hammer(user, attempt, threads, naive)
+                updates += round_updates
+                conflicts += statuses.count(409)
+                for error in errors:
+                    failed += 1
+                    self.stderr.write(f'  {type(error).__name__}: {error}')
+
+                attempt.refresh_from_db()
+                answered = sum(1 for q in attempt.questions if q.get('user_answer') is not None)
+                lost += threads - answered - statuses.count(409)
+                overrun += attempt.current_question_index > threads
+
+            completed = QuizAttempt.objects.filter(
+                user=user, status=QuizAttempt.STATUS_COMPLETED
+            ).count()
+            counted = sum(DailyPerformance.objects.filter(user=user).values_list('attempts', flat=True))
+        finally:
+            with suppress_tombstones():
+                user.delete()
+                category.delete()
+
+        elapsed = time.perf_counter() - started
+        answers = threads * rounds
+        self.stdout.write(
+            f"{'read-modify-write' if naive else 'conditional update'}: {rounds} attempts x "
+            f'{threads} concurrent answers in {elapsed:.1f}s'
+        )
+        self.stdout.write(
+            f'  attempt UPDATEs: {updates} ({updates / answers:.2f} per answer)\n'
+            f'  lost answers: {lost}   gave up (409): {conflicts}   errors: {failed}\n'
+            f'  index past the end: {overrun}   completed: {completed}/{rounds}   '
+            f'counted in rollups: {counted}'
+        )
+        if lost or overrun or failed or counted != completed:
+            self.stdout.write(self.style.ERROR('Concurrent answers were lost or double counted'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No answer lost or double counted'))
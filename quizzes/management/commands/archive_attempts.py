@@ -0,0 +1,82 @@
+# quizzes/management/commands/archive_attempts.py
+"""
+Django management command to move old finished attempts into the archive.
+
+Attempts completed more than --days ago (default ``QUIZ_ARCHIVE_AFTER_DAYS``)
+are moved in small batches, one transaction each, so the run can be stopped
+at any point. Between batches the command sleeps for --sleep seconds and,
+when replicas are configured (``QUIZ_ARCHIVE_REPLICAS``, a list of database
+aliases), waits until none of them is more than --max-lag seconds behind,
+so the deletes never pile up replication lag.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from quizzes.archive import (
+    ARCHIVE_BATCH_SIZE, FINISHED, archive_after_days, archive_batch, archive_cutoff,
+    wait_for_replicas,
+)
+from quizzes.models import QuizAttempt
+
+
+class Command(BaseCommand):
+    help = 'Move finished attempts older than the retention window into the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Archive attempts completed more than DAYS ago '
+                                 '(default: QUIZ_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--sleep', type=float,
+                            default=getattr(settings, 'QUIZ_ARCHIVE_SLEEP', 0.5),
+                            help='Seconds to pause between batches')
+        parser.add_argument('--max-lag', type=float,
+                            default=getattr(settings, 'QUIZ_ARCHIVE_MAX_LAG', 5),
+                            help='Pause while a replica is more than MAX_LAG seconds behind')
+        parser.add_argument('--replica', action='append', dest='replicas',
+                            help='Database alias of a replica to watch (repeatable; '
+                                 'default: QUIZ_ARCHIVE_REPLICAS)')
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Stop after this many batches')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the attempts that are due')
+
+    def handle(self, *args, **options):
+        days = archive_after_days() if options['days'] is None else options['days']
+        if days < 1:
+            raise CommandError('--days must be at least 1')
+        cutoff = archive_cutoff(days)
+
+        if options['dry_run']:
+            due = QuizAttempt.objects.filter(status__in=FINISHED, completed_at__lt=cutoff).count()
+            self.stdout.write(f'{due} attempts completed before {cutoff:%Y-%m-%d} are due')
+            return
+
+        replicas = options['replicas'] or getattr(settings, 'QUIZ_ARCHIVE_REPLICAS', [])
+        started = time.perf_counter()
+        moved = batches = 0
+        waited = 0.0
+
+        while True:
+            count = archive_batch(cutoff, options['batch_size'])
+            if not count:
+                break
+            moved += count
+            batches += 1
+            if batches % 20 == 0:
+                self.stdout.write(f'  {moved} attempts archived')
+            if options['max_batches'] and batches >= options['max_batches']:
+                break
+
+            if options['sleep']:
+                time.sleep(options['sleep'])
+            if replicas:
+                waited += wait_for_replicas(replicas, options['max_lag'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {moved} attempts completed before {cutoff:%Y-%m-%d} in {batches} '
+            f'batch(es) in {time.perf_counter() - started:.2f}s '
+            f'({waited:.1f}s waiting for replicas)'
+        ))
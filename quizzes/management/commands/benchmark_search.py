@@ -0,0 +1,138 @@
+# quizzes/management/commands/benchmark_search.py
+"""
+Django management command timing the taxonomy search index (search.py).
+
+By default it builds an index over --entries synthetic entries (categories,
+subcategories with descriptions and concepts named from a generated
+vocabulary, in roughly the proportions of the real catalogue) and runs
+--queries queries shaped like autocomplete traffic: growing prefixes of
+real words, two-word prefixes and misspelled words. With --taxonomy it
+times the index of the current database instead.
+
+Nothing is written to the database.
+"""
+import itertools
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from quizzes.search import SEARCH_LIMIT, Entry, SearchIndex, normalize, search_index
+
+SYLLABLES = [
+    'al', 'an', 'ar', 'ba', 'co', 'da', 'de', 'di', 'el', 'en', 'er', 'fa', 'ga', 'in', 'is',
+    'ka', 'lo', 'ma', 'me', 'mi', 'na', 'ne', 'no', 'or', 'pa', 'ra', 're', 'ri', 'sa', 'se',
+    'si', 'ta', 'te', 'ti', 'to', 'un', 'va', 've', 'za', 'ion', 'ing', 'ter', 'con', 'per',
+]
+WORDS = [
+    'deadlock', 'scheduling', 'memory', 'paging', 'process', 'thread', 'semaphore', 'network',
+    'routing', 'algebra', 'calculus', 'matrix', 'graph', 'tree', 'sorting', 'hashing', 'database',
+    'index', 'transaction', 'history', 'geography', 'physics', 'chemistry', 'biology', 'music',
+]
+
+
+def vocabulary(rng, size):
+    words = set(WORDS)
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def synthetic_entries(count, seed=0):
+    """``count`` entries: about 1% categories, 9% subcategories, 90% concepts."""
+    rng = random.Random(seed)
+    words = vocabulary(rng, max(2000, count // 10))
+    # A few very common words, as in real names ("and", "of", "introduction")
+    weights = list(itertools.accumulate(50 if i % 97 == 0 else 1 for i in range(len(words))))
+
+    def name(low, high):
+        return ' '.join(rng.choices(words, cum_weights=weights, k=rng.randint(low, high))).title()
+
+    categories = max(1, count // 100)
+    subcategories = max(1, count * 9 // 100)
+    entries = []
+    for pk in range(1, categories + 1):
+        label = name(1, 2)
+        key = normalize(label)
+        entries.append(Entry('category', pk, label, '', pk, (), False, None, key, tuple(key.split())))
+    for pk in range(1, subcategories + 1):
+        label = name(1, 3)
+        key = normalize(label)
+        extra = tuple(normalize(name(4, 10)).split())
+        category_id = rng.randint(1, categories)
+        entries.append(Entry('subcategory', pk, label, 'Synthetic', category_id, (pk,), True, None,
+                             key, tuple(key.split()), extra))
+    for pk in range(1, count - len(entries) + 1):
+        label = name(1, 4)
+        key = normalize(label)
+        sub = rng.randint(1, subcategories)
+        entries.append(Entry('concept', pk, label, 'Synthetic', 1, (sub,), True,
+                             rng.choice(['easy', 'medium', 'hard']), key, tuple(key.split())))
+    return entries
+
+
+def misspell(rng, word):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def sample_queries(rng, entries, count):
+    queries = []
+    while len(queries) < count:
+        words = rng.choice(entries).words
+        word = rng.choice(words)
+        shape = rng.random()
+        if shape < 0.6:
+            # Typing one word: every prefix of it
+            queries.extend(word[:n] for n in range(1, len(word) + 1))
+        elif shape < 0.85 and len(words) > 1:
+            queries.append(f'{words[0]} {words[1][:rng.randint(1, len(words[1]))]}')
+        else:
+            queries.append(misspell(rng, word))
+    return queries[:count]
+
+
+class Command(BaseCommand):
+    help = 'Time autocomplete queries against the taxonomy search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=100000,
+                            help='Size of the synthetic index')
+        parser.add_argument('--queries', type=int, default=5000)
+        parser.add_argument('--limit', type=int, default=SEARCH_LIMIT)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--taxonomy', action='store_true',
+                            help='Benchmark the index of the current taxonomy instead')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        started = time.perf_counter()
+        if options['taxonomy']:
+            index = search_index()
+        else:
+            index = SearchIndex(synthetic_entries(options['entries'], options['seed']))
+        built = time.perf_counter() - started
+        if not len(index):
+            self.stdout.write(self.style.WARNING('The index is empty'))
+            return
+
+        queries = sample_queries(rng, index.entries, options['queries'])
+        timings = []
+        empty = 0
+        for query in queries:
+            started = time.perf_counter()
+            results = index.search(query, options['limit'])
+            timings.append((time.perf_counter() - started) * 1000)
+            empty += not results
+
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(index)} entries indexed in {built:.2f}s; {len(queries)} queries: "
+            f"mean {statistics.mean(timings):.2f} ms, median {statistics.median(timings):.2f} ms, "
+            f"p95 {p95:.2f} ms, max {timings[-1]:.2f} ms; {empty} without results"
+        ))
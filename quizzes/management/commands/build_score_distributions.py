@@ -0,0 +1,44 @@
+# quizzes/management/commands/build_score_distributions.py
+"""
+Django management command to rebuild the per-(subcategory, difficulty)
+score histograms used for percentile ranks.
+
+Run it periodically (e.g. from cron every 15 minutes), or keep it running
+with --interval.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from quizzes.percentiles import build_score_distributions, get_bin_width
+
+
+class Command(BaseCommand):
+    help = 'Rebuild score distributions used for "better than X%" percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bin-width', type=float, default=None,
+            help='Histogram bin width in score points (default: QUIZ_PERCENTILE_BIN_WIDTH)'
+        )
+        parser.add_argument(
+            '--interval', type=int, default=None,
+            help='Keep running and rebuild every INTERVAL seconds'
+        )
+
+    def handle(self, *args, **options):
+        bin_width = options['bin_width'] or get_bin_width()
+
+        while True:
+            started = time.perf_counter()
+            groups, max_error = build_score_distributions(bin_width)
+
+            self.stdout.write(self.style.SUCCESS(
+                f'Built {groups} score distributions (bin width {bin_width:g}) '
+                f'in {time.perf_counter() - started:.2f}s; '
+                f'worst-case rank error {max_error:.2f} percentage points'
+            ))
+
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,123 @@
+# quizzes/management/commands/compact_attempt_questions.py
+"""
+Django management command to replace the full question copies stored in
+older attempts with references to the matching question version.
+
+Only entries whose text, options, answer key and explanation still match
+the current ``Question`` exactly are converted, so results stay identical;
+the rest keep their copy. Safe to re-run and to interrupt.
+
+Only finished attempts are touched, and each row is written with the same
+version check as answers (``answering.save_versioned``): an attempt
+regraded between the read and the write is read again and retried, never
+overwritten.
+"""
+from django.core.management.base import BaseCommand
+
+from quizzes.answering import save_versioned
+from quizzes.fields import compress_json
+from quizzes.models import Question, QuizAttempt
+
+MAX_RETRIES = 3
+
+COPY_KEYS = {
+    'question': 'question_text',
+    'option_a': 'option_a',
+    'option_b': 'option_b',
+    'option_c': 'option_c',
+    'option_d': 'option_d',
+    'correct_answer': 'correct_answer',
+    'explanation': 'explanation',
+}
+
+
+class Command(BaseCommand):
+    help = 'Convert full question copies in attempts to versioned question references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def compact(self, entry, bank):
+        question = bank.get(entry.get('question_pk'))
+        if question is None:
+            question = bank.get(Question.make_hash(entry.get('question', '')))
+        if question is None:
+            return None
+        if any(entry.get(key) != question[field] for key, field in COPY_KEYS.items()):
+            return None
+        return {
+            'id': entry.get('id'),
+            'question_pk': question['pk'],
+            'version': question['version'],
+            'user_answer': entry.get('user_answer'),
+            'is_correct': entry.get('is_correct'),
+        }
+
+    def load_bank(self, batch):
+        pks, hashes = set(), set()
+        for attempt in batch:
+            for entry in attempt.questions or []:
+                if 'question' not in entry:
+                    continue
+                if entry.get('question_pk') is not None:
+                    pks.add(entry['question_pk'])
+                else:
+                    hashes.add(Question.make_hash(entry.get('question', '')))
+
+        bank = {}
+        rows = Question.objects.filter(pk__in=pks) | Question.objects.filter(normalized_hash__in=hashes)
+        for row in rows.values('pk', 'version', 'normalized_hash', *Question.CONTENT_FIELDS):
+            bank[row['pk']] = row
+            bank[row['normalized_hash']] = row
+        return bank
+
+    def compact_attempt(self, attempt, bank):
+        """The compacted question list of ``attempt``, or ``None`` if nothing changes."""
+        questions = attempt.questions or []
+        compacted = [
+            (self.compact(entry, bank) if 'question' in entry else None) or entry
+            for entry in questions
+        ]
+        return compacted if compacted != questions else None
+
+    def handle(self, *args, **options):
+        last_pk = None
+        scanned = converted = conflicts = bytes_before = bytes_after = 0
+        finished = QuizAttempt.objects.filter(status__in=QuizAttempt.FINISHED_STATUSES)
+
+        while True:
+            qs = finished.exclude(questions__isnull=True).order_by('pk').only('pk', 'questions', 'version')
+            if last_pk is not None:
+                qs = qs.filter(pk__gt=last_pk)
+            batch = list(qs[:options['batch_size']])
+            if not batch:
+                break
+
+            bank = self.load_bank(batch)
+            for attempt in batch:
+                for _ in range(MAX_RETRIES):
+                    compacted = self.compact_attempt(attempt, bank)
+                    if compacted is None:
+                        break
+                    before = compress_json(attempt.questions)
+                    attempt.questions = compacted
+                    if save_versioned(attempt, ['questions'], QuizAttempt.FINISHED_STATUSES):
+                        bytes_before += len(before)
+                        bytes_after += len(compress_json(compacted))
+                        converted += 1
+                        break
+                    # Written since it was read: start again from the stored row
+                    attempt.refresh_from_db(fields=['questions', 'version'])
+                    bank.update(self.load_bank([attempt]))
+                else:
+                    conflicts += 1
+
+            scanned += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'  {scanned} attempts scanned, {converted} compacted')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Compacted {converted} of {scanned} finished attempts '
+            f'({bytes_before} -> {bytes_after} compressed bytes); '
+            f'{conflicts} left for the next run after repeated concurrent writes'
+        ))
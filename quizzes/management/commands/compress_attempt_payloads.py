@@ -0,0 +1,140 @@
+# quizzes/management/commands/compress_attempt_payloads.py
+"""
+Django management command to train the shared compression dictionary for
+attempt payloads, optionally re-encode stored rows with it, and report the
+compression ratio and per-attempt encode/decode cost.
+
+Only finished attempts are re-encoded: attempts still being generated or
+answered are rewritten by their own saves soon enough.
+"""
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from quizzes.fields import (
+    active_dictionary_id, compress_json, decode_json, decompress_json,
+    invalidate_dictionary_cache, train_dictionary,
+)
+from quizzes.models import CompressionDictionary, QuizAttempt, QuizAttemptQuerySet
+
+PAYLOAD_FIELDS = QuizAttemptQuerySet.PAYLOAD_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Train the attempt payload compression dictionary and report compression stats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=2000,
+                            help='Number of recent attempts to train on / measure')
+        parser.add_argument('--train', action='store_true',
+                            help='Train and activate a new dictionary from the samples')
+        parser.add_argument('--recompress', action='store_true',
+                            help='Re-encode every finished attempt with the active dictionary')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def sample_payloads(self, limit):
+        rows = (
+            QuizAttempt.objects
+            .exclude(questions__isnull=True)
+            .order_by('-updated_at', '-id')
+            .values_list(*PAYLOAD_FIELDS)[:limit]
+        )
+        return [[decode_json(value) for value in row] for row in rows]
+
+    def recompress(self, batch_size):
+        """
+        Re-encode finished attempts. Each row is written only while its
+        version is the one read, so a concurrent regrade is never
+        overwritten; the content is unchanged, so the version is kept.
+        """
+        last_pk = None
+        total = skipped = 0
+        finished = QuizAttempt.objects.filter(status__in=QuizAttempt.FINISHED_STATUSES)
+        while True:
+            qs = finished.order_by('pk').only('pk', 'version', *PAYLOAD_FIELDS)
+            if last_pk is not None:
+                qs = qs.filter(pk__gt=last_pk)
+            batch = list(qs[:batch_size])
+            if not batch:
+                return total, skipped
+            with transaction.atomic():
+                for attempt in batch:
+                    # Reading decodes; the update re-encodes with the active dictionary
+                    values = {field: getattr(attempt, field) for field in PAYLOAD_FIELDS}
+                    if QuizAttempt.objects.filter(pk=attempt.pk, version=attempt.version).update(**values):
+                        total += 1
+                    else:
+                        # Rewritten since it was read, and so already re-encoded
+                        skipped += 1
+            last_pk = batch[-1].pk
+            self.stdout.write(f'  {total} attempts re-encoded')
+
+    def measure(self, payloads, dictionary_id):
+        raw_bytes = stored_bytes = 0
+        encode_times, decode_times = [], []
+
+        for row in payloads:
+            for value in row:
+                if value is None:
+                    continue
+                raw_bytes += len(json.dumps(value).encode())
+
+            started = time.perf_counter()
+            encoded = [compress_json(value, dictionary_id) for value in row if value is not None]
+            encode_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for blob in encoded:
+                decompress_json(blob)
+            decode_times.append(time.perf_counter() - started)
+
+            stored_bytes += sum(len(blob) for blob in encoded)
+
+        return {
+            'ratio': raw_bytes / stored_bytes if stored_bytes else 0,
+            'avg_raw': raw_bytes / len(payloads),
+            'avg_stored': stored_bytes / len(payloads),
+            'encode_us': statistics.median(encode_times) * 1e6,
+            'decode_us': statistics.median(decode_times) * 1e6,
+        }
+
+    def handle(self, *args, **options):
+        payloads = self.sample_payloads(options['samples'])
+        if not payloads:
+            self.stdout.write('No attempt payloads to sample.')
+            return
+
+        if options['train']:
+            data = train_dictionary(value for row in payloads for value in row if value)
+            dictionary = CompressionDictionary.objects.create(
+                data=data, sample_count=len(payloads)
+            )
+            invalidate_dictionary_cache()
+            self.stdout.write(self.style.SUCCESS(
+                f'Trained dictionary {dictionary.pk} ({len(data)} bytes) '
+                f'from {len(payloads)} attempts'
+            ))
+
+        dictionary_id = active_dictionary_id()
+
+        if options['recompress']:
+            total, skipped = self.recompress(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Re-encoded {total} finished attempts ({skipped} written meanwhile, left as they are)'
+            ))
+
+        self.stdout.write(f'Measured on {len(payloads)} attempts (median cost per attempt):')
+        codecs = [('zlib', None)]
+        if dictionary_id is not None:
+            codecs.append((f'zlib + dictionary {dictionary_id}', dictionary_id))
+
+        for label, codec_dictionary in codecs:
+            stats = self.measure(payloads, codec_dictionary)
+            self.stdout.write(
+                f'  {label}: {stats["avg_raw"]:.0f} -> {stats["avg_stored"]:.0f} bytes '
+                f'(ratio {stats["ratio"]:.2f}x), encode {stats["encode_us"]:.0f} us, '
+                f'decode {stats["decode_us"]:.0f} us'
+            )
@@ -0,0 +1,144 @@
+# quizzes/management/commands/export_cohort_reports.py
+"""
+Django management command to export performance PDFs for a whole cohort.
+
+Aggregates are prefetched in bulk (two grouped queries per batch of users)
+and the PDFs are rendered in parallel by a process pool. Output is written
+to a directory, or to a zip archive when the output path ends in ``.zip``.
+"""
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from quizzes.models import QuizAttempt
+from quizzes.report_pdf import render_performance_report
+from quizzes.reports import build_report_data_bulk, with_generated_on
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _parse_date(value):
+    try:
+        return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+
+def _peak_memory_mb(who):
+    """Peak RSS in MB for this process or its (reaped) children."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Command(BaseCommand):
+    help = 'Render performance PDF reports for a cohort of users in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Output directory, or a path ending in .zip')
+        parser.add_argument('--username', action='append', dest='usernames',
+                            help='Include this username (repeatable)')
+        parser.add_argument('--email-domain', help='Only users whose email ends with @DOMAIN')
+        parser.add_argument('--joined-after', help='Only users who joined on/after YYYY-MM-DD')
+        parser.add_argument('--joined-before', help='Only users who joined before YYYY-MM-DD')
+        parser.add_argument('--active-since',
+                            help='Only users with a completed quiz on/after YYYY-MM-DD')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of rendering processes (default: CPU count)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Users prefetched per batch (bounds memory)')
+
+    def get_users(self, options):
+        users = get_user_model().objects.filter(is_active=True)
+
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        if options['email_domain']:
+            users = users.filter(email__iendswith='@' + options['email_domain'].lstrip('@'))
+        if options['joined_after']:
+            users = users.filter(date_joined__gte=_parse_date(options['joined_after']))
+        if options['joined_before']:
+            users = users.filter(date_joined__lt=_parse_date(options['joined_before']))
+        if options['active_since']:
+            users = users.filter(
+                quiz_attempts__status=QuizAttempt.STATUS_COMPLETED,
+                quiz_attempts__completed_at__gte=_parse_date(options['active_since']),
+            ).distinct()
+
+        return users.only('id', 'username').order_by('pk')
+
+    def batches(self, users, batch_size):
+        """Keyset-paginate users so each batch is a cheap indexed range scan."""
+        last_pk = None
+        while True:
+            page = users if last_pk is None else users.filter(pk__gt=last_pk)
+            page = list(page[:batch_size])
+            if not page:
+                return
+            yield page
+            last_pk = page[-1].pk
+
+    def handle(self, *args, **options):
+        output = options['output']
+        as_zip = output.lower().endswith('.zip')
+        users = self.get_users(options)
+
+        if as_zip:
+            os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+            archive = zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED)
+        else:
+            os.makedirs(output, exist_ok=True)
+            archive = None
+
+        self.stdout.write(f'Rendering reports with {options["workers"]} worker(s)...')
+
+        rendered = 0
+        started = time.perf_counter()
+
+        try:
+            with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+                for batch in self.batches(users, options['batch_size']):
+                    prefetched = build_report_data_bulk(batch)
+                    payloads = [with_generated_on(data) for _, data in prefetched]
+
+                    pdfs = pool.map(render_performance_report, payloads, chunksize=8)
+                    for (user, _), pdf in zip(prefetched, pdfs):
+                        filename = f'{user.username}.pdf'
+                        if archive is not None:
+                            archive.writestr(filename, pdf)
+                        else:
+                            with open(os.path.join(output, filename), 'wb') as fh:
+                                fh.write(pdf)
+                        rendered += 1
+
+                    self.stdout.write(f'  {rendered} reports written')
+        finally:
+            if archive is not None:
+                archive.close()
+
+        elapsed = time.perf_counter() - started
+        rate = rendered / elapsed if elapsed else 0
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully exported {rendered} reports to {output}!')
+        )
+        self.stdout.write(f'  Elapsed: {elapsed:.2f}s ({rate:.1f} reports/sec)')
+
+        parent_peak = _peak_memory_mb(resource.RUSAGE_SELF) if resource else None
+        if parent_peak is not None:
+            child_peak = _peak_memory_mb(resource.RUSAGE_CHILDREN)
+            self.stdout.write(
+                f'  Peak memory: {parent_peak:.1f} MB (main), {child_peak:.1f} MB (largest worker)'
+            )
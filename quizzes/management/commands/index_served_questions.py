@@ -0,0 +1,56 @@
+# quizzes/management/commands/index_served_questions.py
+"""
+Django management command to backfill the ServedQuestion index from the
+questions stored in existing attempts. Safe to re-run.
+"""
+from django.core.management.base import BaseCommand
+
+from quizzes.models import Question, QuizAttempt, ServedQuestion
+
+
+class Command(BaseCommand):
+    help = 'Backfill the index of which attempts served which questions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # Entries from before question ids were recorded only carry the text
+        by_hash = dict(Question.objects.values_list('normalized_hash', 'pk'))
+        existing = set(by_hash.values())
+
+        last_pk = None
+        scanned = indexed = 0
+        while True:
+            qs = QuizAttempt.objects.exclude(questions__isnull=True).order_by('pk').only('pk', 'questions')
+            if last_pk is not None:
+                qs = qs.filter(pk__gt=last_pk)
+            batch = list(qs[:options['batch_size']])
+            if not batch:
+                break
+
+            rows = []
+            for attempt in batch:
+                for position, q in enumerate(attempt.questions or []):
+                    pk = q.get('question_pk')
+                    if pk is None:
+                        pk = by_hash.get(Question.make_hash(q.get('question', '')))
+                    if pk not in existing:
+                        continue
+                    rows.append(ServedQuestion(
+                        attempt_id=attempt.pk,
+                        question_id=pk,
+                        # Full copies were served before versioning began
+                        version=q.get('version', 0 if 'question' in q else 1),
+                        position=position,
+                    ))
+
+            ServedQuestion.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+            scanned += len(batch)
+            indexed += len(rows)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'  {scanned} attempts scanned')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {indexed} served questions from {scanned} attempts'
+        ))
@@ -0,0 +1,44 @@
+# quizzes/management/commands/reap_stale_attempts.py
+"""
+Django management command to close attempts that were left open.
+
+Attempts stuck in GENERATING are abandoned, attempts whose time ran out
+while nobody was on the page are finalized, and attempts paused for a long
+time are abandoned (see quizzes/reaper.py for the rules and settings).
+Only open attempts are read, through the status index, in batches of
+--batch-size.
+
+Run it from cron, or keep it running with --interval.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from quizzes.reaper import REAP_BATCH_SIZE, reap
+
+
+class Command(BaseCommand):
+    help = 'Abandon or finalize stale GENERATING and IN_PROGRESS attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REAP_BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Stop a run after this many batches')
+        parser.add_argument('--interval', type=int, default=None,
+                            help='Keep running and reap every INTERVAL seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            counts = reap(options['batch_size'], options['max_batches'])
+
+            self.stdout.write(self.style.SUCCESS(
+                f"Checked {counts['checked']} open attempts in {counts['batches']} batch(es): "
+                f"{counts['generating_abandoned']} stuck generating abandoned, "
+                f"{counts['finalized']} expired finalized, {counts['abandoned']} idle abandoned "
+                f"in {time.perf_counter() - started:.2f}s"
+            ))
+
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
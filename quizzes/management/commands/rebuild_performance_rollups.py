@@ -0,0 +1,27 @@
+# quizzes/management/commands/rebuild_performance_rollups.py
+"""
+Django management command to (re)build the DailyPerformance rollups
+from completed quiz attempts.
+"""
+from django.core.management.base import BaseCommand
+
+from quizzes.analytics import rebuild_daily_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily performance rollups from completed quiz attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='Only rebuild rollups for this user id (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding daily performance rollups...')
+
+        written = rebuild_daily_rollups(options['user_ids'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully wrote {written} daily rollup rows!')
+        )
@@ -0,0 +1,65 @@
+# quizzes/management/commands/run_regrades.py
+"""
+Django management command to run queued regrade jobs.
+
+Jobs are queued from the Question admin when an answer key is corrected.
+Run this from cron, or keep it running with --interval; an interrupted job
+is picked up again (from its last committed batch) once its lease expires.
+A job that had to skip attempts still being taken is queued again and
+finishes on a later run, once they are done.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quizzes.models import Question, RegradeJob
+from quizzes.regrade import REGRADE_BATCH_SIZE, claim_next_job, queue_regrade, run_job
+
+
+class Command(BaseCommand):
+    help = 'Re-grade attempts for questions whose answer key was corrected'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--question', type=int, action='append', dest='questions',
+                            help='Queue a regrade for this question id first (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=REGRADE_BATCH_SIZE)
+        parser.add_argument('--interval', type=int, default=None,
+                            help='Keep running and poll for new jobs every INTERVAL seconds')
+
+    def progress(self, job):
+        self.stdout.write(
+            f'  job {job.pk}: {job.attempts_regraded} attempts regraded, '
+            f'{job.answers_changed} grades changed'
+        )
+
+    def handle(self, *args, **options):
+        for question_id in options['questions'] or []:
+            try:
+                question = Question.objects.get(pk=question_id)
+            except Question.DoesNotExist:
+                raise CommandError(f'Question {question_id} does not exist')
+            job = queue_regrade(question)
+            self.stdout.write(f'Queued regrade job {job.pk} for question {question_id}')
+
+        while True:
+            job = claim_next_job()
+            while job is not None:
+                started = time.perf_counter()
+                run_job(job, options['batch_size'], progress=self.progress)
+                summary = (
+                    f'regrade job {job.pk} (question {job.question_id} -> v{job.target_version}): '
+                    f'{job.attempts_regraded} attempts, {job.answers_changed} grades changed '
+                    f'in {time.perf_counter() - started:.2f}s'
+                )
+                if job.status == RegradeJob.STATUS_DONE:
+                    self.stdout.write(self.style.SUCCESS(f'Finished {summary}'))
+                else:
+                    self.stdout.write(
+                        f'Paused {summary}; {job.skipped} attempt(s) in progress, '
+                        f'next pass after {job.retry_at:%H:%M:%S}'
+                    )
+                job = claim_next_job()
+
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,161 @@
+# quizzes/management/commands/timer_load_test.py
+"""
+Django management command comparing the database write load of the old
+heartbeat timer with the server-side session timer.
+
+It simulates --users people taking a quiz over the same --duration window:
+each answers a question every --answer-every seconds and leaves the page
+--leaves times along the way. Both runs drive the real quiz views
+(``show_question``, ``submit_answer``, ``pause_timer``) through a request
+factory and count the UPDATE statements issued against the attempts table.
+The heartbeat run additionally replays what the old page did: one timer
+UPDATE every --heartbeat seconds and one on every page unload.
+
+Everything runs inside a transaction that is rolled back, so no data is
+left behind.
+"""
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from quizzes import timing, views
+from quizzes.models import Category, QuizAttempt, SubCategory
+
+
+class UpdateCounter:
+    """``execute_wrapper`` counting UPDATEs on one table."""
+
+    def __init__(self, table):
+        self.table = table
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        statement = sql.lstrip().upper()
+        if statement.startswith('UPDATE') and self.table.upper() in statement:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare QuizAttempt writes/sec of the heartbeat timer and the session timer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--duration', type=int, default=600,
+                            help='Simulated seconds everyone spends on the quiz')
+        parser.add_argument('--answer-every', type=int, default=45)
+        parser.add_argument('--heartbeat', type=int, default=10,
+                            help='Heartbeat interval of the old timer, in seconds')
+        parser.add_argument('--leaves', type=int, default=1,
+                            help='Times each user leaves and comes back')
+
+    def make_attempts(self, users):
+        category = Category.objects.create(name=f'load-test-{uuid.uuid4().hex[:8]}')
+        subcategory = SubCategory.objects.create(category=category, name='load test')
+        questions = [
+            {
+                'id': i + 1, 'question': f'Question {i + 1}', 'option_a': 'a',
+                'option_b': 'b', 'option_c': 'c', 'option_d': 'd',
+                'correct_answer': 'A', 'explanation': '', 'user_answer': None,
+                'is_correct': None,
+            }
+            for i in range(10)
+        ]
+        attempts = []
+        for user in users:
+            attempt = QuizAttempt(
+                user=user, category=category, subcategory=subcategory,
+                status=QuizAttempt.STATUS_IN_PROGRESS, total_questions=len(questions),
+                questions=questions, started_at=timezone.now(),
+            )
+            timing.start(attempt)
+            attempts.append(attempt)
+        QuizAttempt.objects.bulk_create(attempts)
+        return attempts
+
+    def simulate(self, users, options, heartbeat):
+        factory = RequestFactory()
+        attempts = self.make_attempts(users)
+        table = QuizAttempt._meta.db_table
+        counter = UpdateCounter(table)
+
+        answers = min(options['duration'] // options['answer_every'], 9)
+        heartbeats = options['duration'] // options['heartbeat']
+        leave_after = {answers * (i + 1) // (options['leaves'] + 1) for i in range(options['leaves'])}
+
+        def call(view, user, attempt, method='get', data=None):
+            request = getattr(factory, method)('/', data or {})
+            request.user = user
+            request._dont_enforce_csrf_checks = True
+            view(request, attempt_id=attempt.pk)
+
+        def heartbeat_update(attempt):
+            # What the old save_timer view wrote on every call
+            QuizAttempt.objects.filter(pk=attempt.pk).update(
+                time_spent_seconds=timing.elapsed_seconds(attempt), updated_at=timezone.now()
+            )
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            for user, attempt in zip(users, attempts):
+                call(views.show_question, user, attempt)
+                for number in range(answers):
+                    if heartbeat:
+                        heartbeat_update(attempt)   # beforeunload on submit
+                    call(views.submit_answer, user, attempt, 'post', {'answer': 'A'})
+                    call(views.show_question, user, attempt)
+                    if number + 1 in leave_after:
+                        if heartbeat:
+                            heartbeat_update(attempt)
+                        else:
+                            call(views.pause_timer, user, attempt, 'post')
+                        call(views.show_question, user, attempt)
+                if heartbeat:
+                    for _ in range(heartbeats):
+                        heartbeat_update(attempt)
+        return counter.count, time.perf_counter() - started
+
+    def run(self, options, heartbeat):
+        User = get_user_model()
+        try:
+            with transaction.atomic():
+                tag = uuid.uuid4().hex[:8]
+                users = [
+                    User.objects.create(username=f'load-{tag}-{i}', email=f'load-{tag}-{i}@example.com')
+                    for i in range(options['users'])
+                ]
+                result = self.simulate(users, options, heartbeat)
+                raise Rollback
+        except Rollback:
+            return result
+
+    def handle(self, *args, **options):
+        duration = options['duration']
+        self.stdout.write(
+            f"{options['users']} users, {duration}s quiz, answer every "
+            f"{options['answer_every']}s, {options['leaves']} leave(s) each"
+        )
+
+        rows = []
+        for label, heartbeat in (('heartbeat timer', True), ('session timer', False)):
+            updates, elapsed = self.run(options, heartbeat)
+            rows.append((label, updates))
+            self.stdout.write(
+                f'  {label:<16} {updates:>8} UPDATEs  {updates / duration:>8.2f} writes/sec  '
+                f'{updates / options["users"]:>6.1f} per user  ({elapsed:.1f}s to simulate)'
+            )
+
+        before, after = rows[0][1], rows[1][1]
+        self.stdout.write(self.style.SUCCESS(
+            f'Session timer issues {before / after if after else float("inf"):.1f}x fewer '
+            f'attempt UPDATEs ({before - after} fewer over {duration}s)'
+        ))
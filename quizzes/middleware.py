@@ -0,0 +1,16 @@
+# quizzes/middleware.py
+from .taxonomy import request_scope
+
+
+class TaxonomyMiddleware:
+    """
+    Marks request boundaries for the process-local taxonomy snapshot, so
+    it checks the global version at most once per request (taxonomy.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_scope():
+            return self.get_response(request)
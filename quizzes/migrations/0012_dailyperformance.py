@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_performance(apps, schema_editor):
+    QuizAttempt = apps.get_model('quizzes', 'QuizAttempt')
+    DailyPerformance = apps.get_model('quizzes', 'DailyPerformance')
+
+    rows = (
+        QuizAttempt.objects
+        .filter(status=2, completed_at__isnull=False)
+        .annotate(date=TruncDate('completed_at'))
+        .values('user_id', 'date')
+        .annotate(
+            attempts=Count('id'),
+            score_sum=Sum('score'),
+            correct=Sum('correct_answers'),
+            attempted=Sum('attempted_questions'),
+            time_seconds=Sum('time_taken_seconds'),
+        )
+        .order_by()
+    )
+    DailyPerformance.objects.bulk_create(
+        (DailyPerformance(**row) for row in rows.iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0011_alter_quizattempt_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPerformance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('attempts', models.IntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('correct', models.IntegerField(default=0)),
+                ('attempted', models.IntegerField(default=0)),
+                ('time_seconds', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_performance', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_performance, migrations.RunPython.noop),
+    ]
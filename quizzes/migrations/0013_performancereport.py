@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0012_dailyperformance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerformanceReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.SmallIntegerField(choices=[(0, 'Pending'), (1, 'Ready'), (2, 'Failed')], default=0)),
+                ('stats_key', models.CharField(blank=True, max_length=64)),
+                ('pending_key', models.CharField(blank=True, max_length=64)),
+                ('file', models.FileField(blank=True, upload_to='reports/')),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('requested_at', models.DateTimeField(blank=True, null=True)),
+                ('generated_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='performance_report', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
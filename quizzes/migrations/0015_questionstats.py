@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0014_conceptmastery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quizzes.question')),
+                ('responses', models.IntegerField(default=0)),
+                ('answered', models.IntegerField(default=0)),
+                ('p_value', models.FloatField(blank=True, null=True)),
+                ('discrimination', models.FloatField(blank=True, null=True)),
+                ('rate_a', models.FloatField(blank=True, null=True)),
+                ('rate_b', models.FloatField(blank=True, null=True)),
+                ('rate_c', models.FloatField(blank=True, null=True)),
+                ('rate_d', models.FloatField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'question stats',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0015_questionstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreDistribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('difficulty', models.CharField(max_length=10)),
+                ('bin_width', models.FloatField()),
+                ('counts', models.JSONField()),
+                ('total', models.IntegerField(default=0)),
+                ('built_at', models.DateTimeField()),
+                ('subcategory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_distributions', to='quizzes.subcategory')),
+            ],
+            options={
+                'unique_together': {('subcategory', 'difficulty')},
+            },
+        ),
+    ]
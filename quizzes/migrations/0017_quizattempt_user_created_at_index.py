@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0016_scoredistribution'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['user', 'created_at'], name='quizzes_qui_user_id_a7c992_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0018_change_feed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['user', 'completed_at', 'id'], name='quizzes_qui_user_id_885f76_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['user', 'status', 'completed_at', 'id'], name='quizzes_qui_user_id_307bba_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['user', 'subcategory', 'completed_at', 'id'], name='quizzes_qui_user_id_200a82_idx'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+from django.db import migrations, models
+
+import quizzes.fields
+
+BATCH_SIZE = 500
+
+
+def _copy_payloads(QuizAttempt, source, target):
+    last_pk = None
+    while True:
+        qs = QuizAttempt.objects.order_by('pk').only('pk', *source)
+        if last_pk is not None:
+            qs = qs.filter(pk__gt=last_pk)
+        batch = list(qs[:BATCH_SIZE])
+        if not batch:
+            return
+        for attempt in batch:
+            for src, dst in zip(source, target):
+                setattr(attempt, dst, getattr(attempt, src))
+        QuizAttempt.objects.bulk_update(batch, list(target))
+        last_pk = batch[-1].pk
+
+
+def pack_payloads(apps, schema_editor):
+    QuizAttempt = apps.get_model('quizzes', 'QuizAttempt')
+    _copy_payloads(
+        QuizAttempt, ('questions', 'ai_meta'), ('questions_packed', 'ai_meta_packed')
+    )
+
+
+def unpack_payloads(apps, schema_editor):
+    QuizAttempt = apps.get_model('quizzes', 'QuizAttempt')
+    _copy_payloads(
+        QuizAttempt, ('questions_packed', 'ai_meta_packed'), ('questions', 'ai_meta')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0019_attempt_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompressionDictionary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField()),
+                ('sample_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'compression dictionaries',
+            },
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='questions_packed',
+            field=quizzes.fields.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='ai_meta_packed',
+            field=quizzes.fields.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(pack_payloads, unpack_payloads),
+        migrations.RemoveField(
+            model_name='quizattempt',
+            name='questions',
+        ),
+        migrations.RemoveField(
+            model_name='quizattempt',
+            name='ai_meta',
+        ),
+        migrations.RenameField(
+            model_name='quizattempt',
+            old_name='questions_packed',
+            new_name='questions',
+        ),
+        migrations.RenameField(
+            model_name='quizattempt',
+            old_name='ai_meta_packed',
+            new_name='ai_meta',
+        ),
+    ]
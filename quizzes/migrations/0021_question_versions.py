@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0020_compressed_attempt_payloads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.CreateModel(
+            name='QuestionRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('question_text', models.TextField()),
+                ('option_a', models.TextField()),
+                ('option_b', models.TextField()),
+                ('option_c', models.TextField()),
+                ('option_d', models.TextField()),
+                ('correct_answer', models.CharField(max_length=1)),
+                ('explanation', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='quizzes.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'id'], name='quizzes_que_created_385c62_idx')],
+                'unique_together': {('question', 'version')},
+            },
+        ),
+    ]
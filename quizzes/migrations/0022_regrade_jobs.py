@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0021_question_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegradeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_version', models.PositiveIntegerField()),
+                ('correct_answer', models.CharField(max_length=1)),
+                ('status', models.SmallIntegerField(choices=[(0, 'Pending'), (1, 'Running'), (2, 'Done'), (3, 'Failed')], default=0)),
+                ('cursor', models.CharField(blank=True, max_length=64)),
+                ('attempts_regraded', models.IntegerField(default=0)),
+                ('answers_changed', models.IntegerField(default=0)),
+                ('skipped', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='regrade_jobs', to='quizzes.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='quizzes_reg_status_4884c8_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ServedQuestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('position', models.SmallIntegerField()),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='served', to='quizzes.quizattempt')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='servings', to='quizzes.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['question', 'attempt'], name='quizzes_ser_questio_87b4bb_idx')],
+                'unique_together': {('attempt', 'position')},
+            },
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:49
+
+import django.db.models.deletion
+import quizzes.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0022_regrade_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAttempt',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('difficulty', models.CharField(max_length=10)),
+                ('status', models.SmallIntegerField(choices=[(0, 'Generating Questions'), (1, 'In Progress'), (2, 'Completed'), (3, 'Abandoned')])),
+                ('total_questions', models.SmallIntegerField(default=0)),
+                ('correct_answers', models.SmallIntegerField(default=0)),
+                ('attempted_questions', models.SmallIntegerField(default=0)),
+                ('score', models.FloatField(default=0.0)),
+                ('time_limit_seconds', models.IntegerField(default=600)),
+                ('time_taken_seconds', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('questions', quizzes.fields.CompressedJSONField(blank=True, null=True)),
+                ('ai_meta', quizzes.fields.CompressedJSONField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('difficulty', models.CharField(max_length=10)),
+                ('status', models.SmallIntegerField(choices=[(0, 'Generating Questions'), (1, 'In Progress'), (2, 'Completed'), (3, 'Abandoned')])),
+                ('attempts', models.IntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('best_score', models.FloatField(default=0.0)),
+                ('worst_score', models.FloatField(default=0.0)),
+                ('correct', models.IntegerField(default=0)),
+                ('attempted', models.IntegerField(default=0)),
+                ('time_seconds', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['completed_at', 'id'], name='quizzes_qui_complet_89d0e0_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedattempt',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='quizzes.category'),
+        ),
+        migrations.AddField(
+            model_name='archivedattempt',
+            name='subcategory',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='quizzes.subcategory'),
+        ),
+        migrations.AddField(
+            model_name='archivedattempt',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attempts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedrollup',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='quizzes.category'),
+        ),
+        migrations.AddField(
+            model_name='archivedrollup',
+            name='subcategory',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='quizzes.subcategory'),
+        ),
+        migrations.AddField(
+            model_name='archivedrollup',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_rollups', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedattempt',
+            index=models.Index(fields=['user', 'completed_at', 'id'], name='quizzes_arc_user_id_d97ea1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedattempt',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='quizzes_arc_user_id_94dadd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedattempt',
+            index=models.Index(fields=['user', 'started_at'], name='quizzes_arc_user_id_3fc2bb_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='archivedrollup',
+            unique_together={('user', 'category', 'subcategory', 'difficulty', 'status')},
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:50
+
+from django.db import migrations, models
+from django.db.models import F
+
+IN_PROGRESS = 1
+
+
+def open_sessions(apps, schema_editor):
+    """
+    Carry running attempts over to the session model.
+
+    Attempts the browser had reported a remaining time for are treated as
+    paused with that time left; other running attempts keep their current
+    session open from ``started_at``.
+    """
+    QuizAttempt = apps.get_model('quizzes', 'QuizAttempt')
+    running = QuizAttempt.objects.filter(status=IN_PROGRESS)
+
+    running.filter(remaining_seconds__isnull=False).update(
+        time_spent_seconds=F('time_limit_seconds') - F('remaining_seconds'),
+    )
+    running.filter(
+        remaining_seconds__isnull=True, paused_at__isnull=True, started_at__isnull=False
+    ).update(resumed_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0023_attempt_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='resumed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(open_sessions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='quizattempt',
+            name='remaining_seconds',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0024_server_side_timer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
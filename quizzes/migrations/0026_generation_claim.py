@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0025_attempt_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='generation_lease_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='generation_token',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:05
+
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    """Compute path and level of every subcategory from parent_subcat."""
+    SubCategory = apps.get_model('quizzes', 'SubCategory')
+    parents = dict(SubCategory.objects.values_list('id', 'parent_subcat_id'))
+
+    paths = {}
+
+    def path_of(pk):
+        if pk not in paths:
+            chain, node = [], pk
+            # Walk up to the top (or to a row already done); a cycle is cut
+            # where it closes and that row becomes top-level
+            while node is not None and node not in paths and node not in chain:
+                chain.append(node)
+                node = parents.get(node)
+            prefix = paths[node] if node in paths else '/'
+            for row in reversed(chain):
+                prefix = paths[row] = f'{prefix}{row}/'
+        return paths[pk]
+
+    rows = list(SubCategory.objects.only('id', 'path', 'level'))
+    for row in rows:
+        row.path = path_of(row.id)
+        row.level = row.path.count('/') - 1
+    SubCategory.objects.bulk_update(rows, ['path', 'level'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0027_taxonomy_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subcategory',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0028_subcategory_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='regradejob',
+            name='retry_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0029_regradejob_retry_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='regradejob',
+            name='status',
+            field=models.SmallIntegerField(choices=[(0, 'Pending'), (1, 'Running'), (2, 'Done'), (3, 'Failed'), (4, 'Superseded')], default=0),
+        ),
+    ]
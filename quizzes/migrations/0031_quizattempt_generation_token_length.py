@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0030_regradejob_superseded'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quizattempt',
+            name='generation_token',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
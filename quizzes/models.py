@@ -1,10 +1,15 @@
 # quizzes/models.py
 import uuid
 from django.db import models
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat, Substr
 from django.conf import settings
-from django.utils import timezone
 import hashlib
 import re
+
+from .fields import CompressedJSONField
+
+
 class Category(models.Model):
     name = models.CharField(max_length=150, unique=True)
     description = models.TextField(blank=True)
@@ -14,16 +19,43 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+def path_prefix_q(path, field='path'):
+    """
+    Rows whose materialized ``field`` starts with ``path``, written as an
+    index range rather than LIKE: paths hold only digits and "/", and "/"
+    sorts right before "0".
+    """
+    return Q(**{f'{field}__gte': path, f'{field}__lt': path[:-1] + '0'})
+
+
+class SubCategoryQuerySet(models.QuerySet):
+    def subtree(self, node, include_self=True):
+        """``node`` and everything below it, at any depth (one index range scan)."""
+        queryset = self.filter(path_prefix_q(node.path))
+        return queryset if include_self else queryset.exclude(pk=node.pk)
+
+    def leaves_under(self, node):
+        """The quiz topics (leaves) anywhere under ``node``."""
+        return self.subtree(node).filter(is_leaf=True)
+
+
 class SubCategory(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='subcategories')
     name = models.CharField(max_length=150)
+    # Depth in the tree, 1 for top-level subcategories (kept in step with path)
     level = models.SmallIntegerField(default=1)
     parent_subcat = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True)
+    # Materialized path: ids from the top-level ancestor down to this row,
+    # e.g. "/4/12/31/". Subtrees are prefix scans, ancestors are parsed
+    # from it. Maintained by save() and, for deleted parents, signals.py.
+    path = models.CharField(max_length=255, db_index=True, blank=True, default='', editable=False)
     is_leaf = models.BooleanField(default=True)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SubCategoryQuerySet.as_manager()
+
     class Meta:
         unique_together = ('category', 'name')
         ordering = ['category', 'level', 'name']
@@ -31,6 +63,70 @@ class SubCategory(models.Model):
     def __str__(self):
         return f"{self.category.name} - {self.name}"
 
+    def save(self, *args, **kwargs):
+        previous_path, previous_level = self.path, self.level
+
+        prefix = '/'
+        if self.parent_subcat_id:
+            prefix = SubCategory.objects.filter(pk=self.parent_subcat_id).values_list('path', flat=True).get()
+            if previous_path and prefix.startswith(previous_path):
+                raise ValueError(f'{self} cannot be moved under its own subtree')
+        self.level = prefix.count('/')
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'path', 'level'}
+
+        if self.pk is None:
+            super().save(*args, **kwargs)
+            self.path = f'{prefix}{self.pk}/'
+            SubCategory.objects.filter(pk=self.pk).update(path=self.path)
+            return
+
+        self.path = f'{prefix}{self.pk}/'
+        super().save(*args, **kwargs)
+        if previous_path and previous_path != self.path:
+            SubCategory.move_subtree(previous_path, self.path, self.level - previous_level, exclude=self.pk)
+
+    @staticmethod
+    def move_subtree(old_prefix, new_prefix, level_delta, exclude=None):
+        """Re-root every row under ``old_prefix`` at ``new_prefix`` (one UPDATE)."""
+        rows = SubCategory.objects.filter(path_prefix_q(old_prefix))
+        if exclude is not None:
+            rows = rows.exclude(pk=exclude)
+        return rows.update(
+            path=Concat(Value(new_prefix), Substr('path', len(old_prefix) + 1),
+                        output_field=models.CharField()),
+            level=F('level') + level_delta,
+        )
+
+    def ancestor_ids(self):
+        return [int(pk) for pk in self.path.strip('/').split('/')[:-1] if pk]
+
+    def ancestors(self):
+        """The chain above this row, top-level first (one query by primary key)."""
+        return SubCategory.objects.filter(pk__in=self.ancestor_ids()).order_by('level')
+
+    def breadcrumb(self):
+        """Ancestors followed by this row."""
+        return [*self.ancestors(), self]
+
+    def descendants(self):
+        return SubCategory.objects.subtree(self, include_self=False)
+
+    def leaves(self):
+        return SubCategory.objects.leaves_under(self)
+
+class QuizAttemptQuerySet(models.QuerySet):
+    # Per-attempt JSON payloads: ~10 full questions with explanations, plus
+    # AI metadata. Only the question, results and grading views read them.
+    PAYLOAD_FIELDS = ('questions', 'ai_meta')
+
+    def slim(self):
+        """Defer the JSON payload columns (for lists, prompts and aggregates)."""
+        return self.defer(*self.PAYLOAD_FIELDS)
+
+
 class QuizAttempt(models.Model):
     correct_answers = models.SmallIntegerField(default=0)
     attempted_questions = models.SmallIntegerField(default=0)
@@ -47,6 +143,8 @@ class QuizAttempt(models.Model):
         (STATUS_COMPLETED, 'Completed'),
         (STATUS_ABANDONED, 'Abandoned'),
     ]
+    # Attempts no request writes to any more (regrades aside)
+    FINISHED_STATUSES = (STATUS_COMPLETED, STATUS_ABANDONED)
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='quiz_attempts')
@@ -59,34 +157,42 @@ class QuizAttempt(models.Model):
     ],
     default='medium')
     time_limit_seconds = models.IntegerField(default=600)  # 10 minutes default
-    paused_at = models.DateTimeField(null=True, blank=True)
+    # Timer session boundaries (see timing.py): time used by closed sessions,
+    # and the start of the open one (null while paused)
     time_spent_seconds = models.IntegerField(default=0)
-    remaining_seconds = models.PositiveIntegerField(null=True, blank=True)  # NEW
+    resumed_at = models.DateTimeField(null=True, blank=True)
+    paused_at = models.DateTimeField(null=True, blank=True)
 
 
-    # JSON structure for questions:
+    # JSON structure for questions (references to versioned Question rows;
+    # use hydrated_questions() for the display text):
     # [
     #   {
     #     "id": 1,
-    #     "question": "What is...",
-    #     "option_a": "...",
-    #     "option_b": "...",
-    #     "option_c": "...",
-    #     "option_d": "...",
-    #     "correct_answer": "A",
-    #     "explanation": "...",
+    #     "question_pk": 42,
+    #     "version": 1,
     #     "user_answer": null,  # filled when user answers
     #     "is_correct": null    # calculated when user answers
     #   }
     # ]
-    questions = models.JSONField(null=True, blank=True)
+    # Older attempts hold full copies ("question", "option_a".."option_d",
+    # "correct_answer", "explanation"); hydration passes those through.
+    # Stored zlib-compressed and decoded lazily on access (see fields.py)
+    questions = CompressedJSONField(null=True, blank=True)
     
     # AI metadata (model used, tokens, generation time, etc.)
-    ai_meta = models.JSONField(null=True, blank=True)
+    ai_meta = CompressedJSONField(null=True, blank=True)
     
     status = models.SmallIntegerField(default=STATUS_GENERATING, choices=STATUS_CHOICES)
+    # Claim on the question generation of a GENERATING attempt: the holder's
+    # token and when its lease runs out (see generation.py)
+    generation_token = models.CharField(max_length=100, null=True, blank=True)
+    generation_lease_until = models.DateTimeField(null=True, blank=True)
     total_questions = models.SmallIntegerField(default=10)
     current_question_index = models.SmallIntegerField(default=0)  # Track progress
+    # Bumped by every write of the answers; answer submission only writes
+    # if it still matches what was read (see answering.py)
+    version = models.PositiveIntegerField(default=0)
     score = models.FloatField(default=0.0)
     
     started_at = models.DateTimeField(null=True, blank=True)
@@ -94,9 +200,19 @@ class QuizAttempt(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = QuizAttemptQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=['user', 'started_at']),
+            models.Index(fields=['user', 'created_at']),
+            # Keyset-paginated history (see quizzes/history.py)
+            models.Index(fields=['user', 'completed_at', 'id']),
+            models.Index(fields=['user', 'status', 'completed_at', 'id']),
+            models.Index(fields=['user', 'subcategory', 'completed_at', 'id']),
+            models.Index(fields=['updated_at', 'id']),
+            # Oldest-first archival sweep (see quizzes/archive.py)
+            models.Index(fields=['completed_at', 'id']),
             models.Index(fields=['category', 'subcategory']),
             models.Index(fields=['status']),
         ]
@@ -114,10 +230,19 @@ class QuizAttempt(models.Model):
         self.score = (correct_count / len(self.questions)) * 100
         return self.score
     
+    def hydrated_questions(self):
+        """
+        The served questions with their display text, options and answer key
+        resolved from the referenced question versions.
+        """
+        from .question_refs import hydrate_questions
+        return hydrate_questions(self.questions or [])
+
     def get_current_question(self):
         """Get the current question based on index"""
         if self.questions and 0 <= self.current_question_index < len(self.questions):
-            return self.questions[self.current_question_index]
+            from .question_refs import hydrate_questions
+            return hydrate_questions([self.questions[self.current_question_index]])[0]
         return None
     
     def is_quiz_complete(self):
@@ -147,8 +272,72 @@ class Question(models.Model):
         default='ai'
     )
 
+    concept = models.ForeignKey(
+        'Concept',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='questions'
+    )
+
     usage_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Bumped whenever the content below changes; attempts reference
+    # (question, version) and older versions live in QuestionRevision
+    version = models.PositiveIntegerField(default=1)
+
+    CONTENT_FIELDS = (
+        'question_text', 'option_a', 'option_b', 'option_c', 'option_d',
+        'correct_answer', 'explanation',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_content = {
+            name: value for name, value in zip(field_names, values)
+            if name in cls.CONTENT_FIELDS
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Snapshot the previous content as a ``QuestionRevision`` and bump
+        ``version`` when the content changes, so attempts that served the
+        old version still show (and grade against) what was served.
+
+        ``QuerySet.update()`` bypasses this; edit content through ``save()``.
+        """
+        loaded = getattr(self, '_loaded_content', {})
+        update_fields = kwargs.get('update_fields')
+        changed = [
+            name for name, value in loaded.items()
+            if getattr(self, name) != value
+            and (update_fields is None or name in update_fields)
+        ]
+
+        if self.pk and changed:
+            QuestionRevision.objects.get_or_create(
+                question_id=self.pk,
+                version=self.version,
+                defaults={
+                    name: loaded.get(name, getattr(self, name))
+                    for name in self.CONTENT_FIELDS
+                },
+            )
+            self.version += 1
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'version'}
+
+        super().save(*args, **kwargs)
+        self._loaded_content = {name: getattr(self, name) for name in self.CONTENT_FIELDS}
 
     @staticmethod
     def normalize(text):
@@ -164,6 +353,30 @@ class Question(models.Model):
     def __str__(self):
         return self.question_text[:60]
 
+class QuestionRevision(models.Model):
+    """Content of a ``Question`` as it was at an earlier ``version``."""
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='revisions')
+    version = models.PositiveIntegerField()
+
+    question_text = models.TextField()
+    option_a = models.TextField()
+    option_b = models.TextField()
+    option_c = models.TextField()
+    option_d = models.TextField()
+    correct_answer = models.CharField(max_length=1)
+    explanation = models.TextField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('question', 'version')
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.question} (v{self.version})"
+
 class Concept(models.Model):
     subcategory = models.ForeignKey(
         SubCategory,
@@ -188,3 +401,334 @@ class Concept(models.Model):
 
     def __str__(self):
         return f"{self.subcategory.name} - {self.name} ({self.difficulty})"
+
+class DailyPerformance(models.Model):
+    """
+    Per-user, per-day rollup of completed quizzes.
+
+    Maintained by ``analytics.record_completed_attempt`` when an attempt is
+    finalized; weekly and monthly series are derived from these rows.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_performance')
+    date = models.DateField()
+    attempts = models.IntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    correct = models.IntegerField(default=0)
+    attempted = models.IntegerField(default=0)
+    time_seconds = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'date')
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date}"
+
+    @property
+    def avg_score(self):
+        return self.score_sum / self.attempts if self.attempts else 0
+
+class PerformanceReport(models.Model):
+    """
+    Cached, pre-rendered performance PDF for a user.
+
+    ``stats_key`` is a hash of the report data; the PDF is only rebuilt when
+    the user's stats (and therefore the key) change.
+    """
+    STATUS_PENDING = 0
+    STATUS_READY = 1
+    STATUS_FAILED = 2
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_READY, 'Ready'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='performance_report')
+    status = models.SmallIntegerField(default=STATUS_PENDING, choices=STATUS_CHOICES)
+    stats_key = models.CharField(max_length=64, blank=True)   # key of the stored file
+    pending_key = models.CharField(max_length=64, blank=True) # key being rendered
+    file = models.FileField(upload_to='reports/', blank=True)
+    size = models.PositiveIntegerField(default=0)
+
+    requested_at = models.DateTimeField(null=True, blank=True)
+    generated_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.get_status_display()}"
+
+    def is_current(self, stats_key):
+        return self.stats_key == stats_key and bool(self.file)
+
+class ConceptMastery(models.Model):
+    """
+    Per-user, per-concept answer tally, updated incrementally as each answer
+    is graded (see ``analytics.record_concept_answer``).
+
+    ``mastery`` is ``correct / attempted`` stored so weak concepts can be read
+    with a single indexed query.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='concept_mastery')
+    concept = models.ForeignKey(Concept, on_delete=models.CASCADE, related_name='mastery')
+    attempted = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    mastery = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'concept')
+        indexes = [
+            models.Index(fields=['user', 'mastery']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.concept.name} ({self.correct}/{self.attempted})"
+
+class QuestionStats(models.Model):
+    """
+    Item-analysis statistics for a question, rebuilt in batch by the
+    ``analyze_items`` management command.
+
+    - ``p_value``: share of servings answered correctly (difficulty index)
+    - ``discrimination``: point-biserial correlation between answering this
+      item correctly and the rest of the attempt's score
+    - ``rate_a`` .. ``rate_d``: share of answers choosing each option
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    responses = models.IntegerField(default=0)
+    answered = models.IntegerField(default=0)
+    p_value = models.FloatField(null=True, blank=True)
+    discrimination = models.FloatField(null=True, blank=True)
+    rate_a = models.FloatField(null=True, blank=True)
+    rate_b = models.FloatField(null=True, blank=True)
+    rate_c = models.FloatField(null=True, blank=True)
+    rate_d = models.FloatField(null=True, blank=True)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = 'question stats'
+
+    def __str__(self):
+        return f"Stats for {self.question}"
+
+class ScoreDistribution(models.Model):
+    """
+    Compact score histogram for one (subcategory, difficulty), rebuilt
+    periodically by the ``build_score_distributions`` command and used to
+    answer percentile queries without touching ``QuizAttempt``.
+    """
+    subcategory = models.ForeignKey(SubCategory, on_delete=models.CASCADE, related_name='score_distributions')
+    difficulty = models.CharField(max_length=10)
+    bin_width = models.FloatField()
+    counts = models.JSONField()   # attempts per score bin over [0, 100]
+    total = models.IntegerField(default=0)
+    built_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('subcategory', 'difficulty')
+
+    def __str__(self):
+        return f"{self.subcategory.name} ({self.difficulty}) - {self.total} attempts"
+
+
+class DeletedRecord(models.Model):
+    """
+    Tombstone written when a change-feed tracked row is deleted, so the
+    incremental export can propagate deletions downstream.
+    """
+    model = models.CharField(max_length=100)   # e.g. "quizzes.quizattempt"
+    object_id = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted"
+
+
+class ExportCheckpoint(models.Model):
+    """Watermark of the incremental export for one change-feed stream."""
+    stream = models.CharField(max_length=50, unique=True)
+    last_changed_at = models.DateTimeField(null=True, blank=True)
+    last_pk = models.CharField(max_length=64, blank=True)
+    batches = models.IntegerField(default=0)
+    rows = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.stream} @ {self.last_changed_at}"
+
+
+class CompressionDictionary(models.Model):
+    """
+    Shared zlib preset dictionary for ``CompressedJSONField`` payloads.
+
+    Rows are immutable: compressed values reference their dictionary by id,
+    so a retrained dictionary is always added as a new row.
+    """
+    data = models.BinaryField()
+    sample_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'compression dictionaries'
+
+    def __str__(self):
+        return f"Dictionary {self.pk} ({len(self.data)} bytes)"
+
+
+class ServedQuestion(models.Model):
+    """
+    Index of which attempt served which question version, at what position.
+
+    Lets a regrade find every attempt that served a question with an index
+    range scan instead of decoding every attempt's JSON.
+    """
+    attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name='served')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='servings')
+    version = models.PositiveIntegerField()
+    position = models.SmallIntegerField()
+
+    class Meta:
+        unique_together = ('attempt', 'position')
+        indexes = [
+            models.Index(fields=['question', 'attempt']),
+        ]
+
+    def __str__(self):
+        return f"{self.attempt_id} #{self.position} -> {self.question_id} (v{self.version})"
+
+
+class RegradeJob(models.Model):
+    """Background job re-grading every attempt that served a question."""
+    STATUS_PENDING = 0
+    STATUS_RUNNING = 1
+    STATUS_DONE = 2
+    STATUS_FAILED = 3
+    # A newer job for the same question was queued before this one ran
+    STATUS_SUPERSEDED = 4
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_SUPERSEDED, 'Superseded'),
+    ]
+
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='regrade_jobs')
+    target_version = models.PositiveIntegerField()
+    correct_answer = models.CharField(max_length=1)
+    status = models.SmallIntegerField(default=STATUS_PENDING, choices=STATUS_CHOICES)
+
+    # Last processed attempt id; the job resumes after it
+    cursor = models.CharField(max_length=64, blank=True)
+    attempts_regraded = models.IntegerField(default=0)
+    answers_changed = models.IntegerField(default=0)
+    # Attempts still being taken in the current pass; the job runs another
+    # pass for them, not before retry_at
+    skipped = models.IntegerField(default=0)
+    retry_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Regrade {self.question_id} -> v{self.target_version} ({self.get_status_display()})"
+
+
+class ArchivedAttempt(models.Model):
+    """
+    A finished attempt moved out of ``QuizAttempt`` by ``archive_attempts``.
+
+    Keeps the columns used by results, history and exports. The compressed
+    ``questions`` / ``ai_meta`` bytes are copied over as they are, without
+    being decoded. The attempt keeps its id, so old links still resolve
+    (see ``archive.py``).
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_attempts')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='+')
+    subcategory = models.ForeignKey(SubCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    difficulty = models.CharField(max_length=10)
+    status = models.SmallIntegerField(choices=QuizAttempt.STATUS_CHOICES)
+
+    total_questions = models.SmallIntegerField(default=0)
+    correct_answers = models.SmallIntegerField(default=0)
+    attempted_questions = models.SmallIntegerField(default=0)
+    score = models.FloatField(default=0.0)
+    time_limit_seconds = models.IntegerField(default=600)
+    time_taken_seconds = models.IntegerField(default=0)
+
+    created_at = models.DateTimeField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    questions = CompressedJSONField(null=True, blank=True)
+    ai_meta = CompressedJSONField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'completed_at', 'id']),
+            models.Index(fields=['user', 'created_at', 'id']),
+            models.Index(fields=['user', 'started_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.difficulty} (archived)"
+
+
+class ArchivedRollup(models.Model):
+    """
+    Totals of archived attempts per user, topic, difficulty and status.
+
+    Written in the same transaction that moves attempts into the archive, so
+    the lifetime figures in ``analytics.UserSummary`` stay exact after the
+    rows leave ``QuizAttempt``.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_rollups')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='+')
+    subcategory = models.ForeignKey(SubCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    difficulty = models.CharField(max_length=10)
+    status = models.SmallIntegerField(choices=QuizAttempt.STATUS_CHOICES)
+
+    attempts = models.IntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    best_score = models.FloatField(default=0.0)
+    worst_score = models.FloatField(default=0.0)
+    correct = models.IntegerField(default=0)
+    attempted = models.IntegerField(default=0)
+    time_seconds = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'category', 'subcategory', 'difficulty', 'status')
+
+    def __str__(self):
+        return f"{self.user.username} - {self.subcategory_id} {self.difficulty} ({self.attempts})"
+
+
+class TaxonomyVersion(models.Model):
+    """
+    Single-row counter bumped whenever a Category, SubCategory or Concept
+    is saved or deleted (see signals.py). Cached copies of the taxonomy are
+    keyed on it (see taxonomy.py).
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"taxonomy v{self.version}"
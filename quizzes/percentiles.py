@@ -0,0 +1,171 @@
+# quizzes/percentiles.py
+"""
+Percentile ranks for quiz scores, answered from per-(subcategory, difficulty)
+score histograms instead of ORDER BY / COUNT queries over ``QuizAttempt``.
+
+The histograms are built in one pass with NumPy by the
+``build_score_distributions`` command and cached per process.
+
+Error bounds: scores fall in fixed-width bins over [0, 100]. A score's rank
+is exact when it sits on a bin edge (10-question quizzes score in steps of
+10, so any bin width dividing 10 is exact). Otherwise it is interpolated
+inside its bin, so the rank error is at most that bin's share of attempts
+(``ScoreSketch.max_rank_error``). ``QUIZ_PERCENTILE_BIN_WIDTH`` sets the bin
+width in score points.
+"""
+import math
+import time
+from bisect import bisect_right
+from itertools import accumulate
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import QuizAttempt, ScoreDistribution
+
+MAX_SCORE = 100.0
+
+# Cached sketches are reloaded after this many seconds
+SKETCH_TTL = 300
+
+# Below this many attempts a percentile is not meaningful
+MIN_ATTEMPTS = 10
+
+
+def get_bin_width():
+    return float(getattr(settings, 'QUIZ_PERCENTILE_BIN_WIDTH', 1.0))
+
+
+def bin_count(bin_width):
+    # One extra bin so a perfect score of 100 has a bin of its own
+    return int(math.ceil(MAX_SCORE / bin_width)) + 1
+
+
+class ScoreSketch:
+    """Histogram of scores with prefix sums for O(log bins) rank queries."""
+
+    def __init__(self, counts, bin_width):
+        self.counts = counts
+        self.bin_width = bin_width
+        self.cumulative = list(accumulate(counts))
+        self.total = self.cumulative[-1] if self.cumulative else 0
+        self.edges = [i * bin_width for i in range(len(counts))]
+
+    def percentile_rank(self, score):
+        """Percentage of attempts that scored strictly lower than ``score``."""
+        if not self.total:
+            return None
+
+        index = min(max(bisect_right(self.edges, score) - 1, 0), len(self.counts) - 1)
+        below = self.cumulative[index - 1] if index else 0
+        fraction = min(max((score - self.edges[index]) / self.bin_width, 0.0), 1.0)
+
+        return (below + self.counts[index] * fraction) / self.total * 100
+
+    @property
+    def max_rank_error(self):
+        """Worst-case percentile error (in percentage points) for off-edge scores."""
+        return max(self.counts) / self.total * 100 if self.total else 0.0
+
+
+def build_score_distributions(bin_width=None):
+    """
+    Rebuild every ``ScoreDistribution`` from completed attempts.
+
+    Scores are streamed once into NumPy arrays and binned for all groups
+    with a single ``np.bincount``. Returns ``(groups, max_rank_error)``.
+    """
+    bin_width = bin_width or get_bin_width()
+    n_bins = bin_count(bin_width)
+
+    rows = (
+        QuizAttempt.objects
+        .filter(status=QuizAttempt.STATUS_COMPLETED, subcategory__isnull=False)
+        .values_list('subcategory_id', 'difficulty', 'score')
+        .order_by()
+        .iterator(chunk_size=5000)
+    )
+
+    groups = {}
+    group_index, scores = [], []
+    for subcategory_id, difficulty, score in rows:
+        group_index.append(groups.setdefault((subcategory_id, difficulty), len(groups)))
+        scores.append(score)
+
+    now = timezone.now()
+    distributions = []
+    max_error = 0.0
+
+    if groups:
+        group_arr = np.asarray(group_index, dtype=np.int64)
+        bins = np.clip(
+            np.floor(np.asarray(scores, dtype=np.float64) / bin_width),
+            0, n_bins - 1
+        ).astype(np.int64)
+        counts = np.bincount(
+            group_arr * n_bins + bins, minlength=len(groups) * n_bins
+        ).reshape(len(groups), n_bins)
+
+        for (subcategory_id, difficulty), index in groups.items():
+            row = counts[index].tolist()
+            total = int(counts[index].sum())
+            max_error = max(max_error, max(row) / total * 100)
+            distributions.append(ScoreDistribution(
+                subcategory_id=subcategory_id,
+                difficulty=difficulty,
+                bin_width=bin_width,
+                counts=row,
+                total=total,
+                built_at=now,
+            ))
+
+    # Replaced wholesale in one transaction: MySQL cannot target an upsert
+    # at (subcategory, difficulty), and readers never see a partial set
+    with transaction.atomic():
+        ScoreDistribution.objects.all().delete()
+        ScoreDistribution.objects.bulk_create(distributions, batch_size=500)
+
+    invalidate_sketches()
+    return len(distributions), max_error
+
+
+# ============================================================
+# PROCESS-LOCAL CACHE
+# ============================================================
+_cache = {}
+_loaded_at = None
+
+
+def _load_sketches():
+    global _loaded_at
+    sketches = {}
+    for row in ScoreDistribution.objects.values_list('subcategory_id', 'difficulty', 'counts', 'bin_width'):
+        subcategory_id, difficulty, counts, bin_width = row
+        sketches[(subcategory_id, difficulty)] = ScoreSketch(counts, bin_width)
+    _cache.clear()
+    _cache.update(sketches)
+    _loaded_at = time.monotonic()
+
+
+def invalidate_sketches():
+    global _loaded_at
+    _loaded_at = None
+
+
+def get_sketch(subcategory_id, difficulty):
+    if _loaded_at is None or time.monotonic() - _loaded_at > SKETCH_TTL:
+        _load_sketches()
+    return _cache.get((subcategory_id, difficulty))
+
+
+def percentile_rank(subcategory_id, difficulty, score):
+    """
+    "Better than X%" for a score on a (subcategory, difficulty), or ``None``
+    when there is no sketch or too few attempts to be meaningful.
+    """
+    sketch = get_sketch(subcategory_id, difficulty)
+    if sketch is None or sketch.total < MIN_ATTEMPTS:
+        return None
+    return sketch.percentile_rank(score)
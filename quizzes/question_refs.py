@@ -0,0 +1,154 @@
+# quizzes/question_refs.py
+"""
+Attempts store references to versioned questions instead of full copies.
+
+Each served question is kept in the attempt as ``question_pk`` + ``version``
+plus the per-attempt answer state. The display text, options, answer key
+and explanation are resolved here through a process-local LRU cache keyed
+by ``(question_pk, version)``. A given version never changes, so cached
+entries never go stale. Misses cost one query for the current versions and
+one more only when an older version (``QuestionRevision``) is needed.
+
+Entries written before references were introduced still hold full copies;
+they are passed through unchanged.
+"""
+import threading
+from collections import OrderedDict
+
+from .models import Question, QuestionRevision, ServedQuestion
+
+# Resolved (question_pk, version) entries kept per process
+CACHE_SIZE = 10000
+
+REMOVED_QUESTION = '[This question has been removed]'
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def question_ref(question, number):
+    """Attempt entry for serving ``question`` as question ``number``."""
+    return {
+        'id': number,
+        'question_pk': question.pk,
+        'version': question.version,
+        'user_answer': None,
+        'is_correct': None,
+    }
+
+
+def record_served_questions(attempt):
+    """Index the questions ``attempt`` served (for regrades)."""
+    ServedQuestion.objects.bulk_create(
+        [
+            ServedQuestion(
+                attempt_id=attempt.pk,
+                question_id=q['question_pk'],
+                version=q.get('version', 1),
+                position=position,
+            )
+            for position, q in enumerate(attempt.questions or [])
+            if q.get('question_pk') is not None
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _content(row, concept_id):
+    return {
+        'question': row['question_text'],
+        'option_a': row['option_a'],
+        'option_b': row['option_b'],
+        'option_c': row['option_c'],
+        'option_d': row['option_d'],
+        'correct_answer': row['correct_answer'],
+        'explanation': row['explanation'],
+        'concept_id': concept_id,
+    }
+
+
+def _removed():
+    return {
+        'question': REMOVED_QUESTION,
+        'option_a': '', 'option_b': '', 'option_c': '', 'option_d': '',
+        'correct_answer': '', 'explanation': '', 'concept_id': None,
+    }
+
+
+def _load(keys):
+    """Fetch content for ``(question_pk, version)`` keys missing from the cache."""
+    found = {}
+    current = Question.objects.filter(pk__in={pk for pk, _ in keys}).values(
+        'pk', 'version', 'concept_id', *Question.CONTENT_FIELDS
+    )
+    concepts = {}
+    for row in current:
+        concepts[row['pk']] = row['concept_id']
+        if (row['pk'], row['version']) in keys:
+            found[(row['pk'], row['version'])] = _content(row, row['concept_id'])
+
+    older = [key for key in keys if key not in found]
+    if older:
+        revisions = QuestionRevision.objects.filter(
+            question_id__in={pk for pk, _ in older},
+            version__in={version for _, version in older},
+        ).values('question_id', 'version', *Question.CONTENT_FIELDS)
+        for row in revisions:
+            key = (row['question_id'], row['version'])
+            if key in keys:
+                found[key] = _content(row, concepts.get(row['question_id']))
+
+    return found
+
+
+def resolve(keys):
+    """Content dicts for ``(question_pk, version)`` keys, cached per process."""
+    keys = set(keys)
+    resolved = {}
+    with _lock:
+        for key in keys:
+            if key in _cache:
+                _cache.move_to_end(key)
+                resolved[key] = _cache[key]
+
+    missing = keys - resolved.keys()
+    if missing:
+        loaded = _load(missing)
+        with _lock:
+            for key, content in loaded.items():
+                _cache[key] = content
+                _cache.move_to_end(key)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+        resolved.update(loaded)
+
+    return resolved
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+def hydrate_questions(entries):
+    """
+    Merge resolved content into attempt entries.
+
+    Returns new dicts and leaves ``entries`` untouched. Full-copy entries
+    are returned as copies.
+    """
+    keys = [
+        (q['question_pk'], q['version'])
+        for q in entries
+        if 'question' not in q and q.get('question_pk') is not None
+    ]
+    resolved = resolve(keys) if keys else {}
+
+    hydrated = []
+    for q in entries:
+        if 'question' in q:
+            hydrated.append(dict(q))
+            continue
+        content = resolved.get((q.get('question_pk'), q.get('version'))) or _removed()
+        hydrated.append({**content, **q})
+    return hydrated
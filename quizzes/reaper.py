@@ -0,0 +1,154 @@
+# quizzes/reaper.py
+"""
+Closing attempts nobody will come back to.
+
+Two kinds of attempts stay open forever unless something closes them:
+
+- ``GENERATING`` attempts whose generation died with its worker (no live
+  claim, see generation.py) or whose page was closed before generating:
+  after ``QUIZ_REAP_GENERATING_AFTER_MINUTES`` they are abandoned;
+- ``IN_PROGRESS`` attempts whose time ran out while nobody was on the page
+  (``QUIZ_REAP_GRACE_SECONDS`` past the limit): they are finalized with the
+  same grading as ``finalize_quiz_attempt``, exactly as if the timer had
+  expired in the browser. Attempts left paused with time on the clock are
+  abandoned after ``QUIZ_REAP_PAUSED_AFTER_DAYS``, like a quit.
+
+Both are found through the ``status`` index, in primary-key order and
+bounded batches, so a run only reads open attempts and never the table of
+finished ones. Each change is conditional on the row still being in the
+state that was read: an attempt resumed, claimed, quit or finished in the
+meantime is left alone. Expired attempts are finalized with the version
+check answers use (answering.py).
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import timing
+from .answering import AnswerConflict
+from .models import QuizAttempt
+from .write_buffer import apply_buffered, mark_flushed
+
+REAP_BATCH_SIZE = 200
+
+DEFAULT_GENERATING_AFTER_MINUTES = 30
+DEFAULT_GRACE_SECONDS = 300
+DEFAULT_PAUSED_AFTER_DAYS = 7
+
+
+def generating_cutoff(now):
+    minutes = getattr(settings, 'QUIZ_REAP_GENERATING_AFTER_MINUTES', DEFAULT_GENERATING_AFTER_MINUTES)
+    return now - timedelta(minutes=minutes)
+
+
+def grace_seconds():
+    return getattr(settings, 'QUIZ_REAP_GRACE_SECONDS', DEFAULT_GRACE_SECONDS)
+
+
+def paused_cutoff(now):
+    days = getattr(settings, 'QUIZ_REAP_PAUSED_AFTER_DAYS', DEFAULT_PAUSED_AFTER_DAYS)
+    return now - timedelta(days=days)
+
+
+def _batches(queryset, batch_size):
+    """Keyset pages of ``queryset`` in primary-key order."""
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(page.order_by('pk')[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+        if len(batch) < batch_size:
+            return
+
+
+def _abandon_generating(pks, now):
+    """Abandon unclaimed, stale GENERATING attempts among ``pks`` (one UPDATE)."""
+    return QuizAttempt.objects.filter(
+        Q(generation_lease_until__isnull=True) | Q(generation_lease_until__lt=now),
+        pk__in=pks,
+        status=QuizAttempt.STATUS_GENERATING,
+        created_at__lt=generating_cutoff(now),
+    ).update(
+        status=QuizAttempt.STATUS_ABANDONED,
+        completed_at=now,
+        generation_token=None,
+        generation_lease_until=None,
+        updated_at=now,
+    )
+
+
+def _abandon_paused(attempt, now):
+    """Abandon a paused attempt, unless it was resumed since it was read."""
+    abandoned = QuizAttempt.objects.filter(
+        pk=attempt.pk,
+        status=QuizAttempt.STATUS_IN_PROGRESS,
+        resumed_at__isnull=True,
+        paused_at=attempt.paused_at,
+    ).update(status=QuizAttempt.STATUS_ABANDONED, completed_at=now, updated_at=now)
+    if abandoned:
+        mark_flushed(attempt)
+    return bool(abandoned)
+
+
+def reap_attempt(attempt, now=None):
+    """
+    Close one IN_PROGRESS ``attempt`` if it is stale. Returns
+    ``'finalized'``, ``'abandoned'`` or ``None`` (left open).
+    """
+    from .views import finalize_quiz_attempt
+
+    now = now or timezone.now()
+    apply_buffered(attempt)
+    if attempt.status != QuizAttempt.STATUS_IN_PROGRESS:
+        return None
+
+    if timing.is_expired(attempt, now, grace=grace_seconds()):
+        # Versioned like an answer: a quit or finish since the read wins
+        try:
+            finalized = finalize_quiz_attempt(attempt)
+        except AnswerConflict:
+            finalized = False
+        return 'finalized' if finalized else None
+
+    idle_since = attempt.paused_at or attempt.updated_at
+    if not timing.is_running(attempt) and idle_since < paused_cutoff(now):
+        return 'abandoned' if _abandon_paused(attempt, now) else None
+    return None
+
+
+def reap(batch_size=REAP_BATCH_SIZE, max_batches=None, progress=None):
+    """
+    One pass over the open attempts. Returns a ``Counter`` with the number
+    of attempts ``checked``, ``generating_abandoned``, ``finalized`` and
+    ``abandoned``, and the ``batches`` read.
+    """
+    now = timezone.now()
+    counts = Counter()
+
+    pending = QuizAttempt.objects.filter(
+        status=QuizAttempt.STATUS_GENERATING, created_at__lt=generating_cutoff(now),
+    ).only('pk')
+    open_attempts = QuizAttempt.objects.slim().filter(status=QuizAttempt.STATUS_IN_PROGRESS)
+
+    for queryset, generating in ((pending, True), (open_attempts, False)):
+        for batch in _batches(queryset, batch_size):
+            counts['batches'] += 1
+            counts['checked'] += len(batch)
+            if generating:
+                counts['generating_abandoned'] += _abandon_generating([a.pk for a in batch], now)
+            else:
+                for attempt in batch:
+                    action = reap_attempt(attempt, now)
+                    if action:
+                        counts[action] += 1
+            if progress:
+                progress(counts)
+            if max_batches and counts['batches'] >= max_batches:
+                return counts
+    return counts
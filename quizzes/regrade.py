@@ -0,0 +1,247 @@
+# quizzes/regrade.py
+"""
+Re-grading attempts after a question's answer key is corrected.
+
+A ``RegradeJob`` points every attempt that served the question at the
+corrected version and re-grades that answer. Affected attempts come from
+the ``ServedQuestion`` index (a range scan on ``(question, attempt)``), not
+from a scan of attempt JSON. They are processed in keyset batches; each
+batch is one transaction that:
+
+- rewrites the attempts' entries, scores and ``correct_answers``,
+- marks their ``ServedQuestion`` rows with the new version,
+- folds the grade changes into ``DailyPerformance`` and ``ConceptMastery``
+  with one ``F()`` update per affected user/day and user/concept,
+- advances the job's cursor.
+
+An interrupted job resumes after its last committed batch. Attempts still
+being taken are skipped and counted. A pass that skipped any puts the job
+back in the queue with its cursor reset, to be claimed again after
+``REGRADE_RETRY_DELAY``; the next pass only reads the index rows still on
+the old version, i.e. those attempts. The job is done once a pass skips
+nothing. Open attempts do not stay open forever (see reaper.py), so it
+always gets there.
+
+Jobs only ever move attempts forward: a job touches index rows on a version
+older than its own, so a later correction is never undone by an earlier
+job's retry. Queuing a job supersedes the question's pending ones; the new
+job covers their attempts too.
+
+Percentile histograms and item statistics pick the change up on their next
+scheduled rebuild; the leaderboard reads scores directly.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .analytics import _rollup_date, apply_regrade_deltas
+from .models import Question, QuizAttempt, RegradeJob, ServedQuestion
+
+REGRADE_BATCH_SIZE = 1000
+
+# A running job not updated for this long is assumed dead and re-claimed
+REGRADE_LEASE = timedelta(minutes=10)
+
+# Wait between passes of a job that is waiting for attempts in progress
+REGRADE_RETRY_DELAY = timedelta(minutes=5)
+
+FINISHED = (QuizAttempt.STATUS_COMPLETED, QuizAttempt.STATUS_ABANDONED)
+
+
+def queue_regrade(question):
+    """
+    Queue a regrade of every attempt that served ``question``, superseding
+    the pending jobs for its earlier versions.
+    """
+    with transaction.atomic():
+        RegradeJob.objects.filter(
+            question=question,
+            status=RegradeJob.STATUS_PENDING,
+            target_version__lt=question.version,
+        ).update(status=RegradeJob.STATUS_SUPERSEDED, retry_at=None, updated_at=timezone.now())
+        return RegradeJob.objects.create(
+            question=question,
+            target_version=question.version,
+            correct_answer=question.correct_answer,
+        )
+
+
+def claim_next_job():
+    """Claim the oldest pending (or abandoned running) job, or return ``None``."""
+    now = timezone.now()
+    candidates = RegradeJob.objects.filter(
+        Q(status=RegradeJob.STATUS_PENDING, retry_at__isnull=True)
+        | Q(status=RegradeJob.STATUS_PENDING, retry_at__lte=now)
+        | Q(status=RegradeJob.STATUS_RUNNING, updated_at__lt=now - REGRADE_LEASE)
+    ).order_by('created_at').values_list('pk', 'status', 'updated_at')[:10]
+
+    for pk, status, updated_at in candidates:
+        claimed = RegradeJob.objects.filter(
+            pk=pk, status=status, updated_at=updated_at
+        ).update(status=RegradeJob.STATUS_RUNNING, started_at=now, updated_at=now)
+        if claimed:
+            return RegradeJob.objects.get(pk=pk)
+    return None
+
+
+def _regrade_entry(entry, job):
+    """The entry re-pointed at the job's version, and its old/new grade."""
+    answer = entry.get('user_answer')
+    was_correct = entry.get('is_correct') is True
+    is_correct = answer == job.correct_answer if answer is not None else None
+    regraded = {
+        'id': entry.get('id'),
+        'question_pk': job.question_id,
+        'version': job.target_version,
+        'user_answer': answer,
+        'is_correct': is_correct,
+    }
+    return regraded, was_correct, is_correct is True
+
+
+def regrade_batch(job, batch_size=REGRADE_BATCH_SIZE):
+    """
+    Process the next batch of ``job``. Returns the number of attempts seen
+    (0 when the job is finished).
+    """
+    served = ServedQuestion.objects.filter(
+        question_id=job.question_id, version__lt=job.target_version
+    )
+    if job.cursor:
+        served = served.filter(attempt_id__gt=job.cursor)
+
+    rows = list(
+        served.order_by('attempt_id', 'position')
+        .values_list('attempt_id', 'position')[:batch_size]
+    )
+    if not rows:
+        return 0
+
+    positions = {}
+    for attempt_id, position in rows:
+        positions.setdefault(attempt_id, []).append(position)
+
+    concept_id = (
+        Question.objects.filter(pk=job.question_id).values_list('concept_id', flat=True).first()
+    )
+    now = timezone.now()
+
+    with transaction.atomic():
+        attempts = list(
+            QuizAttempt.objects
+            .filter(pk__in=positions.keys())
+            .only('pk', 'user_id', 'status', 'questions', 'total_questions',
+                  'correct_answers', 'score', 'completed_at')
+            .select_for_update()
+        )
+        # A newer job may have moved some of them on since the rows were read
+        stale = set(
+            ServedQuestion.objects
+            .filter(question_id=job.question_id, version__lt=job.target_version,
+                    attempt_id__in=positions.keys())
+            .values_list('attempt_id', flat=True)
+        )
+
+        changed, regraded_ids = [], []
+        daily, concepts = {}, {}
+        skipped = answers_changed = 0
+
+        for attempt in attempts:
+            if attempt.pk not in stale:
+                continue
+            if attempt.status not in FINISHED:
+                skipped += 1
+                continue
+
+            questions = attempt.questions or []
+            delta = 0
+            for position in positions[attempt.pk]:
+                if position >= len(questions):
+                    continue
+                entry, was_correct, is_correct = _regrade_entry(questions[position], job)
+                questions[position] = entry
+                delta += int(is_correct) - int(was_correct)
+
+            attempt.questions = questions
+            regraded_ids.append(attempt.pk)
+            changed.append(attempt)
+
+            if not delta:
+                continue
+            answers_changed += abs(delta)
+
+            key = (attempt.user_id, concept_id)
+            concepts[key] = concepts.get(key, 0) + delta
+
+            if attempt.status == QuizAttempt.STATUS_COMPLETED:
+                old_score = attempt.score
+                attempt.correct_answers += delta
+                attempt.score = (
+                    attempt.correct_answers / attempt.total_questions * 100
+                    if attempt.total_questions else 0
+                )
+                if attempt.completed_at:
+                    day = (attempt.user_id, _rollup_date(attempt))
+                    d_score, d_correct = daily.get(day, (0, 0))
+                    daily[day] = (d_score + attempt.score - old_score, d_correct + delta)
+
+        # One small UPDATE per attempt: much cheaper to build than a
+        # bulk_update CASE over a thousand rows. updated_at is set explicitly
+        # because update() does not apply auto_now.
+        for attempt in changed:
+            QuizAttempt.objects.filter(pk=attempt.pk).update(
+                questions=attempt.questions,
+                correct_answers=attempt.correct_answers,
+                score=attempt.score,
+                version=F('version') + 1,
+                updated_at=now,
+            )
+        ServedQuestion.objects.filter(
+            question_id=job.question_id, attempt_id__in=regraded_ids
+        ).update(version=job.target_version)
+        apply_regrade_deltas(daily, concepts)
+
+        job.cursor = str(rows[-1][0])
+        job.attempts_regraded += len(regraded_ids)
+        job.answers_changed += answers_changed
+        job.skipped += skipped
+        job.save(update_fields=[
+            'cursor', 'attempts_regraded', 'answers_changed', 'skipped', 'updated_at',
+        ])
+
+    return len(positions)
+
+
+def run_job(job, batch_size=REGRADE_BATCH_SIZE, progress=None):
+    """
+    Run one pass of ``job``, committing one batch at a time. Returns the
+    job: done, or pending again if the pass skipped attempts in progress.
+    """
+    if not job.cursor:
+        # A new pass
+        job.skipped = 0
+    try:
+        while regrade_batch(job, batch_size):
+            if progress:
+                progress(job)
+    except Exception as e:
+        job.status = RegradeJob.STATUS_FAILED
+        job.error = str(e)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        raise
+
+    if job.skipped:
+        # Come back for the attempts that were still being taken
+        job.status = RegradeJob.STATUS_PENDING
+        job.cursor = ''
+        job.retry_at = timezone.now() + REGRADE_RETRY_DELAY
+        job.save(update_fields=['status', 'cursor', 'retry_at', 'updated_at'])
+        return job
+
+    job.status = RegradeJob.STATUS_DONE
+    job.retry_at = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'retry_at', 'finished_at', 'updated_at'])
+    return job
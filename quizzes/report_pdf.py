@@ -0,0 +1,121 @@
+# quizzes/report_pdf.py
+"""
+ReportLab rendering of the performance report.
+
+This module deliberately imports nothing from Django so the renderer can run
+inside worker processes (see ``quizzes.reports``) without setting Django up.
+``data`` is the plain dict produced by ``reports.build_report_data``.
+"""
+from io import BytesIO
+
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+)
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+
+
+def render_performance_report(data):
+    """Render the performance report for ``data`` and return the PDF bytes."""
+    buffer = BytesIO()
+
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=36,
+        leftMargin=36,
+        topMargin=36,
+        bottomMargin=36
+    )
+
+    styles = getSampleStyleSheet()
+    elements = []
+
+    # ---------------- HEADER ----------------
+    title_style = ParagraphStyle(
+        name="TitleStyle",
+        fontSize=20,
+        alignment=1,
+        spaceAfter=10,
+        textColor=colors.HexColor("#1f2937")
+    )
+
+    subtitle_style = ParagraphStyle(
+        name="SubtitleStyle",
+        fontSize=12,
+        alignment=1,
+        spaceAfter=20,
+        textColor=colors.grey
+    )
+
+    elements.append(Paragraph("AI Quiz Hub", title_style))
+    elements.append(Paragraph("Performance Report", subtitle_style))
+
+    # ---------------- USER INFO ----------------
+    elements.append(Spacer(1, 10))
+    elements.append(Paragraph("<b>User Information</b>", styles['Heading2']))
+    elements.append(Spacer(1, 6))
+
+    elements.append(Paragraph(
+        f"<b>Username:</b> {data['username']}", styles['Normal']
+    ))
+    elements.append(Paragraph(
+        f"<b>Generated on:</b> {data['generated_on']}", styles['Normal']
+    ))
+
+    elements.append(Spacer(1, 16))
+
+    # ---------------- SUMMARY ----------------
+    elements.append(Paragraph("<b>Performance Summary</b>", styles['Heading2']))
+    elements.append(Spacer(1, 8))
+
+    summary_table = Table([
+        ["Total Quizzes Attempted", data['total_quizzes']],
+        ["Average Score", f"{data['avg_score']} %"],
+        ["Overall Accuracy", f"{data['overall_accuracy']} %"],
+    ], colWidths=[250, 150])
+
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.whitesmoke),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+        ('FONT', (0,0), (-1,-1), 'Helvetica'),
+        ('ALIGN', (1,0), (1,-1), 'RIGHT'),
+        ('PADDING', (0,0), (-1,-1), 8),
+    ]))
+
+    elements.append(summary_table)
+    elements.append(Spacer(1, 20))
+
+    # ---------------- TOPIC TABLE ----------------
+    elements.append(Paragraph("<b>Topic-wise Accuracy</b>", styles['Heading2']))
+    elements.append(Spacer(1, 8))
+
+    topic_data = [["Topic", "Accuracy (%)"]]
+    topic_data.extend([topic, accuracy] for topic, accuracy in data['topics'])
+
+    topic_table = Table(topic_data, colWidths=[300, 100])
+    topic_table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#e5e7eb")),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+        ('ALIGN', (1,1), (1,-1), 'RIGHT'),
+        ('FONT', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('PADDING', (0,0), (-1,-1), 8),
+    ]))
+
+    elements.append(topic_table)
+
+    # ---------------- FOOTER ----------------
+    elements.append(Spacer(1, 30))
+    elements.append(Paragraph(
+        "This report is generated automatically by AI Quiz Hub.",
+        ParagraphStyle(
+            name="Footer",
+            fontSize=9,
+            alignment=1,
+            textColor=colors.grey
+        )
+    ))
+
+    doc.build(elements)
+    return buffer.getvalue()
@@ -0,0 +1,329 @@
+# quizzes/reports.py
+"""
+Background rendering and cached serving of performance PDF reports.
+
+The PDF is rendered in a small, low-priority process pool so ReportLab's CPU
+work never runs inside a request thread. The result is stored through the
+default storage, keyed by a hash of the report data, and served with
+``ETag`` / ``Last-Modified`` and byte-range support. A new render is only
+queued when the user's stats (and so the key) change.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import ArchivedRollup, PerformanceReport, QuizAttempt
+from .report_pdf import render_performance_report
+
+REPORT_FILENAME = "AI_Quiz_Hub_Performance_Report.pdf"
+
+# A render still pending after this long is assumed lost and re-queued
+RENDER_TIMEOUT = timedelta(minutes=5)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _report_data(username, total_quizzes, avg_score, correct, attempted, topics):
+    return {
+        'username': username,
+        'total_quizzes': total_quizzes,
+        'avg_score': round(avg_score or 0, 2),
+        'overall_accuracy': round((correct / attempted) * 100 if attempted else 0, 2),
+        'topics': sorted(topics),
+    }
+
+
+def build_report_data(user, summary):
+    """Plain, picklable snapshot of everything the PDF shows (except the date)."""
+    overall = summary.overall
+    return _report_data(
+        user.username,
+        overall['total_completed'],
+        overall['avg_score'],
+        overall['total_correct'],
+        overall['total_questions_attempted'],
+        [
+            [s['subcategory'], s['accuracy']]
+            for s in summary.subcategories
+            if s['attempted']
+        ],
+    )
+
+
+def build_report_data_bulk(users):
+    """
+    ``build_report_data`` for many users at once.
+
+    Uses two grouped queries for the whole batch, plus one for archived
+    totals, instead of a summary per user. Returns a list of
+    ``(user, data)`` in the order of ``users``.
+    """
+    users = list(users)
+    completed = QuizAttempt.objects.filter(
+        user__in=users,
+        status=QuizAttempt.STATUS_COMPLETED
+    )
+
+    overall = {
+        row['user_id']: row
+        for row in completed.values('user_id').annotate(
+            total_quizzes=Count('id'),
+            score_sum=Sum('score'),
+            correct=Sum('correct_answers'),
+            attempted=Sum('attempted_questions'),
+        ).order_by()
+    }
+
+    topics = {}
+    topic_rows = list(
+        completed
+        .exclude(subcategory__isnull=True)
+        .values('user_id', 'subcategory__name')
+        .annotate(correct=Sum('correct_answers'), attempted=Sum('attempted_questions'))
+        .order_by()
+    )
+
+    # Fold in attempts that have been moved to the archive
+    archived = ArchivedRollup.objects.filter(
+        user__in=users, status=QuizAttempt.STATUS_COMPLETED
+    ).values('user_id', 'subcategory__name', 'attempts', 'score_sum', 'correct', 'attempted')
+    for row in archived:
+        totals = overall.setdefault(row['user_id'], {
+            'total_quizzes': 0, 'score_sum': 0.0, 'correct': 0, 'attempted': 0,
+        })
+        totals['total_quizzes'] += row['attempts']
+        totals['score_sum'] = (totals['score_sum'] or 0) + row['score_sum']
+        totals['correct'] = (totals['correct'] or 0) + row['correct']
+        totals['attempted'] = (totals['attempted'] or 0) + row['attempted']
+        if row['subcategory__name'] is not None:
+            topic_rows.append(row)
+
+    for row in topic_rows:
+        entry = topics.setdefault(row['user_id'], {}).setdefault(row['subcategory__name'], [0, 0])
+        entry[0] += row['correct'] or 0
+        entry[1] += row['attempted'] or 0
+
+    results = []
+    for user in users:
+        row = overall.get(user.pk, {})
+        total_quizzes = row.get('total_quizzes', 0)
+        results.append((user, _report_data(
+            user.username,
+            total_quizzes,
+            row['score_sum'] / total_quizzes if total_quizzes else None,
+            row.get('correct') or 0,
+            row.get('attempted') or 0,
+            [
+                [name, round((correct / attempted) * 100, 2)]
+                for name, (correct, attempted) in topics.get(user.pk, {}).items()
+                if attempted
+            ],
+        )))
+    return results
+
+
+def report_stats_key(data):
+    """Stable hash of the report data; changes whenever the stats change."""
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def with_generated_on(data):
+    return dict(data, generated_on=timezone.now().strftime('%d %b %Y'))
+
+
+# ============================================================
+# BACKGROUND RENDERING
+# ============================================================
+def _lower_priority():
+    if hasattr(os, 'nice'):
+        os.nice(10)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'QUIZ_REPORT_WORKERS', 1),
+                initializer=_lower_priority,
+            )
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def request_report(user, data, stats_key):
+    """
+    Queue a background render of ``data`` unless one is already in flight.
+
+    The claim is a compare-and-set on the report row, so concurrent clicks
+    queue a single render.
+    """
+    now = timezone.now()
+    report, _ = PerformanceReport.objects.get_or_create(user=user)
+
+    claimed = PerformanceReport.objects.filter(pk=report.pk).filter(
+        ~Q(pending_key=stats_key)
+        | ~Q(status=PerformanceReport.STATUS_PENDING)
+        | Q(requested_at__isnull=True)
+        | Q(requested_at__lt=now - RENDER_TIMEOUT)
+    ).update(
+        status=PerformanceReport.STATUS_PENDING,
+        pending_key=stats_key,
+        requested_at=now,
+    )
+
+    if claimed:
+        try:
+            future = get_executor().submit(render_performance_report, with_generated_on(data))
+        except RuntimeError:
+            # Pool was shut down or broken by a crashed worker; start a new one
+            _reset_executor()
+            future = get_executor().submit(render_performance_report, with_generated_on(data))
+        future.add_done_callback(partial(_store_rendered_report, report.pk, stats_key))
+
+    report.refresh_from_db()
+    return report
+
+
+def _store_rendered_report(report_id, stats_key, future):
+    """Done-callback: persist the rendered PDF (runs on the pool's thread)."""
+    try:
+        try:
+            pdf = future.result()
+        except Exception:
+            PerformanceReport.objects.filter(
+                pk=report_id, pending_key=stats_key
+            ).update(status=PerformanceReport.STATUS_FAILED)
+            return
+
+        store_report(report_id, stats_key, pdf)
+    finally:
+        connection.close()
+
+
+def store_report(report_id, stats_key, pdf):
+    """Save ``pdf`` for the report and swap it in if it is still wanted."""
+    name = default_storage.save(f'reports/{report_id}/{stats_key}.pdf', ContentFile(pdf))
+    previous = (
+        PerformanceReport.objects
+        .filter(pk=report_id)
+        .values_list('file', flat=True)
+        .first()
+    )
+
+    updated = PerformanceReport.objects.filter(
+        pk=report_id, pending_key=stats_key
+    ).update(
+        status=PerformanceReport.STATUS_READY,
+        stats_key=stats_key,
+        file=name,
+        size=len(pdf),
+        generated_at=timezone.now(),
+    )
+
+    if not updated:
+        # A newer render was requested meanwhile; drop this one
+        default_storage.delete(name)
+    elif previous and previous != name:
+        default_storage.delete(previous)
+
+
+# ============================================================
+# SERVING
+# ============================================================
+def _requested_range(request, etag, size):
+    """
+    Parse a single-range ``Range`` header.
+
+    Returns ``(start, end)`` (inclusive), ``None`` to send the whole file, or
+    ``False`` when the range cannot be satisfied.
+    """
+    header = request.META.get('HTTP_RANGE', '').strip()
+    if not header:
+        return None
+
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag:
+        return None
+
+    match = RANGE_RE.match(header)
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def serve_report(request, report):
+    """Serve the stored PDF with validators and byte-range support."""
+    etag = f'"{report.stats_key}"'
+    last_modified = int(report.generated_at.timestamp())
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    size = report.size or report.file.size
+    byte_range = _requested_range(request, etag, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(
+            report.file.open('rb'),
+            content_type='application/pdf',
+            as_attachment=True,
+            filename=REPORT_FILENAME,
+        )
+    else:
+        start, end = byte_range
+        with report.file.open('rb') as fh:
+            fh.seek(start)
+            chunk = fh.read(end - start + 1)
+        response = HttpResponse(chunk, status=206, content_type='application/pdf')
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = f'attachment; filename="{REPORT_FILENAME}"'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, no-cache'
+    return response
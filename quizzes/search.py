@@ -0,0 +1,270 @@
+# quizzes/search.py
+"""
+Searching the taxonomy as the user types.
+
+Every Category name, SubCategory name and description, and Concept name
+becomes an ``Entry``. A concept lands on its topic at the concept's
+difficulty ("deadlock" -> Operating Systems / medium), so the same name
+at two difficulties gives two entries. Two indexes are built over them:
+
+- a prefix index: the sorted list of every distinct word with, for each
+  word, the entries containing it. The words starting with what was typed
+  are one contiguous slice of that list, found by bisection. Every word of
+  the query must start some word of an entry ("oper sys" finds
+  "Operating Systems");
+- a trigram index over names: the entries containing each three-letter
+  sequence. It catches typos ("dedlock") when prefixes find too little,
+  scoring entries by the share of the query's trigrams they contain.
+
+The index lives in process memory, next to the taxonomy snapshot it is
+built from (taxonomy.py), and is rebuilt by the first search after the
+taxonomy version changes. ``benchmark_search`` measures it on a synthetic
+taxonomy of any size.
+"""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict, namedtuple
+from heapq import nsmallest
+
+from django.urls import reverse
+
+from .taxonomy import snapshot
+
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 25
+
+# Entries ranked for one query at most; the prefix slice is walked in
+# alphabetical order, so exact words come first
+MAX_CANDIDATES = 1000
+# Trigram matches need at least this share of the query's trigrams
+MIN_SIMILARITY = 0.5
+# Trigrams in more than this share of all entries (and more than
+# COMMON_TRIGRAM_FLOOR entries) say little and are not counted
+MAX_TRIGRAM_SHARE = 0.05
+COMMON_TRIGRAM_FLOOR = 500
+MAX_QUERY_WORDS = 6
+
+# Broader results first among equally good matches
+KIND_ORDER = {'category': 0, 'subcategory': 1, 'concept': 2}
+
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+
+
+# kind is 'category', 'subcategory' or 'concept'; path names the nodes
+# above the entry ("Academics › Engineering › CSE"); trail holds the
+# subcategory ids from the top of the tree down to it; key and words are
+# the normalized name and its words, extra the words of the description
+Entry = namedtuple('Entry', [
+    'kind', 'pk', 'name', 'path', 'category_id', 'trail', 'leaf', 'difficulty', 'key', 'words', 'extra',
+], defaults=[()])
+
+
+def normalize(text):
+    """Lowercase ASCII words separated by single spaces."""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode()
+    return _NON_WORD_RE.sub(' ', text.lower()).strip()
+
+
+def trigrams(key):
+    """Trigrams of a normalized string, each word padded with spaces."""
+    padded = f' {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ============================================================
+# INDEX
+# ============================================================
+class SearchIndex:
+    """
+    Prefix and trigram indexes over a list of entries.
+
+    Entries are kept in the order they rank in among equally good matches
+    (broader kinds, then shorter names first), so an entry's position is
+    its tie-break and every posting list runs from best to worst.
+    """
+
+    def __init__(self, entries, version=None):
+        self.version = version
+        self.entries = sorted(entries, key=lambda entry: (KIND_ORDER[entry.kind], len(entry.name), entry.name))
+        # ' name words' and ' name words description words': a word of the
+        # entry starts with ``token`` if ' ' + token is in them
+        self.names = [f' {entry.key}' for entry in self.entries]
+        self.texts = [f' {entry.key} {" ".join(entry.extra)}' for entry in self.entries]
+
+        postings = defaultdict(list)
+        grams = defaultdict(list)
+        for i, entry in enumerate(self.entries):
+            for word in set(entry.words + entry.extra):
+                postings[word].append(i)
+            for gram in trigrams(entry.key):
+                grams[gram].append(i)
+
+        self.words = sorted(postings)
+        self.postings = [tuple(postings[word]) for word in self.words]
+
+        common = max(MAX_TRIGRAM_SHARE * len(self.entries), COMMON_TRIGRAM_FLOOR)
+        self.trigrams = {gram: tuple(ids) for gram, ids in grams.items() if len(ids) <= common}
+
+    @classmethod
+    def from_taxonomy(cls, taxonomy):
+        return cls(taxonomy_entries(taxonomy), version=taxonomy.version)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """The best ``limit`` entries for ``query``, best first."""
+        key = normalize(query)
+        tokens = key.split()[:MAX_QUERY_WORDS]
+        if not tokens or limit <= 0:
+            return []
+
+        found = self._prefix_matches(key, tokens, limit)
+        if len(found) < limit and len(key) >= 3:
+            seen = set(found)
+            found += [i for i in self._similar(key, limit) if i not in seen][:limit - len(found)]
+        return [self.entries[i] for i in found]
+
+    def _slice(self, token):
+        """Positions in ``self.words`` of the words starting with ``token``."""
+        start = bisect_left(self.words, token)
+        return start, bisect_left(self.words, token + '~', start)   # '~' sorts after [a-z0-9]
+
+    def _slice_size(self, start, stop, bound):
+        """Entries under the words ``start:stop``, counted up to ``bound``."""
+        size = 0
+        for position in range(start, stop):
+            size += len(self.postings[position])
+            if size > bound:
+                break
+        return size
+
+    def _prefix_matches(self, key, tokens, limit):
+        # Collect candidates through the most selective word typed, then keep
+        # those in which every other word starts some word too
+        slices = [self._slice(token) for token in tokens]
+        anchor, bound = 0, MAX_CANDIDATES
+        for n, (start, stop) in enumerate(slices):
+            size = self._slice_size(start, stop, bound)
+            if size < bound or n == 0:
+                anchor, bound = n, size
+
+        candidates = set()
+        start, stop = slices[anchor]
+        for position in range(start, stop):
+            room = MAX_CANDIDATES - len(candidates)
+            if room <= 0:
+                break
+            candidates.update(self.postings[position][:room])
+
+        needles = [f' {token}' for token in tokens]
+        others = needles[:anchor] + needles[anchor + 1:]
+        texts, names = self.texts, self.names
+        if others:
+            candidates = [i for i in candidates if all(needle in texts[i] for needle in others)]
+
+        # Whole name starts with the query, then every word matched in the
+        # name, then matches through the description
+        phrase = f' {key}'
+        tiers = ([], [], [])
+        for i in candidates:
+            name = names[i]
+            if name.startswith(phrase):
+                tiers[0].append(i)
+            elif all(needle in name for needle in needles):
+                tiers[1].append(i)
+            else:
+                tiers[2].append(i)
+
+        found = []
+        for tier in tiers:
+            found += nsmallest(limit - len(found), tier)
+            if len(found) >= limit:
+                break
+        return found
+
+    def _similar(self, key, limit):
+        wanted = trigrams(key)
+        counts = Counter()
+        for gram in wanted:
+            counts.update(self.trigrams.get(gram, ()))
+
+        needed = MIN_SIMILARITY * len(wanted)
+        similar = [i for i, shared in counts.items() if shared >= needed]
+        return nsmallest(limit, similar, key=lambda i: (-counts[i], i))
+
+
+def taxonomy_entries(taxonomy):
+    """The entries of a ``TaxonomySnapshot``."""
+    trails = {}
+    for sub in taxonomy.subcategories.values():
+        trails[sub.pk] = taxonomy.breadcrumb(sub)
+
+    for category in taxonomy.categories:
+        key = normalize(category.name)
+        yield Entry('category', category.pk, category.name, '', category.pk, (), False, None,
+                    key, tuple(key.split()))
+
+    for sub in taxonomy.subcategories.values():
+        chain = trails[sub.pk]
+        path = ' › '.join([sub.category.name] + [node.name for node in chain[:-1]])
+        key = normalize(sub.name)
+        trail = tuple(node.pk for node in chain)
+        yield Entry('subcategory', sub.pk, sub.name, path, sub.category_id, trail, sub.is_leaf, None,
+                    key, tuple(key.split()), tuple(normalize(sub.description).split()))
+
+    for (subcategory_id, difficulty), concepts in taxonomy.concepts.items():
+        sub = taxonomy.subcategories.get(subcategory_id)
+        if sub is None:
+            continue
+        chain = trails[sub.pk]
+        path = ' › '.join([sub.category.name] + [node.name for node in chain])
+        trail = tuple(node.pk for node in chain)
+        for pk, name in concepts:
+            key = normalize(name)
+            yield Entry('concept', pk, name, path, sub.category_id, trail, sub.is_leaf, difficulty,
+                        key, tuple(key.split()))
+
+
+_index = None
+_build_lock = threading.Lock()
+
+
+def search_index():
+    """The index of the current taxonomy, rebuilt when its version changes."""
+    global _index
+    taxonomy = snapshot()
+    current = _index
+    if current is None or current.version != taxonomy.version:
+        with _build_lock:
+            if _index is None or _index.version != taxonomy.version:
+                _index = SearchIndex.from_taxonomy(taxonomy)
+            current = _index
+    return current
+
+
+# ============================================================
+# RESULTS
+# ============================================================
+def result_json(entry):
+    """
+    One result for the selector. ``trail`` lists the nodes to open to reach
+    it; ``url`` leads straight to the instructions of a concept's topic.
+    """
+    trail = [{'type': 'category', 'id': entry.category_id}]
+    trail += [{'type': 'subcategory', 'id': pk} for pk in entry.trail]
+    url = None
+    if entry.kind == 'concept' and entry.leaf:
+        url = reverse('quizzes:instructions', args=[entry.trail[-1], entry.difficulty])
+    return {
+        'type': entry.kind,
+        'id': entry.pk,
+        'name': entry.name,
+        'path': entry.path,
+        'difficulty': entry.difficulty,
+        'leaf': entry.leaf,
+        'trail': trail,
+        'url': url,
+    }
@@ -0,0 +1,54 @@
+# quizzes/signals.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, Concept, DeletedRecord, Question, QuizAttempt, SubCategory
+from .taxonomy import bump_version
+
+_tombstones_suppressed = ContextVar('tombstones_suppressed', default=False)
+
+
+@contextmanager
+def suppress_tombstones():
+    """Delete rows without recording tombstones (rows moved elsewhere, e.g. archived)."""
+    token = _tombstones_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _tombstones_suppressed.reset(token)
+
+
+@receiver(post_delete, sender=QuizAttempt)
+@receiver(post_delete, sender=Question)
+def record_tombstone(sender, instance, **kwargs):
+    # Lets the incremental change feed propagate deletions downstream
+    if _tombstones_suppressed.get():
+        return
+    DeletedRecord.objects.create(
+        model=sender._meta.label_lower,
+        object_id=str(instance.pk),
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_save, sender=Concept)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+@receiver(post_delete, sender=Concept)
+def bump_taxonomy_version(sender, **kwargs):
+    # Cached copies of the taxonomy are keyed on the version (see taxonomy.py);
+    # bumped after commit so a rebuild never reads the old rows
+    transaction.on_commit(bump_version)
+
+
+@receiver(post_delete, sender=SubCategory)
+def rebase_orphaned_subtree(sender, instance, **kwargs):
+    # parent_subcat is SET_NULL: the children become top-level, and their
+    # subtrees move up with them (see SubCategory.path)
+    if instance.path:
+        SubCategory.move_subtree(instance.path, '/', -instance.level, exclude=instance.pk)
@@ -0,0 +1,212 @@
+# quizzes/taxonomy.py
+"""
+The Category / SubCategory / Concept taxonomy, held in memory.
+
+The taxonomy is small reference data that changes rarely but is read on
+every step of starting a quiz. Each worker process keeps one
+``TaxonomySnapshot`` of it: categories, subcategories (with their category
+and parent attached), children lists and concept names per topic and
+difficulty. Lookups on the hot paths (the selector, instructions,
+``start_quiz``, the concept list ``generate_questions`` samples from) read
+the snapshot and never the database.
+
+Invalidation is a global version counter, ``TaxonomyVersion``. Every save
+or delete of a Category, SubCategory or Concept bumps it once the
+transaction commits (signals.py). The snapshot compares its version with
+the counter at most once per request (``TaxonomyMiddleware`` marks the
+request boundaries; outside a request every call checks) and reloads,
+three queries, when it has changed.
+
+The selector also gets the whole tree as one JSON document, cached under
+the version:
+
+    {"version": 12, "categories": [
+        {"id": 1, "name": "Academics", "description": "...", "children": [
+            {"id": 4, "name": "Engineering", "leaf": false, "description": "...",
+             "concepts": 0, "children": [...]}, ...]}, ...]}
+
+``concepts`` (the number of concepts of a topic, all difficulties) is only
+included on request. The document's ETag is a hash of its bytes, and the
+selector requests it with that hash in the URL, so browsers may keep it
+for a year and a new taxonomy simply arrives under a new URL.
+"""
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.db.models import F
+from django.http import Http404
+
+from .models import Category, Concept, SubCategory, TaxonomyVersion
+
+TREE_CACHE_TTL = 24 * 60 * 60
+
+
+# ============================================================
+# VERSION COUNTER
+# ============================================================
+def current_version():
+    return TaxonomyVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def bump_version():
+    if not TaxonomyVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        TaxonomyVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+# ============================================================
+# PROCESS-LOCAL SNAPSHOT
+# ============================================================
+class TaxonomySnapshot:
+    """
+    One consistent copy of the taxonomy. Treat the instances it hands out
+    as read-only: they are shared by every request of the process.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.categories = list(Category.objects.order_by('name'))
+        self.category_by_id = {category.pk: category for category in self.categories}
+
+        self.subcategories = {}
+        self.roots = {category.pk: [] for category in self.categories}
+        self.children = {}
+        for sub in SubCategory.objects.order_by('name'):
+            sub.category = self.category_by_id[sub.category_id]
+            self.subcategories[sub.pk] = sub
+            self.children[sub.pk] = []
+
+        for sub in self.subcategories.values():
+            parent = self.subcategories.get(sub.parent_subcat_id)
+            if parent is not None:
+                sub.parent_subcat = parent
+                self.children[parent.pk].append(sub)
+            else:
+                self.roots[sub.category_id].append(sub)
+
+        # (subcategory_id, difficulty) -> [(concept_id, name), ...]
+        self.concepts = {}
+        self.concept_counts = {}
+        rows = Concept.objects.order_by('name').values_list('id', 'subcategory_id', 'difficulty', 'name')
+        for pk, subcategory_id, difficulty, name in rows:
+            self.concepts.setdefault((subcategory_id, difficulty), []).append((pk, name))
+            self.concept_counts[subcategory_id] = self.concept_counts.get(subcategory_id, 0) + 1
+
+    def get_category(self, pk):
+        return self.category_by_id.get(_as_int(pk))
+
+    def get_subcategory(self, pk):
+        return self.subcategories.get(_as_int(pk))
+
+    def breadcrumb(self, sub):
+        """Ancestors of ``sub`` followed by ``sub``, top-level first."""
+        chain = []
+        while sub is not None and sub not in chain:
+            chain.append(sub)
+            sub = self.subcategories.get(sub.parent_subcat_id)
+        return chain[::-1]
+
+    def concept_list(self, subcategory_id, difficulty):
+        return self.concepts.get((subcategory_id, difficulty), [])
+
+    def concept_count(self, subcategory_id):
+        return self.concept_counts.get(subcategory_id, 0)
+
+
+def _as_int(pk):
+    try:
+        return int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+_snapshot = None
+_reload_lock = threading.Lock()
+# None outside a request scope (every call checks), else whether this
+# request has checked the version yet
+_checked = ContextVar('taxonomy_checked', default=None)
+
+
+def snapshot():
+    """The current snapshot; the version is checked once per request."""
+    global _snapshot
+    current = _snapshot
+    checked = _checked.get()
+    if current is not None and checked:
+        return current
+
+    version = current_version()
+    if current is None or current.version != version:
+        with _reload_lock:
+            if _snapshot is None or _snapshot.version != version:
+                _snapshot = TaxonomySnapshot(version)
+            current = _snapshot
+    if checked is not None:
+        _checked.set(True)
+    return current
+
+
+@contextmanager
+def request_scope():
+    """Let the snapshot check the version again, once, within this block."""
+    token = _checked.set(False)
+    try:
+        yield
+    finally:
+        _checked.reset(token)
+
+
+def get_subcategory_or_404(pk):
+    sub = snapshot().get_subcategory(pk)
+    if sub is None:
+        raise Http404('No SubCategory matches the given query.')
+    return sub
+
+
+def get_category_or_404(pk):
+    category = snapshot().get_category(pk)
+    if category is None:
+        raise Http404('No Category matches the given query.')
+    return category
+
+
+# ============================================================
+# TREE DOCUMENT
+# ============================================================
+def build_tree(taxonomy, include_concepts=False):
+    """The full tree of a snapshot as nested dicts."""
+    def node(sub):
+        entry = {'id': sub.pk, 'name': sub.name, 'leaf': sub.is_leaf, 'description': sub.description or ''}
+        if include_concepts:
+            entry['concepts'] = taxonomy.concept_count(sub.pk)
+        entry['children'] = [node(child) for child in taxonomy.children[sub.pk]]
+        return entry
+
+    categories = [
+        {
+            'id': category.pk,
+            'name': category.name,
+            'description': category.description or '',
+            'children': [node(sub) for sub in taxonomy.roots[category.pk]],
+        }
+        for category in taxonomy.categories
+    ]
+    return {'version': taxonomy.version, 'categories': categories}
+
+
+def tree_document(include_concepts=False):
+    """
+    ``(etag, body)`` of the current tree, serialized once per taxonomy
+    version and shared through the cache.
+    """
+    taxonomy = snapshot()
+    key = f'quiz:taxonomy:tree:{taxonomy.version}:{int(include_concepts)}'
+    document = cache.get(key)
+    if document is None:
+        body = json.dumps(build_tree(taxonomy, include_concepts), separators=(',', ':')).encode()
+        document = (hashlib.sha1(body).hexdigest()[:20], body)
+        cache.set(key, document, TREE_CACHE_TTL)
+    return document
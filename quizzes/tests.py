@@ -1,3 +1,634 @@
-from django.test import TestCase
+import io
+import json
+import random
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connections
+from django.db.models import F
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import answering, generation, item_analysis, percentiles, reaper, taxonomy, timing, views
+from .analytics import SERIES_MIN_POINTS, UserSummary
+from .models import (
+    Category, DailyPerformance, PerformanceReport, Question, QuestionStats, QuizAttempt, RegradeJob,
+    ScoreDistribution, SubCategory,
+)
+from .question_refs import question_ref, record_served_questions
+from .regrade import claim_next_job, queue_regrade, run_job
+from .reports import build_report_data, report_stats_key
+
+
+def make_user(username='student'):
+    return get_user_model().objects.create_user(username, f'{username}@example.com', 'pw')
+
+
+def make_topic(name='Python'):
+    category = Category.objects.create(name=f'{name} category')
+    return category, SubCategory.objects.create(category=category, name=name, is_leaf=True)
+
+
+def exact_rank(scores, score):
+    return sum(s < score for s in scores) / len(scores) * 100
+
+
+def make_question(category, topic, n):
+    return Question.objects.create(
+        category=category, subcategory=topic, difficulty='easy', question_text=f'Question {n}',
+        option_a='a', option_b='b', option_c='c', option_d='d', correct_answer='A',
+        explanation='', normalized_hash=f'hash-{n}',
+    )
+
+
+def served(question, answer):
+    return {
+        'question_pk': question.pk, 'question': question.question_text, 'correct_answer': 'A',
+        'user_answer': answer, 'is_correct': answer == 'A',
+    }
+
+
+# ============================================================
+# DASHBOARD QUERY COUNTS
+# ============================================================
+class DashboardQueryCountTests(TestCase):
+    """
+    The dashboards read a fixed number of queries however many attempts,
+    categories and days the user has. Views are called directly so the
+    counts leave out session and user loading.
+    """
+
+    def setUp(self):
+        self.user = make_user()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def add_attempts(self, topics, days):
+        now = timezone.now()
+        for n in range(topics):
+            category, topic = make_topic(f'Topic {SubCategory.objects.count()}')
+            QuizAttempt.objects.bulk_create([
+                QuizAttempt(user=self.user, category=category, subcategory=topic,
+                            difficulty=['easy', 'medium', 'hard'][day % 3],
+                            status=QuizAttempt.STATUS_COMPLETED, score=50, correct_answers=5,
+                            attempted_questions=10, total_questions=10,
+                            started_at=now - timedelta(days=day), completed_at=now - timedelta(days=day))
+                for day in range(days)
+            ])
+
+    def get(self, view):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        request.session = SessionStore()
+        return view(request)
+
+    def store_current_report(self):
+        data = build_report_data(self.user, UserSummary(self.user))
+        report, _ = PerformanceReport.objects.get_or_create(user=self.user)
+        report.stats_key = report_stats_key(data)
+        report.status = PerformanceReport.STATUS_READY
+        report.generated_at = timezone.now()
+        report.file.save('report.pdf', ContentFile(b'%PDF-1.4'), save=False)
+        report.size = 8
+        report.save()
+
+    def assert_queries_constant(self, view, expected, prepare=None):
+        for topics, days in ((1, 1), (4, 6)):
+            self.add_attempts(topics, days)
+            if prepare:
+                prepare()
+            with self.assertNumQueries(expected):
+                response = self.get(view)
+            self.assertEqual(response.status_code, 200)
+
+    def test_dashboard(self):
+        self.assert_queries_constant(views.dashboard, 4)
+
+    def test_performance_dashboard(self):
+        self.assert_queries_constant(views.performance_dashboard, 6)
+
+    def test_download_performance_pdf(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            self.assert_queries_constant(views.download_performance_pdf, 4, prepare=self.store_current_report)
+
+
+class PerformanceSeriesApiTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        today = timezone.localdate()
+        DailyPerformance.objects.bulk_create([
+            DailyPerformance(user=self.user, date=today - timedelta(days=day), attempts=1,
+                             score_sum=day % 7 * 10)
+            for day in range(30)
+        ])
+
+    def points(self, points):
+        request = RequestFactory().get('/', {'points': points})
+        request.user = self.user
+        return len(json.loads(views.performance_series_api(request).content)['labels'])
+
+    def test_points_are_clamped(self):
+        self.assertEqual(self.points(10), 10)
+        for too_few in (-5, 0, 2):
+            self.assertEqual(self.points(too_few), SERIES_MIN_POINTS)
+        self.assertEqual(self.points(1000), 30)
+
+
+# ============================================================
+# MAINTENANCE COMMANDS
+# ============================================================
+class CompactAttemptQuestionsTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.category, self.topic = make_topic()
+        self.question = make_question(self.category, self.topic, 1)
+
+    def attempt(self, status):
+        q = self.question
+        copy = {
+            'id': 1, 'question_pk': q.pk, 'question': q.question_text, 'option_a': q.option_a,
+            'option_b': q.option_b, 'option_c': q.option_c, 'option_d': q.option_d,
+            'correct_answer': q.correct_answer, 'explanation': q.explanation,
+            'user_answer': 'A', 'is_correct': True,
+        }
+        return QuizAttempt.objects.create(user=self.user, category=self.category, subcategory=self.topic,
+                                          difficulty='easy', status=status, questions=[copy])
+
+    def test_compacts_finished_attempts_with_a_version_bump(self):
+        attempt = self.attempt(QuizAttempt.STATUS_COMPLETED)
+        call_command('compact_attempt_questions', stdout=io.StringIO())
+
+        attempt.refresh_from_db()
+        self.assertNotIn('question', attempt.questions[0])
+        self.assertEqual(attempt.questions[0]['question_pk'], self.question.pk)
+        self.assertEqual(attempt.version, 1)
+
+    def test_leaves_attempts_in_progress_alone(self):
+        attempt = self.attempt(QuizAttempt.STATUS_IN_PROGRESS)
+        call_command('compact_attempt_questions', stdout=io.StringIO())
+
+        attempt.refresh_from_db()
+        self.assertIn('question', attempt.questions[0])
+        self.assertEqual(attempt.version, 0)
+
+
+# ============================================================
+# CONCURRENT ANSWERS
+# ============================================================
+class ConcurrentAnswerTests(TransactionTestCase):
+    """``submit_answers`` racing on one attempt from several threads (tabs)."""
+
+    THREADS = 8
+
+    def setUp(self):
+        category, topic = make_topic()
+        questions = [make_question(category, topic, n) for n in range(self.THREADS)]
+        self.attempt = QuizAttempt.objects.create(
+            user=make_user(), category=category, subcategory=topic, difficulty='easy',
+            status=QuizAttempt.STATUS_IN_PROGRESS, total_questions=len(questions),
+            questions=[question_ref(question, n + 1) for n, question in enumerate(questions)],
+        )
+
+    def race(self, answers):
+        """Submit each answer from its own thread, all at once, like the one-question page."""
+        barrier = threading.Barrier(len(answers))
+        errors = []
+
+        def submit(answer):
+            try:
+                attempt = QuizAttempt.objects.get(pk=self.attempt.pk)
+                barrier.wait()
+                while True:
+                    try:
+                        return answering.submit_answers(attempt, [answer], advance=True)
+                    except answering.AnswerConflict:
+                        # The page retries a 409; the attempt is read again first
+                        attempt.refresh_from_db()
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit, args=(answer,)) for answer in answers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.attempt.refresh_from_db()
+
+    def test_no_answer_is_lost(self):
+        self.race([(index, 'B' if index % 2 else 'A') for index in range(self.THREADS)])
+
+        for index, question in enumerate(self.attempt.questions):
+            self.assertEqual(question['user_answer'], 'B' if index % 2 else 'A')
+            self.assertEqual(question['is_correct'], index % 2 == 0)
+        self.assertEqual(self.attempt.current_question_index, self.THREADS)
+        # One successful write per answer
+        self.assertEqual(self.attempt.version, self.THREADS)
+
+    def test_repeated_answer_advances_once(self):
+        self.race([(0, 'A')] * self.THREADS)
+
+        self.assertEqual(self.attempt.questions[0]['user_answer'], 'A')
+        self.assertEqual([q['user_answer'] for q in self.attempt.questions[1:]], [None] * (self.THREADS - 1))
+        self.assertEqual(self.attempt.current_question_index, 1)
+
+
+    def test_answer_read_before_finish_is_not_written_after_it(self):
+        answering_tab = QuizAttempt.objects.get(pk=self.attempt.pk)
+        finishing_tab = QuizAttempt.objects.get(pk=self.attempt.pk)
+
+        self.assertTrue(views.finalize_quiz_attempt(finishing_tab))
+        self.assertIsNone(answering.submit_answers(answering_tab, [(0, 'A')], advance=True))
+
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, QuizAttempt.STATUS_COMPLETED)
+        self.assertIsNone(self.attempt.questions[0]['user_answer'])
+        self.assertEqual(self.attempt.correct_answers, 0)
+
+    def test_finish_after_a_concurrent_answer_counts_it(self):
+        finishing_tab = QuizAttempt.objects.get(pk=self.attempt.pk)
+        answering_tab = QuizAttempt.objects.get(pk=self.attempt.pk)
+
+        answering.submit_answers(answering_tab, [(0, 'A')], advance=True)
+        self.assertTrue(views.finalize_quiz_attempt(finishing_tab))
+        self.assertFalse(views.finalize_quiz_attempt(answering_tab))
+
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.questions[0]['user_answer'], 'A')
+        self.assertEqual(self.attempt.attempted_questions, 1)
+        self.assertEqual(self.attempt.correct_answers, 1)
+        self.assertEqual(self.attempt.score, 100 / self.THREADS)
+
+
+# ============================================================
+# TAXONOMY SNAPSHOT
+# ============================================================
+class TaxonomySnapshotTests(TestCase):
+    def test_every_call_checks_outside_a_request(self):
+        before = taxonomy.snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Added later')   # bumps the version
+
+        current = taxonomy.snapshot()
+        self.assertGreater(current.version, before.version)
+        self.assertIn(category.pk, current.category_by_id)
+
+    def test_a_request_checks_once(self):
+        with taxonomy.request_scope():
+            before = taxonomy.snapshot()
+            with self.captureOnCommitCallbacks(execute=True):
+                Category.objects.create(name='Added later')
+            self.assertIs(taxonomy.snapshot(), before)
+
+        with taxonomy.request_scope():
+            self.assertGreater(taxonomy.snapshot().version, before.version)
+
+
+# ============================================================
+# GENERATION CLAIMS
+# ============================================================
+class GenerationClaimTests(TestCase):
+    def setUp(self):
+        category, topic = make_topic()
+        self.attempt = QuizAttempt.objects.create(
+            user=make_user(), category=category, subcategory=topic, difficulty='easy',
+            status=QuizAttempt.STATUS_GENERATING,
+        )
+        self.request = RequestFactory().post('/', HTTP_IDEMPOTENCY_KEY='page-key-1234')
+
+    def test_every_claim_gets_its_own_token(self):
+        first, second = generation.claim_token(self.request), generation.claim_token(self.request)
+        self.assertNotEqual(first, second)
+        self.assertTrue(first.startswith('page-key-1234:'))
+
+    def test_stale_worker_cannot_release_a_retry_of_the_same_page(self):
+        stalled = QuizAttempt.objects.get(pk=self.attempt.pk)
+        stalled_token = generation.claim_token(self.request)
+        self.assertTrue(generation.claim(stalled, stalled_token))
+
+        # The lease runs out and the page retries with the same key
+        QuizAttempt.objects.filter(pk=self.attempt.pk).update(
+            generation_lease_until=timezone.now() - timedelta(seconds=1)
+        )
+        retry = QuizAttempt.objects.get(pk=self.attempt.pk)
+        retry_token = generation.claim_token(self.request)
+        self.assertTrue(generation.claim(retry, retry_token))
+
+        stalled.status = QuizAttempt.STATUS_ABANDONED
+        self.assertFalse(generation.release(stalled, stalled_token, ['status']))
+
+        retry.status = QuizAttempt.STATUS_IN_PROGRESS
+        self.assertTrue(generation.release(retry, retry_token, ['status']))
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, QuizAttempt.STATUS_IN_PROGRESS)
+
+
+# ============================================================
+# REAPER
+# ============================================================
+class ReapAttemptTests(TestCase):
+    def setUp(self):
+        category, topic = make_topic()
+        question = make_question(category, topic, 1)
+        self.attempt = QuizAttempt.objects.create(
+            user=make_user(), category=category, subcategory=topic, difficulty='easy',
+            status=QuizAttempt.STATUS_IN_PROGRESS, total_questions=1, time_limit_seconds=60,
+            questions=[dict(question_ref(question, 1), user_answer='A', is_correct=True)],
+        )
+        timing.start(self.attempt, timezone.now() - timedelta(hours=1))
+        self.attempt.save()
+
+    def test_expired_attempt_is_finalized(self):
+        self.assertEqual(reaper.reap_attempt(self.attempt), 'finalized')
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, QuizAttempt.STATUS_COMPLETED)
+        self.assertEqual(self.attempt.score, 100)
+
+    def test_attempt_quit_since_it_was_read_stays_abandoned(self):
+        stale = QuizAttempt.objects.get(pk=self.attempt.pk)
+        QuizAttempt.objects.filter(pk=self.attempt.pk).update(
+            status=QuizAttempt.STATUS_ABANDONED, version=F('version') + 1
+        )
+
+        self.assertIsNone(reaper.reap_attempt(stale))
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, QuizAttempt.STATUS_ABANDONED)
+
+
+# ============================================================
+# REGRADES
+# ============================================================
+class RegradeJobTests(TestCase):
+    def setUp(self):
+        user = make_user()
+        category, topic = make_topic()
+        self.question = make_question(category, topic, 1)
+        self.attempts = {}
+        for status in (QuizAttempt.STATUS_COMPLETED, QuizAttempt.STATUS_IN_PROGRESS):
+            entry = dict(question_ref(self.question, 1), user_answer='B', is_correct=False)
+            attempt = QuizAttempt.objects.create(
+                user=user, category=category, subcategory=topic, difficulty='easy', status=status,
+                questions=[entry], total_questions=1, attempted_questions=1,
+            )
+            record_served_questions(attempt)
+            self.attempts[status] = attempt
+
+        # The key was wrong: B is the right answer
+        self.question.correct_answer = 'B'
+        self.question.save()
+        self.job = queue_regrade(self.question)
+
+    def test_job_waits_for_attempts_in_progress(self):
+        job = run_job(claim_next_job())
+
+        self.assertEqual(job.status, RegradeJob.STATUS_PENDING)
+        self.assertEqual(job.skipped, 1)
+        self.assertGreater(job.retry_at, timezone.now())
+        self.assertIsNone(claim_next_job())
+
+        completed = QuizAttempt.objects.get(pk=self.attempts[QuizAttempt.STATUS_COMPLETED].pk)
+        self.assertEqual(completed.correct_answers, 1)
+        self.assertEqual(completed.score, 100)
+
+        # The attempt is finished (graded against the old key), then the next pass regrades it
+        in_progress = self.attempts[QuizAttempt.STATUS_IN_PROGRESS]
+        QuizAttempt.objects.filter(pk=in_progress.pk).update(status=QuizAttempt.STATUS_COMPLETED)
+        RegradeJob.objects.filter(pk=job.pk).update(retry_at=timezone.now() - timedelta(seconds=1))
+
+        job = run_job(claim_next_job())
+        self.assertEqual(job.status, RegradeJob.STATUS_DONE)
+        self.assertEqual(job.skipped, 0)
+        self.assertEqual(job.attempts_regraded, 2)
+        in_progress.refresh_from_db()
+        self.assertEqual(in_progress.correct_answers, 1)
+
+    def test_retry_of_an_older_job_does_not_undo_a_newer_one(self):
+        old_job = run_job(claim_next_job())
+        self.assertEqual(old_job.skipped, 1)
+
+        # A second fix: C is the right answer
+        self.question.correct_answer = 'C'
+        self.question.save()
+        new_job = queue_regrade(self.question)
+        old_job.refresh_from_db()
+        self.assertEqual(old_job.status, RegradeJob.STATUS_SUPERSEDED)
+
+        QuizAttempt.objects.filter(status=QuizAttempt.STATUS_IN_PROGRESS).update(
+            status=QuizAttempt.STATUS_COMPLETED
+        )
+        job = claim_next_job()
+        self.assertEqual(job.pk, new_job.pk)
+        self.assertEqual(run_job(job).status, RegradeJob.STATUS_DONE)
+        self.assertIsNone(claim_next_job())
+
+        # Even a pass of the older job that was already under way leaves them alone
+        old_job.cursor = ''
+        self.assertEqual(run_job(old_job).attempts_regraded, 1)
+        for attempt in QuizAttempt.objects.all():
+            self.assertEqual(attempt.questions[0]['version'], self.question.version)
+            self.assertIs(attempt.questions[0]['is_correct'], False)
+            self.assertEqual(attempt.correct_answers, 0)
+            self.assertEqual(attempt.score, 0)
+
+    def test_job_without_open_attempts_finishes_in_one_pass(self):
+        QuizAttempt.objects.filter(status=QuizAttempt.STATUS_IN_PROGRESS).update(
+            status=QuizAttempt.STATUS_ABANDONED
+        )
+        job = run_job(claim_next_job())
+        self.assertEqual(job.status, RegradeJob.STATUS_DONE)
+        self.assertIsNone(claim_next_job())
+
+
+# ============================================================
+# TIMER
+# ============================================================
+class TimerTests(SimpleTestCase):
+    def setUp(self):
+        self.t0 = timezone.now()
+        self.attempt = QuizAttempt(time_limit_seconds=600)
+        timing.start(self.attempt, self.t0)
+
+    def at(self, seconds):
+        return self.t0 + timedelta(seconds=seconds)
+
+    def test_running_timer_counts_down(self):
+        self.assertEqual(timing.remaining_seconds(self.attempt, self.at(0)), 600)
+        self.assertEqual(timing.remaining_seconds(self.attempt, self.at(250)), 350)
+        self.assertEqual(timing.remaining_seconds(self.attempt, self.at(900)), 0)
+
+    def test_pause_and_resume(self):
+        self.assertEqual(timing.pause(self.attempt, self.at(100)), timing.TIMER_FIELDS)
+        self.assertEqual(self.attempt.time_spent_seconds, 100)
+        self.assertIsNone(self.attempt.resumed_at)
+        self.assertEqual(self.attempt.paused_at, self.at(100))
+
+        # The clock is stopped while paused
+        self.assertEqual(timing.remaining_seconds(self.attempt, self.at(5000)), 500)
+        self.assertEqual(timing.pause(self.attempt, self.at(5000)), [])
+
+        self.assertEqual(timing.resume(self.attempt, self.at(5000)), timing.TIMER_FIELDS)
+        self.assertIsNone(self.attempt.paused_at)
+        self.assertEqual(timing.remaining_seconds(self.attempt, self.at(5030)), 470)
+        self.assertEqual(timing.resume(self.attempt, self.at(5030)), [])
+
+        timing.pause(self.attempt, self.at(5100))
+        self.assertEqual(self.attempt.time_spent_seconds, 200)
+
+    def test_expiry_at_the_limit(self):
+        self.assertFalse(timing.is_expired(self.attempt, self.at(599)))
+        self.assertTrue(timing.is_expired(self.attempt, self.at(600)))
+
+    def test_grace_window(self):
+        grace = timing.TIMER_GRACE_SECONDS
+        self.assertFalse(timing.is_expired(self.attempt, self.at(600), grace=grace))
+        self.assertFalse(timing.is_expired(self.attempt, self.at(600 + grace - 1), grace=grace))
+        self.assertTrue(timing.is_expired(self.attempt, self.at(600 + grace), grace=grace))
+
+    def test_paused_attempt_does_not_expire(self):
+        timing.pause(self.attempt, self.at(590))
+        self.assertFalse(timing.is_expired(self.attempt, self.at(10_000)))
+        self.assertEqual(timing.remaining_seconds(self.attempt, self.at(10_000)), 10)
+
+        # The remaining seconds run out only once it is resumed
+        timing.resume(self.attempt, self.at(20_000))
+        self.assertFalse(timing.is_expired(self.attempt, self.at(20_009)))
+        self.assertTrue(timing.is_expired(self.attempt, self.at(20_010)))
+
+    def test_paused_past_the_limit_stays_expired(self):
+        # Paused (the taker left) after the limit, inside the grace window
+        timing.pause(self.attempt, self.at(603))
+        self.assertEqual(timing.remaining_seconds(self.attempt, self.at(10_000)), 0)
+        self.assertTrue(timing.is_expired(self.attempt, self.at(10_000)))
+        self.assertFalse(timing.is_expired(self.attempt, self.at(10_000), grace=timing.TIMER_GRACE_SECONDS))
+
+    def test_stop_caps_time_spent_at_the_limit(self):
+        timing.stop(self.attempt, self.at(604))
+        self.assertEqual(self.attempt.time_spent_seconds, 600)
+        self.assertFalse(timing.is_running(self.attempt))
+
+
+# ============================================================
+# ITEM ANALYSIS
+# ============================================================
+class ItemAnalysisTests(TestCase):
+    def setUp(self):
+        user = make_user()
+        category, topic = make_topic()
+        self.questions = [make_question(category, topic, n) for n in range(3)]
+        answers = ['A', 'B', 'A', 'C', 'A', None]
+        QuizAttempt.objects.bulk_create([
+            QuizAttempt(user=user, category=category, subcategory=topic, difficulty='easy',
+                        status=QuizAttempt.STATUS_COMPLETED,
+                        questions=[served(q, answers[(i + n) % len(answers)]) for n, q in enumerate(self.questions)])
+            for i in range(6)
+        ])
+
+    def analyse(self):
+        responses = item_analysis.collect_responses()
+        stats = item_analysis.compute_item_statistics(
+            responses.item, responses.person, responses.choice, responses.correct,
+            n_items=len(responses.question_ids),
+        )
+        return item_analysis.save_item_statistics(responses.question_ids, stats)
+
+    def test_saves_statistics_per_question(self):
+        self.assertEqual(self.analyse(), 3)
+
+        stats = QuestionStats.objects.get(question=self.questions[0])
+        self.assertEqual(stats.responses, 6)
+        self.assertEqual(stats.answered, 5)
+        self.assertAlmostEqual(stats.p_value, 0.5)
+        self.assertAlmostEqual(stats.rate_a, 0.6)
+
+    def test_rerun_replaces_rows(self):
+        self.analyse()
+        self.analyse()
+        self.assertEqual(QuestionStats.objects.count(), 3)
+
+    def test_deleted_questions_are_skipped(self):
+        self.questions[2].delete()
+        self.assertEqual(self.analyse(), 2)
+        self.assertEqual(
+            set(QuestionStats.objects.values_list('question_id', flat=True)),
+            {q.pk for q in self.questions[:2]},
+        )
+
+
+# ============================================================
+# PERCENTILES
+# ============================================================
+class ScoreSketchTests(SimpleTestCase):
+    def sketch(self, scores, bin_width):
+        n_bins = percentiles.bin_count(bin_width)
+        counts = [0] * n_bins
+        for score in scores:
+            counts[min(int(score // bin_width), n_bins - 1)] += 1
+        return percentiles.ScoreSketch(counts, bin_width)
+
+    def test_rank_is_exact_on_bin_edges(self):
+        rng = random.Random(1)
+        scores = [rng.uniform(0, 100) for _ in range(500)] + [0.0, 50.0, 100.0]
+        for bin_width in (1.0, 5.0, 10.0):
+            sketch = self.sketch(scores, bin_width)
+            for edge in sketch.edges:
+                self.assertAlmostEqual(sketch.percentile_rank(edge), exact_rank(scores, edge))
+
+    def test_rank_error_stays_within_bound(self):
+        rng = random.Random(2)
+        scores = [min(max(rng.gauss(65, 15), 0), 100) for _ in range(2000)]
+        for bin_width in (2.5, 5.0, 20.0):
+            sketch = self.sketch(scores, bin_width)
+            for _ in range(200):
+                score = rng.uniform(0, 100)
+                error = abs(sketch.percentile_rank(score) - exact_rank(scores, score))
+                self.assertLessEqual(error, sketch.max_rank_error + 1e-9)
+
+    def test_empty_sketch_has_no_rank(self):
+        self.assertIsNone(percentiles.ScoreSketch([0, 0], 50.0).percentile_rank(10))
+
+
+@override_settings(QUIZ_PERCENTILE_BIN_WIDTH=5)
+class BuildScoreDistributionsTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.category, self.topic = make_topic()
+        self.scores = [float(10 * (i % 11)) for i in range(40)]
+        QuizAttempt.objects.bulk_create([
+            QuizAttempt(user=self.user, category=self.category, subcategory=self.topic, difficulty='easy',
+                        status=QuizAttempt.STATUS_COMPLETED, score=score)
+            for score in self.scores
+        ])
+        percentiles.invalidate_sketches()
+
+    def test_builds_with_configured_bin_width(self):
+        groups, max_error = percentiles.build_score_distributions()
+
+        self.assertEqual(groups, 1)
+        distribution = ScoreDistribution.objects.get(subcategory=self.topic, difficulty='easy')
+        self.assertEqual(distribution.bin_width, 5)
+        self.assertEqual(distribution.total, len(self.scores))
+        self.assertEqual(len(distribution.counts), percentiles.bin_count(5))
+        self.assertLessEqual(max_error, 100)
+
+    def test_ranks_of_scores_on_edges_are_exact(self):
+        percentiles.build_score_distributions()
+        for score in range(0, 101, 10):
+            self.assertAlmostEqual(
+                percentiles.percentile_rank(self.topic.pk, 'easy', score), exact_rank(self.scores, score)
+            )
+
+    def test_rebuild_replaces_previous_rows(self):
+        percentiles.build_score_distributions()
+        QuizAttempt.objects.filter(score=0).delete()
+        percentiles.build_score_distributions()
+
+        distribution = ScoreDistribution.objects.get()
+        self.assertEqual(distribution.total, QuizAttempt.objects.count())
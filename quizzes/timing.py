@@ -0,0 +1,82 @@
+# quizzes/timing.py
+"""
+Server-authoritative quiz timer.
+
+The time an attempt has used is derived from stored session boundaries
+instead of being reported by the browser:
+
+- ``time_spent_seconds``: time used by all closed sessions,
+- ``resumed_at``: start of the open session (``None`` while paused).
+
+So ``elapsed = time_spent_seconds + (now - resumed_at)`` at any moment, and
+the timer only writes to the database when a session starts or ends: the
+questions are served, the taker leaves the quiz (pause), comes back
+(resume), quits or finishes. The browser counts down locally for display
+only; there are no heartbeats.
+
+``started_at`` keeps the time the attempt was started and is not touched
+by pauses.
+"""
+from django.utils import timezone
+
+# Answers arriving this long after the limit (network latency) still count
+TIMER_GRACE_SECONDS = 5
+
+TIMER_FIELDS = ['time_spent_seconds', 'resumed_at', 'paused_at']
+
+
+def is_running(attempt):
+    return attempt.resumed_at is not None
+
+
+def elapsed_seconds(attempt, now=None):
+    elapsed = attempt.time_spent_seconds or 0
+    if is_running(attempt):
+        now = now or timezone.now()
+        elapsed += max(0, int((now - attempt.resumed_at).total_seconds()))
+    return elapsed
+
+
+def remaining_seconds(attempt, now=None):
+    return max(0, attempt.time_limit_seconds - elapsed_seconds(attempt, now))
+
+
+def is_expired(attempt, now=None, grace=0):
+    return elapsed_seconds(attempt, now) >= attempt.time_limit_seconds + grace
+
+
+def start(attempt, now=None):
+    """Open the first session (questions served). Returns the changed fields."""
+    attempt.time_spent_seconds = 0
+    attempt.resumed_at = now or timezone.now()
+    attempt.paused_at = None
+    return TIMER_FIELDS
+
+
+def pause(attempt, now=None):
+    """Close the open session. Returns the changed fields (empty if paused)."""
+    if not is_running(attempt):
+        return []
+    now = now or timezone.now()
+    attempt.time_spent_seconds = elapsed_seconds(attempt, now)
+    attempt.resumed_at = None
+    attempt.paused_at = now
+    return TIMER_FIELDS
+
+
+def resume(attempt, now=None):
+    """Open a new session. Returns the changed fields (empty if running)."""
+    if is_running(attempt):
+        return []
+    attempt.resumed_at = now or timezone.now()
+    attempt.paused_at = None
+    return TIMER_FIELDS
+
+
+def stop(attempt, now=None):
+    """Close the timer for good (finalize). Returns the changed fields."""
+    now = now or timezone.now()
+    attempt.time_spent_seconds = min(elapsed_seconds(attempt, now), attempt.time_limit_seconds)
+    attempt.resumed_at = None
+    attempt.paused_at = None
+    return TIMER_FIELDS
@@ -1,6 +1,7 @@
 from django.urls import path
 from . import views
 from . import views_spa
+from . import views_runner
 
 app_name = "quizzes"
 
@@ -10,6 +11,8 @@ urlpatterns = [
     # ============================================================
     path("select/", views_spa.quiz_selector_view, name="quiz_selector"),
     path("api/children/", views_spa.get_children_ajax, name="get_children"),
+    path("api/tree/", views_spa.category_tree_api, name="category_tree"),
+    path("api/search/", views_spa.search_api, name="search"),
     
     # ============================================================
     # Dashboard
@@ -31,17 +34,28 @@ urlpatterns = [
     path("attempt/<uuid:attempt_id>/auto-submit/", views.auto_submit_quiz, name="auto_submit_quiz"),
     path("attempt/<uuid:attempt_id>/results/", views.quiz_results, name="quiz_results"),
 
+    # ============================================================
+    # Single-page Quiz Runner (one page load, answers posted in batches)
+    # ============================================================
+    path("attempt/<uuid:attempt_id>/run/", views_runner.quiz_runner, name="quiz_runner"),
+    path("api/attempts/<uuid:attempt_id>/", views_runner.attempt_api, name="attempt_api"),
+    path("api/attempts/<uuid:attempt_id>/answers/", views_runner.attempt_answers_api, name="attempt_answers_api"),
+
     # ============================================================
     # Performance & Analytics
     # ============================================================
     path("performance/", views.performance_dashboard, name="performance_dashboard"),       
     path("performance/download/", views.download_performance_pdf, name="download_performance_pdf"),
+    path("performance/series/", views.performance_series_api, name="performance_series"),
 
     # ============================================================
     # History & Leaderboard
     # ============================================================
     path('recent/', views.recent_quizzes_view, name='recent_quizzes'),
     path('attempts/', views.attempts_summary_view, name='attempts_summary'),
+    path('history/', views.history_view, name='history'),
+    path('api/history/', views.history_api, name='history_api'),
+    path('history/export/', views.export_history, name='export_history'),
     path('leaderboard/', views.leaderboard, name='leaderboard'),
 
     # ============================================================
@@ -58,6 +72,6 @@ urlpatterns = [
      # back to previous question 
      path("attempt/<uuid:attempt_id>/previous/",views.previous_question,name="previous_question"),
 
-     path('attempt/<uuid:attempt_id>/save-timer/', views.save_timer, name='save_timer'),
+     path('attempt/<uuid:attempt_id>/pause-timer/', views.pause_timer, name='pause_timer'),
 
 ]
\ No newline at end of file
@@ -1,24 +1,39 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.db.models import Avg, Max, Min, Sum, Count, Q
-from django.db.models.functions import Coalesce, TruncDate
-from django.http import JsonResponse, HttpResponse
+from django.db.models import Avg, Sum, Count, Q
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from django.utils.timezone import now
 from django.views.decorators.http import require_POST
-from datetime import timedelta, datetime
+from datetime import timedelta
 import random
-import json
 
-from .models import Category, SubCategory, QuizAttempt, Question, Concept
+from .models import Category, SubCategory, QuizAttempt, Question, Concept, PerformanceReport, ArchivedRollup
+from .archive import get_attempt_or_404
+from . import generation, timing
+from .write_buffer import (
+    flush_progress, get_buffered_attempt_or_404, mark_flushed, save_progress,
+)
+from .fields import decode_json
+from .question_refs import question_ref, record_served_questions
+from .answering import (
+    MAX_RETRIES, AnswerConflict, record_graded_concepts, reload_attempt, save_versioned, submit_answers,
+)
+from .reaper import reap_attempt
+from .taxonomy import get_subcategory_or_404, snapshot as taxonomy_snapshot
+from .analytics import (
+    SERIES_BUCKETS, SERIES_MAX_POINTS, SERIES_MIN_POINTS, branch_summary, get_request_summary,
+    performance_series, record_completed_attempt, weak_concepts,
+)
 
 # for performance pdf functionality
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from .reports import build_report_data, report_stats_key, request_report, serve_report
+
+from .percentiles import percentile_rank
+from .exports import stream_csv, stream_ndjson
+from .history import (
+    HISTORY_MAX_PAGE_SIZE, HISTORY_PAGE_SIZE, history_page, history_subcategories,
+    parse_history_filters,
 )
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
 
 # AI Feedback recommendation
 from .ai_feedback_service import generate_ai_feedback
@@ -29,61 +44,30 @@ from .ai_feedback_service import generate_ai_feedback
 @login_required
 def dashboard(request):
     user = request.user
+    summary = get_request_summary(request)
+    overall = summary.overall
 
-    # Base queryset: only completed quizzes
-    completed_qs = QuizAttempt.objects.filter(
+    recent_quizzes = QuizAttempt.objects.filter(
         user=user,
         status=QuizAttempt.STATUS_COMPLETED
-    )
-
-    total_attempted = QuizAttempt.objects.filter(user=user).count()
-    total_completed = completed_qs.count()
-
-    completion_rate = (
-        (total_completed / total_attempted) * 100
-        if total_attempted > 0 else 0
-    )
-
-    score_stats = completed_qs.aggregate(
-        avg_score=Coalesce(Avg('score'), 0.0),
-        best_score=Coalesce(Max('score'), 0.0),
-        worst_score=Coalesce(Min('score'), 0.0),
-    )
-
-    difficulty_stats = completed_qs.values('difficulty').annotate(
-        quizzes=Count('id'),
-        avg_score=Avg('score')
-    ).order_by('difficulty')
-
-    category_stats = completed_qs.values(
-        'category__name'
-    ).annotate(
-        quizzes=Count('id'),
-        avg_score=Avg('score')
-    ).order_by('-avg_score')
-
-    recent_quizzes = completed_qs.select_related(
+    ).slim().select_related(
         'category', 'subcategory'
     ).order_by('-completed_at')[:10]
 
-    last_7_days = completed_qs.filter(
-        completed_at__gte=timezone.now() - timedelta(days=7)
-    ).count()
-
     context = {
-        "total_attempted": total_attempted,
-        "total_completed": total_completed,
-        "completion_rate": round(completion_rate, 2),
+        "total_attempted": overall["total_attempted"],
+        "total_completed": overall["total_completed"],
+        "completion_rate": round(overall["completion_rate"], 2),
 
-        "avg_score": round(score_stats["avg_score"], 2),
-        "best_score": score_stats["best_score"],
-        "worst_score": score_stats["worst_score"],
+        "avg_score": round(overall["avg_score"], 2),
+        "best_score": overall["best_score"],
+        "worst_score": overall["worst_score"],
 
-        "difficulty_stats": difficulty_stats,
-        "category_stats": category_stats,
+        "difficulty_stats": overall["difficulty"],
+        "category_stats": summary.categories,
         "recent_quizzes": recent_quizzes,
 
-        "last_7_days": last_7_days,
+        "last_7_days": overall["last_7_days"],
     }
     return render(request, "quizzes/dashboard.html", context)
 
@@ -161,17 +145,27 @@ def instructions(request, subcategory_id, difficulty):
     """
     Show user instructions, selected difficulty & start button.
     """
-    subcategory = get_object_or_404(SubCategory, id=subcategory_id)
+    taxonomy = taxonomy_snapshot()
+    subcategory = get_subcategory_or_404(subcategory_id)
 
-    # If the selected subcategory is not leaf, redirect user to children list to pick a leaf.
-    if not subcategory.is_leaf:
-        children = SubCategory.objects.filter(parent_subcat=subcategory)
-        if children.exists():
-            return redirect('quizzes:subcategory_children', sub_id=subcategory.id)
+    # If the selected subcategory is not leaf, send the user back to the selector to pick a leaf.
+    if not subcategory.is_leaf and taxonomy.children[subcategory.pk]:
+        return redirect('quizzes:quiz_selector')
+
+    # Path from the top of the tree (in memory), and the user's record across
+    # the branch the topic belongs to (one query on SubCategory.path)
+    breadcrumb = taxonomy.breadcrumb(subcategory)
+    branch = breadcrumb[-2] if len(breadcrumb) > 1 else None
+    branch_stats = None
+    if branch is not None and request.user.is_authenticated:
+        branch_stats = branch_summary(request.user, branch)
 
     return render(request, "quizzes/step_instructions.html", {
         "subcategory": subcategory,
-        "difficulty": difficulty
+        "difficulty": difficulty,
+        "breadcrumb": breadcrumb,
+        "branch": branch,
+        "branch_stats": branch_stats,
     })
 
 # ============================================================
@@ -187,22 +181,33 @@ def start_quiz(request, subcategory_id, difficulty):
 
     if active_quiz:
         return redirect('quizzes:resume_quiz_prompt',attempt_id=active_quiz.id)
-    subcategory = get_object_or_404(SubCategory, id=subcategory_id)
+    subcategory = get_subcategory_or_404(subcategory_id)
     
     # Safety: only leaf nodes should start a quiz
     if not subcategory.is_leaf:
-        return redirect('quizzes:subcategory_children', sub_id=subcategory.id)
+        return redirect('quizzes:quiz_selector')
     
-    # Create quiz attempt
-    quiz_attempt = QuizAttempt.objects.create(
+    # A refresh of this page returns to the attempt still being prepared
+    # instead of creating (and generating) another one
+    quiz_attempt = QuizAttempt.objects.slim().filter(
         user=request.user,
-        category=subcategory.category,
         subcategory=subcategory,
         difficulty=difficulty,
-        total_questions=10,
         status=QuizAttempt.STATUS_GENERATING,
-        started_at=timezone.now()  # Add this line
-    )
+        created_at__gte=timezone.now() - timedelta(seconds=generation.lease_seconds()),
+    ).order_by('-created_at').first()
+
+    # Create quiz attempt
+    if quiz_attempt is None:
+        quiz_attempt = QuizAttempt.objects.create(
+            user=request.user,
+            category=subcategory.category,
+            subcategory=subcategory,
+            difficulty=difficulty,
+            total_questions=10,
+            status=QuizAttempt.STATUS_GENERATING,
+            started_at=timezone.now()  # Add this line
+        )
     
     # Show loading page that will trigger AJAX to generate questions
     return render(request, "quizzes/generating_quiz.html", {
@@ -214,17 +219,21 @@ def start_quiz(request, subcategory_id, difficulty):
 
 # get active quiz function
 def get_active_quiz(user):
-    return QuizAttempt.objects.filter(
+    """The attempt to offer resuming; stale ones are closed on the way (see reaper.py)."""
+    for attempt in QuizAttempt.objects.filter(
         user=user,
         status=QuizAttempt.STATUS_IN_PROGRESS
-    ).order_by('-started_at').first()
+    ).slim().order_by('-started_at'):
+        if reap_attempt(attempt) is None:
+            return attempt
+    return None
 
 # If user is reumes quiz
 # RESUME / QUIT PROMPT VIEW
 @login_required
 def resume_quiz_prompt(request,attempt_id):
-    quiz_attempt=get_object_or_404(
-        QuizAttempt,
+    quiz_attempt=get_buffered_attempt_or_404(
+        QuizAttempt.objects.slim().select_related('category', 'subcategory'),
         id=attempt_id,
         user=request.user,
         status=QuizAttempt.STATUS_IN_PROGRESS
@@ -240,37 +249,34 @@ def resume_quiz(request, attempt_id):
     """
     Resume quiz - RESUME the timer from where it was paused
     """
-    quiz_attempt = get_object_or_404(
-        QuizAttempt,
+    quiz_attempt = get_buffered_attempt_or_404(
+        QuizAttempt.objects.slim(),
         id=attempt_id,
         user=request.user,
         status=QuizAttempt.STATUS_IN_PROGRESS
     )
 
-    # Clear the paused_at to indicate quiz is active again
-    quiz_attempt.paused_at = None
-    # Reset started_at to current time for timer calculation
-    quiz_attempt.started_at = timezone.now()
-    quiz_attempt.save()
+    # Open a new timer session (no-op if one is already open)
+    save_progress(quiz_attempt, timing.resume(quiz_attempt))
 
     return redirect(
-        'quizzes:show_question',
+        'quizzes:quiz_runner',
         attempt_id=quiz_attempt.id
     )
 
 @login_required
 def previous_question(request, attempt_id):
-    quiz_attempt = get_object_or_404(
-        QuizAttempt,
+    quiz_attempt = get_buffered_attempt_or_404(
+        QuizAttempt.objects.slim(),
         id=attempt_id,
         user=request.user,
         status=QuizAttempt.STATUS_IN_PROGRESS
     )
 
-    # Move back only if possible
+    # Move back only if possible (buffered; see write_buffer.py)
     if quiz_attempt.current_question_index > 0:
         quiz_attempt.current_question_index -= 1
-        quiz_attempt.save()
+        save_progress(quiz_attempt, ['current_question_index'])
 
     return redirect(
         'quizzes:show_question',
@@ -283,42 +289,71 @@ def quit_quiz(request, attempt_id):
     """
     Quit & End quiz - PAUSE the timer
     """
-    quiz_attempt = get_object_or_404(
+    quiz_attempt = get_buffered_attempt_or_404(
         QuizAttempt,
         id=attempt_id,
         user=request.user,
         status=QuizAttempt.STATUS_IN_PROGRESS
     )
 
-    # Calculate time spent so far and add to accumulated time
-    if quiz_attempt.started_at and not quiz_attempt.paused_at:
-        time_spent = int((timezone.now() - quiz_attempt.started_at).total_seconds())
-        quiz_attempt.time_spent_seconds += time_spent
-    
-    # Mark when quiz was paused
-    quiz_attempt.paused_at = timezone.now()
-    
-    quiz_attempt.status = QuizAttempt.STATUS_ABANDONED
-    quiz_attempt.completed_at = timezone.now()
-    quiz_attempt.save()
+    # Close the open timer session, unless the quiz was finished (or
+    # answered, then quit with that answer) since it was read
+    for _ in range(MAX_RETRIES):
+        timing.pause(quiz_attempt)
+
+        quiz_attempt.status = QuizAttempt.STATUS_ABANDONED
+        quiz_attempt.completed_at = timezone.now()
+        if save_versioned(quiz_attempt, [
+            'status', 'completed_at', 'current_question_index', *timing.TIMER_FIELDS,
+        ]):
+            mark_flushed(quiz_attempt)
+            break
+        reload_attempt(quiz_attempt, timing.TIMER_FIELDS)
+        if quiz_attempt.status != QuizAttempt.STATUS_IN_PROGRESS:
+            break
 
     return redirect('quizzes:dashboard')
 
 
+# What a successful generation writes (generation.release)
+GENERATED_FIELDS = ['questions', 'status', 'ai_meta', *timing.TIMER_FIELDS]
+
+
+def generation_response(quiz_attempt):
+    """The JSON answer about an attempt whose generation is done or underway."""
+    if quiz_attempt.status == QuizAttempt.STATUS_GENERATING:
+        # Still being generated by another request: the page asks again
+        return JsonResponse({
+            'success': False,
+            'pending': True,
+            'retry_after': generation.RETRY_AFTER,
+        }, status=202)
+    if quiz_attempt.status == QuizAttempt.STATUS_ABANDONED and not quiz_attempt.questions:
+        return JsonResponse({
+            'success': False,
+            'error': 'Question generation failed. Please start a new quiz.'
+        }, status=500)
+
+    # The single-page runner takes the quiz from here (views_runner.py)
+    return JsonResponse({
+        'success': True,
+        'redirect_url': f'/quiz/attempt/{quiz_attempt.id}/run/'
+    })
+
+
 @login_required
 @require_POST
 def generate_questions(request, attempt_id):
     """
     AJAX endpoint to generate questions using AI
     """
-    quiz_attempt = get_object_or_404(QuizAttempt, id=attempt_id, user=request.user)
+    quiz_attempt = get_object_or_404(QuizAttempt.objects.slim(), id=attempt_id, user=request.user)
 
-    # Check if questions already generated
-    if quiz_attempt.questions:
-        return JsonResponse({
-            'success': True,
-            'redirect_url': f'/quiz/attempt/{quiz_attempt.id}/question/'
-        })
+    # Exactly one request generates (see generation.py); repeated POSTs wait
+    # for its result instead of paying for a second set of AI calls
+    token = generation.claim_token(request)
+    if not generation.claim(quiz_attempt, token):
+        return generation_response(generation.wait_for_result(quiz_attempt))
 
     try:
         from .ai_service import generate_quiz_questions
@@ -328,6 +363,9 @@ def generate_questions(request, attempt_id):
 
         REQUIRED_QUESTIONS = quiz_attempt.total_questions  # usually 10
         MAX_RETRIES = 3
+
+        taxonomy = taxonomy_snapshot()
+        subcategory = taxonomy.get_subcategory(quiz_attempt.subcategory_id)
         
         formatted_questions = []
         question_id = 1
@@ -335,51 +373,47 @@ def generate_questions(request, attempt_id):
         # ============================================
         # STEP 1: Get questions user has seen recently (last 7 days)
         # ============================================
-        recent_attempts = QuizAttempt.objects.filter(
+        recent_questions = QuizAttempt.objects.filter(
             user=request.user,
-            subcategory=quiz_attempt.subcategory,
+            subcategory_id=quiz_attempt.subcategory_id,
             status=QuizAttempt.STATUS_COMPLETED,
             completed_at__gte=timezone.now() - timedelta(days=7)
-        )
+        ).values_list('questions', flat=True)
         
-        # Collect question hashes the user has seen
+        # Collect the questions the user has seen (older attempts only
+        # stored the question text)
+        seen_question_pks = set()
         seen_question_texts = set()
-        for attempt in recent_attempts:
-            if attempt.questions:
-                for q in attempt.questions:
-                    seen_question_texts.add(q.get('question', ''))
+        for questions in recent_questions:
+            questions = decode_json(questions)
+            if questions:
+                for q in questions:
+                    if q.get('question_pk') is not None:
+                        seen_question_pks.add(q['question_pk'])
+                    if 'question' in q:
+                        seen_question_texts.add(q['question'])
         
         # ============================================
         # STEP 2: Try to use existing questions from DB that user hasn't seen
         # ============================================
         existing_questions = Question.objects.filter(
-            subcategory=quiz_attempt.subcategory,
+            subcategory_id=quiz_attempt.subcategory_id,
             difficulty=quiz_attempt.difficulty
         ).order_by('?')  # Random order
         
         # Filter out questions user has seen recently
         unseen_questions = [
             q for q in existing_questions 
-            if q.question_text not in seen_question_texts
+            if q.pk not in seen_question_pks
+            and q.question_text not in seen_question_texts
         ]
         
         # Use up to REQUIRED_QUESTIONS from existing pool
         for q in unseen_questions[:REQUIRED_QUESTIONS]:
-            formatted_questions.append({
-                "id": question_id,
-                "question": q.question_text,
-                "option_a": q.option_a,
-                "option_b": q.option_b,
-                "option_c": q.option_c,
-                "option_d": q.option_d,
-                "correct_answer": q.correct_answer,
-                "explanation": q.explanation,
-                "user_answer": None,
-                "is_correct": None
-            })
+            formatted_questions.append(question_ref(q, question_id))
             # Update usage count
             q.usage_count += 1
-            q.save(update_fields=['usage_count'])
+            q.save(update_fields=['usage_count', 'updated_at'])
             question_id += 1
         
         # ============================================
@@ -392,29 +426,25 @@ def generate_questions(request, attempt_id):
             while len(formatted_questions) < REQUIRED_QUESTIONS and retry_count < MAX_RETRIES:
                 retry_count += 1
                 
-                # Fetch concepts
-                concepts_qs = Concept.objects.filter(
-                    subcategory=quiz_attempt.subcategory,
-                    difficulty=quiz_attempt.difficulty
-                )
-                concept_names = list(concepts_qs.values_list('name', flat=True))
+                # Concepts come from the in-memory taxonomy (no query per retry)
+                concepts = taxonomy.concept_list(quiz_attempt.subcategory_id, quiz_attempt.difficulty)
                 
-                if len(concept_names) < questions_needed:
+                if len(concepts) < questions_needed:
                     break  # Not enough concepts, use what we have
                 
                 # Pick random concepts for new questions
-                selected_concepts = random.sample(concept_names, min(questions_needed, len(concept_names)))
+                selected_concepts = random.sample(concepts, min(questions_needed, len(concepts)))
                 
-                # Generate with AI
+                # Generate with AI (one question per concept, in order)
                 questions_data = generate_quiz_questions(
-                    topic=quiz_attempt.subcategory.name,
-                    category=quiz_attempt.category.name,
+                    topic=subcategory.name,
+                    category=subcategory.category.name,
                     difficulty=quiz_attempt.difficulty,
                     count=questions_needed,
-                    concepts=selected_concepts
+                    concepts=[name for _, name in selected_concepts]
                 )
                 
-                for q in questions_data:
+                for concept_index, q in enumerate(questions_data):
                     if len(formatted_questions) >= REQUIRED_QUESTIONS:
                         break
                     
@@ -428,8 +458,8 @@ def generate_questions(request, attempt_id):
                     
                     # Create new question in DB
                     question_obj = Question.objects.create(
-                        category=quiz_attempt.category,
-                        subcategory=quiz_attempt.subcategory,
+                        category_id=subcategory.category_id,
+                        subcategory_id=subcategory.pk,
                         difficulty=quiz_attempt.difficulty,
                         question_text=q["question"],
                         option_a=q["option_a"],
@@ -439,21 +469,11 @@ def generate_questions(request, attempt_id):
                         correct_answer=q["correct_answer"],
                         explanation=q.get("explanation", ""),
                         normalized_hash=q_hash,
+                        concept_id=selected_concepts[concept_index][0] if concept_index < len(selected_concepts) else None,
                         usage_count=1
                     )
                     
-                    formatted_questions.append({
-                        "id": question_id,
-                        "question": question_obj.question_text,
-                        "option_a": question_obj.option_a,
-                        "option_b": question_obj.option_b,
-                        "option_c": question_obj.option_c,
-                        "option_d": question_obj.option_d,
-                        "correct_answer": question_obj.correct_answer,
-                        "explanation": question_obj.explanation,
-                        "user_answer": None,
-                        "is_correct": None
-                    })
+                    formatted_questions.append(question_ref(question_obj, question_id))
                     question_id += 1
         
         # ============================================
@@ -461,7 +481,7 @@ def generate_questions(request, attempt_id):
         # ============================================
         if len(formatted_questions) < REQUIRED_QUESTIONS:
             quiz_attempt.status = QuizAttempt.STATUS_ABANDONED
-            quiz_attempt.save()
+            generation.release(quiz_attempt, token, ['status'])
             return JsonResponse({
                 'success': False,
                 'error': f'Could not generate enough unique questions. Got {len(formatted_questions)}/{REQUIRED_QUESTIONS}. Try again later.'
@@ -479,22 +499,26 @@ def generate_questions(request, attempt_id):
         # ============================================
         quiz_attempt.questions = formatted_questions
         quiz_attempt.status = QuizAttempt.STATUS_IN_PROGRESS
+        # The clock starts once the questions are ready
+        timing.start(quiz_attempt)
         quiz_attempt.ai_meta = {
             'model': 'gpt-3.5-turbo',
             'generated_at': timezone.now().isoformat(),
             'existing_used': sum(1 for q in formatted_questions if q.get('id')),
             'newly_generated': REQUIRED_QUESTIONS - sum(1 for q in formatted_questions if q.get('id'))
         }
-        quiz_attempt.save()
+        # Saved only while this request still holds the claim; if its lease
+        # ran out and another request took over, that one's result stands
+        if not generation.release(quiz_attempt, token, GENERATED_FIELDS):
+            quiz_attempt.refresh_from_db()
+            return generation_response(quiz_attempt)
+        record_served_questions(quiz_attempt)
 
-        return JsonResponse({
-            'success': True,
-            'redirect_url': f'/quiz/attempt/{quiz_attempt.id}/question/'
-        })
+        return generation_response(quiz_attempt)
 
     except Exception as e:
         quiz_attempt.status = QuizAttempt.STATUS_ABANDONED
-        quiz_attempt.save()
+        generation.release(quiz_attempt, token, ['status'])
 
         return JsonResponse({
             'success': False,
@@ -507,7 +531,7 @@ def show_question(request, attempt_id):
     """
     Show current question in the quiz
     """
-    quiz_attempt = get_object_or_404(QuizAttempt, id=attempt_id, user=request.user)
+    quiz_attempt = get_buffered_attempt_or_404(QuizAttempt, id=attempt_id, user=request.user)
     
     # Check if quiz is completed
     if quiz_attempt.status == QuizAttempt.STATUS_COMPLETED:
@@ -518,6 +542,15 @@ def show_question(request, attempt_id):
     
     if not current_question:
         return redirect('quizzes:quiz_results', attempt_id=quiz_attempt.id)
+
+    if quiz_attempt.status == QuizAttempt.STATUS_IN_PROGRESS:
+        # Time ran out while away: submit what was answered
+        if timing.is_expired(quiz_attempt):
+            finalize_quiz_attempt(quiz_attempt)
+            return redirect(f'/quiz/attempt/{quiz_attempt.id}/results/?auto_submitted=true')
+
+        # Coming back to a paused quiz opens a new timer session
+        save_progress(quiz_attempt, timing.resume(quiz_attempt))
     
     # Get the user's previous answer if they already answered this question
     current_idx = quiz_attempt.current_question_index
@@ -533,27 +566,9 @@ def show_question(request, attempt_id):
     
     # Calculate progress
     answered_count = sum(1 for q in quiz_attempt.questions if q.get('user_answer') is not None)
-    
-    # Calculate remaining time correctly
-    TIME_LIMIT_SECONDS = quiz_attempt.time_limit_seconds  # Use per-attempt limit (default 600)
-
-    # PRIORITY 1: Use frontend-saved remaining time (most accurate, saved on tab close)
-    if quiz_attempt.remaining_seconds is not None and quiz_attempt.remaining_seconds > 0:
-        remaining_seconds = quiz_attempt.remaining_seconds
-    else:
-        # PRIORITY 2: Fallback to server-side calculation
-        time_already_spent = quiz_attempt.time_spent_seconds or 0
-        
-        if quiz_attempt.started_at:
-            time_spent_current_session = int((timezone.now() - quiz_attempt.started_at).total_seconds())
-        else:
-            time_spent_current_session = 0
-            
-        total_time_spent = time_already_spent + time_spent_current_session
-        remaining_seconds = max(0, TIME_LIMIT_SECONDS - total_time_spent)
 
-    # Safety: Never go negative
-    remaining_seconds = max(0, remaining_seconds)
+    # Derived from the stored timer sessions; the page only counts down for display
+    remaining_seconds = timing.remaining_seconds(quiz_attempt)
 
     return render(request, "quizzes/quiz_question.html", {
         "quiz_attempt": quiz_attempt,
@@ -562,8 +577,8 @@ def show_question(request, attempt_id):
         "total_questions": quiz_attempt.total_questions,
         "answered_count": answered_count,
         "has_prev": quiz_attempt.current_question_index > 0,
-        "remaining_seconds": remaining_seconds,           # This is now 100% accurate
-        "time_already_spent": quiz_attempt.time_spent_seconds or 0,
+        "remaining_seconds": remaining_seconds,
+        "time_already_spent": timing.elapsed_seconds(quiz_attempt),
     })
 
 
@@ -574,7 +589,7 @@ def submit_answer(request, attempt_id):
     """
     Submit answer for current question
     """
-    quiz_attempt = get_object_or_404(QuizAttempt, id=attempt_id, user=request.user)
+    quiz_attempt = get_buffered_attempt_or_404(QuizAttempt, id=attempt_id, user=request.user)
     
     # Get user's answer
     user_answer = request.POST.get('answer', '').upper()
@@ -582,21 +597,40 @@ def submit_answer(request, attempt_id):
     if user_answer not in ['A', 'B', 'C', 'D']:
         return JsonResponse({'error': 'Invalid answer'}, status=400)
     
-    # Get current question
-    current_idx = quiz_attempt.current_question_index
-    
-    if current_idx >= len(quiz_attempt.questions):
+    # The question being answered: sent by the page, so a repeated click
+    # answers the same question again instead of the next one
+    try:
+        current_idx = int(request.POST.get('question_index', quiz_attempt.current_question_index))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid question'}, status=400)
+
+    if not 0 <= current_idx < len(quiz_attempt.questions):
         return JsonResponse({'error': 'No more questions'}, status=400)
+
+    # The server's clock decides: answers after the time limit are not counted
+    if (quiz_attempt.status == QuizAttempt.STATUS_IN_PROGRESS
+            and timing.is_expired(quiz_attempt, grace=timing.TIMER_GRACE_SECONDS)):
+        finalize_quiz_attempt(quiz_attempt)
+        return JsonResponse({
+            'success': True,
+            'completed': True,
+            'redirect_url': f'/quiz/attempt/{quiz_attempt.id}/results/?auto_submitted=true'
+        })
     
-    # Update question with user's answer
-    quiz_attempt.questions[current_idx]['user_answer'] = user_answer
-    quiz_attempt.questions[current_idx]['is_correct'] = (
-        user_answer == quiz_attempt.questions[current_idx]['correct_answer']
-    )
-    
-    # Move to next question
-    quiz_attempt.current_question_index += 1
-    quiz_attempt.save()
+    # Grade against the served version and move to the next question, with a
+    # conditional UPDATE that retries if another request wrote first
+    try:
+        graded = submit_answers(quiz_attempt, [(current_idx, user_answer)], advance=True)
+    except AnswerConflict:
+        return JsonResponse({'error': 'Answer not saved, please try again'}, status=409)
+    if graded is None:
+        return JsonResponse({
+            'success': True,
+            'completed': True,
+            'redirect_url': f'/quiz/attempt/{quiz_attempt.id}/results/'
+        })
+
+    record_graded_concepts(request.user.id, graded)
     
     # Check if quiz is complete
     if quiz_attempt.is_quiz_complete():
@@ -622,7 +656,7 @@ def auto_submit_quiz(request, attempt_id):
     Auto-submit quiz when timer expires
     Marks all unanswered questions as attempted but incorrect
     """
-    quiz_attempt = get_object_or_404(QuizAttempt, id=attempt_id, user=request.user)
+    quiz_attempt = get_buffered_attempt_or_404(QuizAttempt, id=attempt_id, user=request.user)
     
     # Mark quiz as completed
     finalize_quiz_attempt(quiz_attempt)
@@ -635,9 +669,9 @@ def auto_submit_quiz(request, attempt_id):
 @login_required
 def quiz_results(request, attempt_id):
     """
-    Show quiz results with score and review
+    Show quiz results with score and review (archived attempts included)
     """
-    quiz_attempt = get_object_or_404(QuizAttempt, id=attempt_id, user=request.user)
+    quiz_attempt = get_attempt_or_404(request.user, attempt_id)
     
     # Calculate results
     total = len(quiz_attempt.questions) if quiz_attempt.questions else 0
@@ -659,17 +693,31 @@ def quiz_results(request, attempt_id):
     
     # Check if this was an auto-submit
     auto_submitted = request.GET.get('auto_submitted') == 'true'
+
+    # "Better than X%" from the precomputed score distribution
+    percentile = None
+    if quiz_attempt.status == QuizAttempt.STATUS_COMPLETED:
+        percentile = percentile_rank(quiz_attempt.subcategory_id, quiz_attempt.difficulty, quiz_attempt.score)
     
     return render(request, "quizzes/quiz_results.html", {
         "quiz_attempt": quiz_attempt,
+        "questions": quiz_attempt.hydrated_questions(),
         "total": total,
         "correct": correct,
         "incorrect": incorrect,
         "percentage": percentage,
         "grade": grade,
         "auto_submitted": auto_submitted,
+        "percentile": percentile,
     })
 
+# Everything finalizing changes, plus the buffered progress it flushes
+FINALIZE_FIELDS = [
+    'attempted_questions', 'correct_answers', 'score', 'time_taken_seconds',
+    'completed_at', 'status', 'current_question_index', *timing.TIMER_FIELDS,
+]
+
+
 def finalize_quiz_attempt(quiz_attempt):
     """
     Finalize quiz attempt:
@@ -677,150 +725,90 @@ def finalize_quiz_attempt(quiz_attempt):
     - calculate score
     - calculate time spent & time taken correctly
     - mark completed
-    """
-
-    questions = quiz_attempt.questions or []
 
-    attempted = 0
-    correct = 0
+    Written with the same version check as answers (answering.py): if an
+    answer (or another finish) got there first, the attempt is read again
+    and graded from scratch. Returns ``True`` if this call completed the
+    attempt, ``False`` if it was no longer in progress.
+    """
+    for retry in range(MAX_RETRIES):
+        if retry:
+            reload_attempt(quiz_attempt, timing.TIMER_FIELDS)
+        if quiz_attempt.status != QuizAttempt.STATUS_IN_PROGRESS:
+            return False
 
-    for q in questions:
-        if q.get("user_answer") is not None:
-            attempted += 1
-            if q.get("is_correct") is True:
-                correct += 1
+        questions = quiz_attempt.questions or []
 
-    quiz_attempt.attempted_questions = attempted
-    quiz_attempt.correct_answers = correct
+        attempted = 0
+        correct = 0
 
-    quiz_attempt.score = (
-        (correct / quiz_attempt.total_questions) * 100
-        if quiz_attempt.total_questions > 0 else 0
-    )
+        for q in questions:
+            if q.get("user_answer") is not None:
+                attempted += 1
+                if q.get("is_correct") is True:
+                    correct += 1
 
-    now_time = timezone.now()
+        quiz_attempt.attempted_questions = attempted
+        quiz_attempt.correct_answers = correct
 
-    # 🔥 FIX: Flush current session time into time_spent_seconds
-    if quiz_attempt.started_at and not quiz_attempt.paused_at:
-        quiz_attempt.time_spent_seconds += int(
-            (now_time - quiz_attempt.started_at).total_seconds()
+        quiz_attempt.score = (
+            (correct / quiz_attempt.total_questions) * 100
+            if quiz_attempt.total_questions > 0 else 0
         )
 
-    # Finalize timing
-    quiz_attempt.time_taken_seconds = quiz_attempt.time_spent_seconds
+        now_time = timezone.now()
 
-    quiz_attempt.completed_at = now_time
-    quiz_attempt.status = QuizAttempt.STATUS_COMPLETED
+        # Close the timer; a second finalize finds no open session to add
+        timing.stop(quiz_attempt, now_time)
+        quiz_attempt.time_taken_seconds = quiz_attempt.time_spent_seconds
 
-    # Prevent double-counting if finalize is called again
-    quiz_attempt.started_at = None
-    quiz_attempt.paused_at = None
+        quiz_attempt.completed_at = now_time
+        quiz_attempt.status = QuizAttempt.STATUS_COMPLETED
 
-    quiz_attempt.save()
+        # Only the request that moves the attempt to completed writes it, so
+        # the daily rollups count it once even when two finish it together.
+        # The answers themselves are only written by answering.py
+        if save_versioned(quiz_attempt, FINALIZE_FIELDS):
+            mark_flushed(quiz_attempt)
+            record_completed_attempt(quiz_attempt)
+            return True
 
-# streak
-def calculate_streak(user):
-    """
-    Calculate consecutive-day quiz streak for a user.
-    """
-    streak = 0
-    today = timezone.now().date()
-
-    while True:
-        # Calculate the date we are checking
-        check_date = today - timedelta(days=streak)
-
-        # Start & end time of that day
-        day_start = timezone.make_aware(
-            datetime.combine(check_date, datetime.min.time())
-        )
-        day_end = timezone.make_aware(
-            datetime.combine(check_date, datetime.max.time())
-        )
-
-        # Check if user attempted any quiz on that day
-        attempted = QuizAttempt.objects.filter(
-            user=user,
-            started_at__range=(day_start, day_end)
-        ).exists()
-
-        if attempted:
-            streak += 1
-        else:
-            break
-
-    return streak
+    raise AnswerConflict(f'Attempt {quiz_attempt.pk} changed {MAX_RETRIES} times while finishing')
 
 # Performance Analysis and AI-Feedback 
 @login_required
 def performance_dashboard(request):
     request.session.pop("ai_feedback", None)
 
-    user = request.user
-
-    completed_qs = QuizAttempt.objects.filter(
-        user=user,
-        status=QuizAttempt.STATUS_COMPLETED
-    )
+    summary = get_request_summary(request)
 
     # ---------------------------
     # 1. OVERALL STATS
     # ---------------------------
-    overall = completed_qs.aggregate(
-        total_quizzes=Count('id'),
-        avg_score=Avg('score'),          
-        total_correct=Sum('correct_answers'),
-        total_attempted=Sum('attempted_questions'),
-        total_time=Sum('time_taken_seconds')
-    )
-
-    overall_accuracy = (
-        (overall['total_correct'] / overall['total_attempted']) * 100
-        if overall['total_attempted']
-        else 0
-    )
-
-    avg_time_per_question = (
-        overall['total_time'] / overall['total_attempted']
-        if overall['total_attempted']
-        else 0
-    )
+    overall = summary.overall
+    overall_accuracy = overall['overall_accuracy']
+    avg_time_per_question = overall['avg_time_per_question']
 
     # ---------------------------
     # 2. CATEGORY-WISE DISTRIBUTION
     # ---------------------------
-    category_distribution = (
-        completed_qs
-        .exclude(category__isnull=True)
-        .values('category__name')        
-        .annotate(quiz_count=Count('id'))
-        .order_by('-quiz_count')
+    category_distribution = sorted(
+        (
+            {'category__name': c['category__name'], 'quiz_count': c['quizzes']}
+            for c in summary.categories
+            if c['category__name'] is not None
+        ),
+        key=lambda c: c['quiz_count'],
+        reverse=True
     )
 
     # ---------------------------
     # 3. SUBCATEGORY-WISE ACCURACY
     # ---------------------------
-    subcategory_stats = (
-        completed_qs
-        .exclude(subcategory__isnull=True)
-        .values('subcategory__name')
-        .annotate(
-            correct=Sum('correct_answers'),
-            attempted=Sum('attempted_questions')
-        )
-    )
-
-    subcategory_accuracy = []
-    for item in subcategory_stats:
-        accuracy = (
-            (item['correct'] / item['attempted']) * 100
-            if item['attempted']
-            else 0
-        )
-        subcategory_accuracy.append({
-            'subcategory': item['subcategory__name'],
-            'accuracy': round(accuracy, 2)
-        })
+    subcategory_accuracy = [
+        {'subcategory': s['subcategory'], 'accuracy': s['accuracy']}
+        for s in summary.subcategories
+    ]
 
     # ---------------------------
     # STRONG vs WEAK TOPICS
@@ -837,23 +825,12 @@ def performance_dashboard(request):
     # ---------------------------
     # 4. DIFFICULTY-WISE PERFORMANCE
     # ---------------------------
-    difficulty_performance = completed_qs.values(
-        'difficulty'
-    ).annotate(
-        avg_score=Avg('score')
-    )
+    difficulty_performance = overall['difficulty']
 
     # ---------------------------
     # 5. PERFORMANCE OVER TIME
     # ---------------------------
-    performance_over_time = (
-        completed_qs
-        .exclude(completed_at__isnull=True)
-        .annotate(date=TruncDate('completed_at'))
-        .values('date')
-        .annotate(avg_score=Avg('score'))
-        .order_by('date')
-    )
+    performance_over_time = summary.performance_over_time
 
     # ---------------------------
     # 6. INSIGHTS
@@ -875,7 +852,7 @@ def performance_dashboard(request):
     # ---------------------------
     # 7. AI-GENERATED FEEDBACK 
     # ---------------------------
-    total_quizzes = overall['total_quizzes'] or 0
+    total_quizzes = overall['total_completed']
 
     if total_quizzes == 0:
         ai_feedback = (
@@ -887,21 +864,13 @@ def performance_dashboard(request):
             d['difficulty']: round(d['avg_score'] or 0, 2)
             for d in difficulty_performance
         }
-        weak_concepts = []
-
-        for wt in weak_topics:
-            concepts = Concept.objects.filter(
-                subcategory__name=wt['subcategory']
-            ).values_list('name', flat=True)
-
-            weak_concepts.extend(list(concepts[:5]))  # limit per topic
         ai_summary = {
             "overall_accuracy": round(overall_accuracy, 2),
             "avg_time_per_question": round(avg_time_per_question, 2),
             "difficulty_performance": difficulty_map,
             "strong_topics": [t['subcategory'] for t in strong_topics],
             "weak_topics": [t['subcategory'] for t in weak_topics],
-            "weak_concepts": weak_concepts,
+            "weak_concepts": weak_concepts(request.user),
         }
 
         if not request.session.get("ai_feedback"):
@@ -916,7 +885,7 @@ def performance_dashboard(request):
         ai_feedback = request.session["ai_feedback"]
 
     # streak
-    streak = calculate_streak(request.user)
+    streak = summary.streak
 
     # ---------------------------
     # FINAL CONTEXT
@@ -943,141 +912,54 @@ def performance_dashboard(request):
 
 
 @login_required
-def download_performance_pdf(request):
-    user = request.user
-
-    completed_qs = QuizAttempt.objects.filter(
-        user=user,
-        status=QuizAttempt.STATUS_COMPLETED
-    )
-
-    overall = completed_qs.aggregate(
-        total_quizzes=Count('id'),
-        avg_score=Avg('score'),
-        total_correct=Sum('correct_answers'),
-        total_attempted=Sum('attempted_questions'),
-    )
+def performance_series_api(request):
+    """
+    JSON series for the performance-over-time chart.
 
-    overall_accuracy = (
-        (overall['total_correct'] / overall['total_attempted']) * 100
-        if overall['total_attempted'] else 0
-    )
+    Query params:
+        - bucket: 'day' (default), 'week' or 'month'
+        - points: maximum number of points (downsampled with LTTB, 3 to 120)
+    """
+    bucket = request.GET.get('bucket', 'day')
+    if bucket not in SERIES_BUCKETS:
+        return JsonResponse({'error': 'Invalid bucket'}, status=400)
 
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = (
-        'attachment; filename="AI_Quiz_Hub_Performance_Report.pdf"'
-    )
+    try:
+        max_points = min(
+            max(int(request.GET.get('points', SERIES_MAX_POINTS)), SERIES_MIN_POINTS), SERIES_MAX_POINTS
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid points'}, status=400)
 
-    doc = SimpleDocTemplate(
-        response,
-        pagesize=A4,
-        rightMargin=36,
-        leftMargin=36,
-        topMargin=36,
-        bottomMargin=36
-    )
+    series = performance_series(request.user, bucket=bucket, max_points=max_points)
 
-    styles = getSampleStyleSheet()
-    elements = []
+    return JsonResponse({
+        'bucket': bucket,
+        'labels': [p['date'].isoformat() for p in series],
+        'avg_scores': [round(p['avg_score'], 2) for p in series],
+        'attempts': [p['attempts'] for p in series],
+    })
 
-    # ---------------- HEADER ----------------
-    title_style = ParagraphStyle(
-        name="TitleStyle",
-        fontSize=20,
-        alignment=1,
-        spaceAfter=10,
-        textColor=colors.HexColor("#1f2937")
-    )
 
-    subtitle_style = ParagraphStyle(
-        name="SubtitleStyle",
-        fontSize=12,
-        alignment=1,
-        spaceAfter=20,
-        textColor=colors.grey
-    )
+@login_required
+def download_performance_pdf(request):
+    """
+    Serve the cached performance PDF, queueing a background render when the
+    user's stats have changed since the stored copy was built.
+    """
+    summary = get_request_summary(request)
+    data = build_report_data(request.user, summary)
+    stats_key = report_stats_key(data)
 
-    elements.append(Paragraph("AI Quiz Hub", title_style))
-    elements.append(Paragraph("Performance Report", subtitle_style))
-
-    # ---------------- USER INFO ----------------
-    elements.append(Spacer(1, 10))
-    elements.append(Paragraph("<b>User Information</b>", styles['Heading2']))
-    elements.append(Spacer(1, 6))
-
-    elements.append(Paragraph(
-        f"<b>Username:</b> {user.username}", styles['Normal']
-    ))
-    elements.append(Paragraph(
-        f"<b>Generated on:</b> {now().strftime('%d %b %Y')}", styles['Normal']
-    ))
-
-    elements.append(Spacer(1, 16))
-
-    # ---------------- SUMMARY ----------------
-    elements.append(Paragraph("<b>Performance Summary</b>", styles['Heading2']))
-    elements.append(Spacer(1, 8))
-
-    summary_table = Table([
-        ["Total Quizzes Attempted", overall['total_quizzes'] or 0],
-        ["Average Score", f"{round(overall['avg_score'] or 0, 2)} %"],
-        ["Overall Accuracy", f"{round(overall_accuracy, 2)} %"],
-    ], colWidths=[250, 150])
-
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.whitesmoke),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('FONT', (0,0), (-1,-1), 'Helvetica'),
-        ('ALIGN', (1,0), (1,-1), 'RIGHT'),
-        ('PADDING', (0,0), (-1,-1), 8),
-    ]))
-
-    elements.append(summary_table)
-    elements.append(Spacer(1, 20))
-
-    # ---------------- TOPIC TABLE ----------------
-    elements.append(Paragraph("<b>Topic-wise Accuracy</b>", styles['Heading2']))
-    elements.append(Spacer(1, 8))
-
-    topic_data = [["Topic", "Accuracy (%)"]]
-
-    subcategory_stats = completed_qs.values(
-        'subcategory__name'
-    ).annotate(
-        correct=Sum('correct_answers'),
-        attempted=Sum('attempted_questions')
-    )
+    report = PerformanceReport.objects.filter(user=request.user).first()
+    if report and report.is_current(stats_key):
+        return serve_report(request, report)
 
-    for item in subcategory_stats:
-        if item['attempted']:
-            acc = round((item['correct'] / item['attempted']) * 100, 2)
-            topic_data.append([item['subcategory__name'], acc])
-
-    topic_table = Table(topic_data, colWidths=[300, 100])
-    topic_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#e5e7eb")),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('ALIGN', (1,1), (1,-1), 'RIGHT'),
-        ('FONT', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('PADDING', (0,0), (-1,-1), 8),
-    ]))
-
-    elements.append(topic_table)
-
-    # ---------------- FOOTER ----------------
-    elements.append(Spacer(1, 30))
-    elements.append(Paragraph(
-        "This report is generated automatically by AI Quiz Hub.",
-        ParagraphStyle(
-            name="Footer",
-            fontSize=9,
-            alignment=1,
-            textColor=colors.grey
-        )
-    ))
+    report = request_report(request.user, data, stats_key)
 
-    doc.build(elements)
-    return response
+    return render(request, 'quizzes/report_pending.html', {
+        'report': report,
+    }, status=202)
 
 # RECENT QUIZZES
 @login_required
@@ -1088,14 +970,116 @@ def recent_quizzes_view(request):
             user=request.user,
             status=QuizAttempt.STATUS_COMPLETED
         )
-        .select_related('subcategory')
+        .slim()
+        .select_related('category', 'subcategory')
         .order_by('-completed_at')[:10]
     )
 
+    for quiz in recent_quizzes:
+        quiz.percentile = percentile_rank(quiz.subcategory_id, quiz.difficulty, quiz.score)
+
     return render(request, 'quizzes/recent_quizzes.html', {
         'recent_quizzes': recent_quizzes
     })
 
+@login_required
+def history_view(request):
+    """Browse the full attempt history, one keyset page at a time."""
+    try:
+        lookups = parse_history_filters(request.GET)
+    except ValueError as e:
+        lookups = {}
+        error = str(e)
+    else:
+        error = None
+
+    try:
+        attempts, next_cursor = history_page(
+            request.user, lookups, cursor=request.GET.get('cursor')
+        )
+    except ValueError:
+        # Stale or tampered cursor: start again from the newest attempt
+        attempts, next_cursor = history_page(request.user, lookups)
+
+    filters = request.GET.copy()
+    filters.pop('cursor', None)
+
+    return render(request, 'quizzes/history.html', {
+        'attempts': attempts,
+        'next_cursor': next_cursor,
+        'filters': filters,
+        'filter_query': filters.urlencode(),
+        'subcategories': history_subcategories(request.user),
+        'error': error,
+    })
+
+@login_required
+def history_api(request):
+    """
+    JSON attempt history with keyset pagination.
+
+    Query params:
+        - cursor: ``next_cursor`` from the previous page
+        - limit: page size (max 100)
+        - subcategory, difficulty, status ('completed' / 'abandoned')
+        - from, to: inclusive date range (YYYY-MM-DD)
+    """
+    try:
+        lookups = parse_history_filters(request.GET)
+        limit = int(request.GET.get('limit', HISTORY_PAGE_SIZE))
+        if not 1 <= limit <= HISTORY_MAX_PAGE_SIZE:
+            raise ValueError('Invalid limit')
+        attempts, next_cursor = history_page(
+            request.user, lookups, cursor=request.GET.get('cursor'), page_size=limit
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'results': [
+            {
+                'id': str(a['id']),
+                'completed_at': a['completed_at'].isoformat(),
+                'category': a['category__name'],
+                'subcategory': a['subcategory__name'],
+                'difficulty': a['difficulty'],
+                'status': a['status_label'],
+                'score': a['score'],
+                'correct_answers': a['correct_answers'],
+                'total_questions': a['total_questions'],
+                'time_taken_seconds': a['time_taken_seconds'],
+            }
+            for a in attempts
+        ],
+        'next_cursor': next_cursor,
+    })
+
+@login_required
+def export_history(request):
+    """
+    Stream the user's full attempt history.
+
+    Query params:
+        - format: 'csv' (default) or 'ndjson'
+        - detail: '1' to include every question and answer
+    """
+    export_format = request.GET.get('format', 'csv')
+    detail = request.GET.get('detail') == '1'
+
+    if export_format == 'csv':
+        rows = stream_csv(request.user, detail=detail)
+        content_type = 'text/csv'
+    elif export_format == 'ndjson':
+        rows = stream_ndjson(request.user, detail=detail)
+        content_type = 'application/x-ndjson'
+    else:
+        return JsonResponse({'error': 'Invalid format'}, status=400)
+
+    response = StreamingHttpResponse(rows, content_type=content_type)
+    filename = f"quiz_history_{timezone.now():%Y%m%d}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @login_required
 def attempts_summary_view(request):
     user = request.user
@@ -1110,6 +1094,15 @@ def attempts_summary_view(request):
         abandoned=Count('id', filter=Q(status=QuizAttempt.STATUS_ABANDONED)),
     )
 
+    # Attempts moved to the archive still count
+    archived = ArchivedRollup.objects.filter(user=user).aggregate(
+        completed=Sum('attempts', filter=Q(status=QuizAttempt.STATUS_COMPLETED)),
+        abandoned=Sum('attempts', filter=Q(status=QuizAttempt.STATUS_ABANDONED)),
+    )
+    for key in ('completed', 'abandoned'):
+        status_counts[key] += archived[key] or 0
+    total_attempts += (archived['completed'] or 0) + (archived['abandoned'] or 0)
+
     # last_7_days_attempts = QuizAttempt.objects.filter(
     #     user=user,
     #     started_at__gte=now() - timedelta(days=7)
@@ -1146,22 +1139,22 @@ def leaderboard(request):
 
 @login_required
 @require_POST
-def save_timer(request, attempt_id):
-    try:
-        attempt = get_object_or_404(QuizAttempt, id=attempt_id, user=request.user)
-        
-        if attempt.status != QuizAttempt.STATUS_IN_PROGRESS:
-            return JsonResponse({'status': 'ignored'})
+def pause_timer(request, attempt_id):
+    """
+    Pause the timer when the taker leaves the quiz page (sent as a beacon).
 
-        remaining = request.POST.get('remaining_seconds')
-        if remaining is not None:
-            attempt.remaining_seconds = int(remaining)
-            
-            # Also update time_spent_seconds to keep both in sync
-            attempt.time_spent_seconds = attempt.time_limit_seconds - int(remaining)
-            
-            attempt.save(update_fields=['remaining_seconds', 'time_spent_seconds'])
-        
-        return JsonResponse({'status': 'saved'})
-    except:
-        return JsonResponse({'status': 'error'}, status=400)
\ No newline at end of file
+    Moving between questions does not call this, so a quiz taken in one
+    sitting writes no timer updates at all.
+    """
+    attempt = get_buffered_attempt_or_404(QuizAttempt.objects.slim(), id=attempt_id, user=request.user)
+
+    if attempt.status != QuizAttempt.STATUS_IN_PROGRESS:
+        return JsonResponse({'status': 'ignored'})
+
+    # Pausing always writes through, with any buffered progress
+    flush_progress(attempt, timing.pause(attempt))
+
+    return JsonResponse({
+        'status': 'paused',
+        'remaining_seconds': timing.remaining_seconds(attempt),
+    })
\ No newline at end of file
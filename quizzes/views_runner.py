@@ -0,0 +1,216 @@
+# quizzes/views_runner.py
+"""
+Single-page quiz runner and the JSON API behind it.
+
+The runner page embeds the whole attempt (questions without answer keys,
+saved answers, remaining time) in its first response and renders each
+question in the browser, so moving between questions costs no requests.
+Answers are posted to ``attempt_answers_api`` in batches; a ten-question
+quiz typically takes the page load plus two POSTs, instead of a render,
+an answer POST and a redirect per question.
+
+Grading, timing and progress go through the same helpers as the classic
+per-question pages (``grade_answers``, ``timing``, ``write_buffer``), so
+both can be used on the same attempt.
+"""
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_GET, require_POST
+
+from . import timing
+from .answering import AnswerConflict, record_graded_concepts, submit_answers
+from .models import QuizAttempt
+from .question_refs import hydrate_questions
+from .views import finalize_quiz_attempt
+from .write_buffer import flush_progress, get_buffered_attempt_or_404, save_progress
+
+ANSWER_CHOICES = ('A', 'B', 'C', 'D')
+
+# Answers the runner collects before posting them
+RUNNER_ANSWER_BATCH = 5
+
+# Fields sent to the browser; answer keys and explanations stay on the server
+CLIENT_QUESTION_FIELDS = ('question', 'option_a', 'option_b', 'option_c', 'option_d', 'user_answer')
+
+
+def _results_url(attempt, auto_submitted=False):
+    url = f'/quiz/attempt/{attempt.id}/results/'
+    return url + '?auto_submitted=true' if auto_submitted else url
+
+
+def _open_attempt(attempt):
+    """
+    Resume the timer of an attempt being opened, or finalize it when its
+    time ran out. Returns ``False`` if it can no longer be taken.
+    """
+    if attempt.status != QuizAttempt.STATUS_IN_PROGRESS or not attempt.questions:
+        return False
+    if timing.is_expired(attempt):
+        finalize_quiz_attempt(attempt)
+        return False
+    save_progress(attempt, timing.resume(attempt))
+    return True
+
+
+def attempt_payload(attempt):
+    """Everything the runner needs to take ``attempt``, without answer keys."""
+    questions = [
+        {'index': index, **{field: q.get(field) for field in CLIENT_QUESTION_FIELDS}}
+        for index, q in enumerate(hydrate_questions(attempt.questions or []))
+    ]
+    return {
+        'id': str(attempt.id),
+        'status': attempt.get_status_display(),
+        'category': attempt.category.name if attempt.category_id else None,
+        'subcategory': attempt.subcategory.name if attempt.subcategory_id else None,
+        'difficulty': attempt.difficulty,
+        'total_questions': len(questions),
+        'current_index': min(attempt.current_question_index, max(len(questions) - 1, 0)),
+        'remaining_seconds': timing.remaining_seconds(attempt),
+        'answer_batch_size': RUNNER_ANSWER_BATCH,
+        'questions': questions,
+    }
+
+
+@login_required
+def quiz_runner(request, attempt_id):
+    """The single-page runner, with the attempt embedded in the page."""
+    attempt = get_buffered_attempt_or_404(
+        QuizAttempt.objects.select_related('category', 'subcategory'),
+        id=attempt_id, user=request.user,
+    )
+    if not _open_attempt(attempt):
+        if attempt.status == QuizAttempt.STATUS_GENERATING:
+            return redirect('quizzes:dashboard')
+        return redirect(_results_url(attempt))
+
+    return render(request, 'quizzes/quiz_runner.html', {
+        'quiz_attempt': attempt,
+        'payload': attempt_payload(attempt),
+        'total_questions': attempt.total_questions,
+        'remaining_seconds': timing.remaining_seconds(attempt),
+    })
+
+
+@login_required
+@require_GET
+def attempt_api(request, attempt_id):
+    """
+    GET the attempt as JSON (same payload the runner page embeds).
+
+    Finished attempts return ``completed`` and the results URL instead.
+    """
+    attempt = get_buffered_attempt_or_404(
+        QuizAttempt.objects.select_related('category', 'subcategory'),
+        id=attempt_id, user=request.user,
+    )
+    if not _open_attempt(attempt):
+        return JsonResponse({'completed': True, 'redirect_url': _results_url(attempt)})
+    return JsonResponse(attempt_payload(attempt))
+
+
+def _parse_answers(body, question_count):
+    """Validate the POST body; raises ``ValueError`` with a client-facing message."""
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        raise ValueError('Invalid JSON')
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+
+    answers = data.get('answers', [])
+    if not isinstance(answers, list):
+        raise ValueError('"answers" must be a list')
+
+    parsed = {}
+    for item in answers:
+        if not isinstance(item, dict):
+            raise ValueError('Each answer must be an object')
+        index, answer = item.get('index'), str(item.get('answer', '')).upper()
+        if not isinstance(index, int) or not 0 <= index < question_count:
+            raise ValueError('Invalid question index')
+        if answer not in ANSWER_CHOICES:
+            raise ValueError('Invalid answer')
+        parsed[index] = answer   # the last answer to a question wins
+
+    position = data.get('position')
+    if position is not None and (not isinstance(position, int) or not 0 <= position < question_count):
+        raise ValueError('Invalid position')
+
+    return list(parsed.items()), position, bool(data.get('pause')), bool(data.get('finish'))
+
+
+@login_required
+@require_POST
+def attempt_answers_api(request, attempt_id):
+    """
+    Save one or more answers in one request.
+
+    Body: ``{"answers": [{"index": 0, "answer": "B"}, ...], "position": 1,
+    "pause": false, "finish": false}``; every key is optional. ``position``
+    is the question on screen, ``pause`` stops the timer (the page is being
+    left) and ``finish`` ends the quiz. The quiz also ends once every
+    question is answered. Answers are graded on the server but the result
+    is only revealed on the results page.
+    """
+    attempt = get_buffered_attempt_or_404(QuizAttempt, id=attempt_id, user=request.user)
+
+    if attempt.status != QuizAttempt.STATUS_IN_PROGRESS:
+        return JsonResponse({
+            'error': 'Quiz is not in progress',
+            'completed': True,
+            'redirect_url': _results_url(attempt),
+        }, status=409)
+
+    try:
+        answers, position, pause, finish = _parse_answers(request.body, len(attempt.questions or []))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    # The server's clock decides: answers after the time limit are not counted
+    if timing.is_expired(attempt, grace=timing.TIMER_GRACE_SECONDS):
+        finalize_quiz_attempt(attempt)
+        return JsonResponse({
+            'success': True,
+            'saved': 0,
+            'completed': True,
+            'redirect_url': _results_url(attempt, auto_submitted=True),
+        })
+
+    if answers:
+        # Conditional UPDATE of the answers, retried if another request
+        # (a second tab) wrote first; see answering.py
+        try:
+            graded = submit_answers(attempt, answers, position=position)
+        except AnswerConflict:
+            return JsonResponse({'error': 'Answers not saved, please try again'}, status=409)
+        if graded is None:
+            return JsonResponse({'completed': True, 'redirect_url': _results_url(attempt)})
+        record_graded_concepts(request.user.id, graded)
+
+    # Moving without answering is buffered like the per-question pages do
+    moved = []
+    if position is not None and not answers:
+        attempt.current_question_index = position
+        moved = ['current_question_index']
+
+    if pause:
+        flush_progress(attempt, timing.pause(attempt) + moved)
+    else:
+        save_progress(attempt, moved)
+
+    completed = finish or attempt.is_quiz_complete()
+    if completed:
+        finalize_quiz_attempt(attempt)
+
+    return JsonResponse({
+        'success': True,
+        'saved': len(answers),
+        'answered_count': sum(1 for q in attempt.questions if q.get('user_answer') is not None),
+        'completed': completed,
+        'redirect_url': _results_url(attempt) if completed else None,
+        'remaining_seconds': timing.remaining_seconds(attempt),
+    })
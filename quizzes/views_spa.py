@@ -2,10 +2,16 @@
 """
 SPA views for dynamic quiz category selection.
 """
-from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.shortcuts import render
+from django.http import HttpResponse, JsonResponse
 from django.contrib.auth.decorators import login_required
-from .models import Category, SubCategory
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_GET
+from .search import MAX_SEARCH_LIMIT, SEARCH_LIMIT, result_json, search_index
+from .taxonomy import get_category_or_404, get_subcategory_or_404, snapshot, tree_document
+
+# A tree requested by its ETag (?v=...) never changes
+TREE_IMMUTABLE_CACHE = 'private, max-age=31536000, immutable'
 
 
 @login_required
@@ -13,9 +19,11 @@ def quiz_selector_view(request):
     """
     Render the SPA template with initial categories.
     """
-    categories = Category.objects.all().order_by('name')
+    categories = snapshot().categories
+    tree_etag, _ = tree_document()
     return render(request, 'quizzes/quiz_selector.html', {
-        'categories': categories
+        'categories': categories,
+        'tree_etag': tree_etag,
     })
 
 
@@ -40,43 +48,88 @@ def get_children_ajax(request):
     if not node_type or not node_id:
         return JsonResponse({'error': 'Missing parameters'}, status=400)
     
-    children = []
-    parent_name = ""
-    
+    # Served from the in-memory taxonomy (see taxonomy.py)
+    taxonomy = snapshot()
     if node_type == 'category':
-        # Get level-1 subcategories for this category
-        category = get_object_or_404(Category, id=node_id)
+        # Level-1 subcategories of this category
+        category = get_category_or_404(node_id)
         parent_name = category.name
-        subcats = SubCategory.objects.filter(
-            category=category,
-            parent_subcat__isnull=True
-        ).order_by('name')
-        
-        for sub in subcats:
-            children.append({
-                'id': sub.id,
-                'name': sub.name,
-                'is_leaf': sub.is_leaf,
-                'description': sub.description or ''
-            })
-    
+        subcats = taxonomy.roots[category.pk]
     elif node_type == 'subcategory':
-        # Get child subcategories for this subcategory
-        parent_sub = get_object_or_404(SubCategory, id=node_id)
+        # Child subcategories of this subcategory
+        parent_sub = get_subcategory_or_404(node_id)
         parent_name = parent_sub.name
-        child_subs = SubCategory.objects.filter(
-            parent_subcat=parent_sub
-        ).order_by('name')
-        
-        for sub in child_subs:
-            children.append({
-                'id': sub.id,
-                'name': sub.name,
-                'is_leaf': sub.is_leaf,
-                'description': sub.description or ''
-            })
+        subcats = taxonomy.children[parent_sub.pk]
+    else:
+        parent_name, subcats = "", []
+
+    children = [
+        {
+            'id': sub.id,
+            'name': sub.name,
+            'is_leaf': sub.is_leaf,
+            'description': sub.description or ''
+        }
+        for sub in subcats
+    ]
     
     return JsonResponse({
         'children': children,
         'parent_name': parent_name
     })
+
+
+@login_required
+@require_GET
+def category_tree_api(request):
+    """
+    The whole Category/SubCategory tree as one JSON document (see taxonomy.py).
+
+    Query params:
+        - concepts: 1 to include concept counts per topic
+        - v: the ETag the caller expects; when it matches, the response may
+          be cached for a year
+
+    Answers ``If-None-Match`` with 304 Not Modified.
+    """
+    etag, body = tree_document(include_concepts=request.GET.get('concepts') == '1')
+    quoted = f'"{etag}"'
+
+    response = get_conditional_response(request, etag=quoted)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = quoted
+    response['Cache-Control'] = (
+        TREE_IMMUTABLE_CACHE if request.GET.get('v') == etag else 'private, no-cache'
+    )
+    return response
+
+
+@login_required
+@require_GET
+def search_api(request):
+    """
+    Categories, topics and concepts matching what the user typed (see search.py).
+
+    Query params:
+        - q: the text typed so far
+        - limit: number of results (default 10, at most 25)
+
+    Returns JSON:
+        {
+            "query": "deadl",
+            "results": [{"type": "concept", "id": 7, "name": "Deadlock",
+                         "path": "Academics › Engineering › Operating Systems",
+                         "difficulty": "medium", "leaf": true,
+                         "trail": [{"type": "category", "id": 1}, ...],
+                         "url": "/quiz/subcategory/31/instructions/medium/"}, ...]
+        }
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', SEARCH_LIMIT)), 1), MAX_SEARCH_LIMIT)
+    except ValueError:
+        limit = SEARCH_LIMIT
+
+    results = [result_json(entry) for entry in search_index().search(query, limit)] if query else []
+    return JsonResponse({'query': query, 'results': results})
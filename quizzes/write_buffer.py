@@ -0,0 +1,141 @@
+# quizzes/write_buffer.py
+"""
+Write-behind buffer for quiz progress.
+
+Moving back a question and re-opening a paused quiz only change
+``current_question_index`` and the timer session fields. Instead of an
+UPDATE each time, the new values are kept in the cache and written to
+``QuizAttempt`` at most once per ``QUIZ_WRITE_BUFFER_SECONDS`` per attempt.
+Pausing, quitting, answering and finishing always write through, taking any
+buffered values with them.
+
+Views load attempts through ``get_buffered_attempt_or_404`` (or call
+``apply_buffered``), which overlays the buffered values on the row, so a
+read never sees stale progress. If the cache loses an entry, the attempt
+falls back to its last written state: at most one interval of navigation
+and timer precision.
+
+The buffer needs a cache shared by every worker process: Redis, configured
+in settings through ``REDIS_URL``. With the process-local fallback it stays
+off unless ``QUIZ_WRITE_BUFFER_SECONDS`` is set explicitly (fine for a
+single process).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_FLUSH_INTERVAL = 30
+
+# Unflushed entries are kept this long before the cache may drop them
+BUFFER_TTL = 24 * 60 * 60
+
+BUFFERED_FIELDS = ('current_question_index', 'time_spent_seconds', 'resumed_at', 'paused_at')
+DATETIME_FIELDS = ('resumed_at', 'paused_at')
+
+
+def _cache():
+    return caches[getattr(settings, 'QUIZ_WRITE_BUFFER_CACHE', 'default')]
+
+
+def flush_interval():
+    """Seconds between writes of buffered progress (0 = write through)."""
+    interval = getattr(settings, 'QUIZ_WRITE_BUFFER_SECONDS', None)
+    if interval is not None:
+        return interval
+    if isinstance(_cache(), (LocMemCache, DummyCache)):
+        return 0
+    return DEFAULT_FLUSH_INTERVAL
+
+
+def _key(attempt):
+    return f'quiz:progress:{attempt.pk}'
+
+
+def _encode(field, value):
+    if field in DATETIME_FIELDS and value is not None:
+        return value.isoformat()
+    return value
+
+
+def _decode(field, value):
+    if field in DATETIME_FIELDS and value is not None:
+        return parse_datetime(value)
+    return value
+
+
+def apply_buffered(attempt):
+    """Overlay buffered progress on a freshly loaded ``attempt``."""
+    if not flush_interval():
+        return attempt
+    entry = _cache().get(_key(attempt))
+    if entry:
+        for field, value in entry['fields'].items():
+            setattr(attempt, field, _decode(field, value))
+    return attempt
+
+
+def get_buffered_attempt_or_404(queryset, **lookups):
+    """``get_object_or_404`` for a ``QuizAttempt`` with buffered progress applied."""
+    return apply_buffered(get_object_or_404(queryset, **lookups))
+
+
+def save_progress(attempt, fields):
+    """
+    Save ``fields`` of ``attempt``, coalescing writes to one per interval.
+    Returns ``True`` when the row was written.
+    """
+    fields = list(fields)
+    if not fields:
+        return False
+    interval = flush_interval()
+    if not interval:
+        attempt.save(update_fields=fields + ['updated_at'])
+        return True
+
+    cache = _cache()
+    entry = cache.get(_key(attempt)) or {'fields': {}, 'flushed_at': 0}
+    for field in fields:
+        entry['fields'][field] = _encode(field, getattr(attempt, field))
+
+    written = time.time() - entry['flushed_at'] >= interval
+    if written:
+        attempt.save(update_fields=list(entry['fields']) + ['updated_at'])
+        entry = {'fields': {}, 'flushed_at': time.time()}
+    cache.set(_key(attempt), entry, BUFFER_TTL)
+    return written
+
+
+def flush_progress(attempt, fields=()):
+    """Write ``fields`` and any buffered progress of ``attempt`` now."""
+    pending = []
+    if flush_interval():
+        entry = _cache().get(_key(attempt))
+        if entry:
+            pending = list(entry['fields'])
+    update = list(dict.fromkeys(pending + list(fields)))
+    if update:
+        attempt.save(update_fields=update + ['updated_at'])
+    mark_flushed(attempt)
+
+
+def discard_buffered(attempt, fields):
+    """Drop buffered values of ``fields`` that were just written another way."""
+    if not flush_interval():
+        return
+    cache = _cache()
+    entry = cache.get(_key(attempt))
+    if entry and any(field in entry['fields'] for field in fields):
+        for field in fields:
+            entry['fields'].pop(field, None)
+        cache.set(_key(attempt), entry, BUFFER_TTL)
+
+
+def mark_flushed(attempt):
+    """Record that ``attempt`` was just saved in full (nothing left buffered)."""
+    if flush_interval():
+        _cache().set(_key(attempt), {'fields': {}, 'flushed_at': time.time()}, BUFFER_TTL)